@@ -7,7 +7,6 @@
 
 import os
 from flask import Flask, jsonify
-from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from datetime import timedelta
@@ -20,21 +19,109 @@ app.config['SECRET_KEY'] = 'wheelchair-rental-system-secret-key-2025'
 app.config['JWT_SECRET_KEY'] = 'jwt-secret-string-wheelchair-rental'
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 
-# 数据库配置
+# 数据库配置（未配置 DATABASE_URL 时使用本地SQLite文件）
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "wheelchair_rental.db")}'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL', f'sqlite:///{os.path.join(basedir, "wheelchair_rental.db")}'
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-# 初始化扩展
-db = SQLAlchemy(app)
+# 只读副本：配置后搜索、详情、管理端列表和统计接口的查询发送到副本，
+# 副本出错后 REPLICA_RETRY_INTERVAL 秒内改用主库
+if os.environ.get('REPLICA_DATABASE_URL'):
+    app.config['SQLALCHEMY_BINDS'] = {'replica': os.environ['REPLICA_DATABASE_URL']}
+app.config['REPLICA_RETRY_INTERVAL'] = int(os.environ.get('REPLICA_RETRY_INTERVAL', 30))
+# 副本最大复制延迟（秒）：目录缓存失效后这段时间内从副本读到的结果不写入缓存
+app.config['REPLICA_MAX_LAG'] = float(os.environ.get('REPLICA_MAX_LAG', 5))
+
+# 数据库引擎配置档：auto 时 SQLite 使用 sqlite_wal（WAL + PRAGMA），
+# PostgreSQL 使用 postgresql_pool（连接池 + 语句超时），default 为驱动默认设置
+app.config['DB_ENGINE_PROFILE'] = os.environ.get('DB_ENGINE_PROFILE', 'auto')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))
+app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 65536))
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+
+# 密码哈希配置：bcrypt在有界线程池中执行，超出并发+排队容量的登录请求返回429
+app.config['BCRYPT_ROUNDS'] = int(os.environ.get('BCRYPT_ROUNDS', 12))
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+app.config['PASSWORD_HASH_QUEUE_SIZE'] = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 16))
+# 校验备忘录：有效期内同一账号以相同密码重复登录时跳过bcrypt，0为关闭
+app.config['PASSWORD_VERIFY_MEMO_TTL'] = int(os.environ.get('PASSWORD_VERIFY_MEMO_TTL', 0))
+
+# 缓存存储配置：memory 为进程内缓存；多worker部署时使用 redis 共享缓存，
+# 配置 CACHE_REDIS_URL 后各worker通过发布/订阅广播缓存失效
+app.config['CACHE_BACKEND'] = os.environ.get('CACHE_BACKEND', 'memory')
+app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL')
+
+# 轮椅目录读缓存配置
+app.config['CATALOGUE_CACHE_SIZE'] = int(os.environ.get('CATALOGUE_CACHE_SIZE', 1024))
+app.config['CATALOGUE_CACHE_TTL'] = int(os.environ.get('CATALOGUE_CACHE_TTL', 60))
+
+# 订单号节点号（0-99）：多台主机或容器部署时每个节点配置不同的值，同一节点的各worker以进程号区分
+app.config['ORDER_NO_NODE_ID'] = int(os.environ.get('ORDER_NO_NODE_ID', 0))
+
+# 订单分区配置：PostgreSQL 预建 ORDER_PARTITION_MONTHS_AHEAD 个月的分区；
+# SQLite 配置 ORDER_ARCHIVE_DIR 后，ORDER_ARCHIVE_AFTER_MONTHS 个月之前已结束的订单按月迁出主表
+app.config['ORDER_ARCHIVE_DIR'] = os.environ.get('ORDER_ARCHIVE_DIR')
+app.config['ORDER_ARCHIVE_AFTER_MONTHS'] = int(os.environ.get('ORDER_ARCHIVE_AFTER_MONTHS', 3))
+app.config['ORDER_ARCHIVE_BATCH_SIZE'] = int(os.environ.get('ORDER_ARCHIVE_BATCH_SIZE', 1000))
+app.config['ORDER_PARTITION_MONTHS_AHEAD'] = int(os.environ.get('ORDER_PARTITION_MONTHS_AHEAD', 3))
+# 后台按 ORDER_PARTITION_MAINTAIN_INTERVAL 秒的周期重复上述维护（默认每天），不依赖服务重启
+app.config['ORDER_PARTITION_MAINTAIN_INTERVAL'] = int(os.environ.get('ORDER_PARTITION_MAINTAIN_INTERVAL', 86400))
+
+# 管理端身份缓存配置（权限校验时免查admin_user表）
+app.config['ADMIN_PRINCIPAL_CACHE_TTL'] = int(os.environ.get('ADMIN_PRINCIPAL_CACHE_TTL', 30))
+
+# 操作日志异步批量写入配置（默认关闭，逐条同步写入；开启后未配置预写文件时
+# 进程异常退出最多丢失队列中的日志）
+app.config['OPERATION_LOG_ASYNC'] = os.environ.get('OPERATION_LOG_ASYNC', 'false').lower() == 'true'
+app.config['OPERATION_LOG_BATCH_SIZE'] = int(os.environ.get('OPERATION_LOG_BATCH_SIZE', 100))
+app.config['OPERATION_LOG_FLUSH_INTERVAL_MS'] = int(os.environ.get('OPERATION_LOG_FLUSH_INTERVAL_MS', 200))
+app.config['OPERATION_LOG_QUEUE_SIZE'] = int(os.environ.get('OPERATION_LOG_QUEUE_SIZE', 10000))
+app.config['OPERATION_LOG_WAL_PATH'] = os.environ.get('OPERATION_LOG_WAL_PATH')
+
+# 过期预订单后台清理配置
+app.config['TEMP_ORDER_SWEEP_INTERVAL'] = int(os.environ.get('TEMP_ORDER_SWEEP_INTERVAL', 60))
+app.config['TEMP_ORDER_SWEEP_BATCH_SIZE'] = int(os.environ.get('TEMP_ORDER_SWEEP_BATCH_SIZE', 500))
+
+# 后台任务（过期预订单清理、订单分区维护和操作日志汇总）在每个服务进程处理第一个请求时启动，
+# python app.py、gunicorn app:app、uvicorn asgi:application 均适用；
+# 设置 BACKGROUND_WORKERS=false 关闭，改由定时任务执行 flask --app app sweep-temp-orders
+app.config['BACKGROUND_WORKERS'] = os.environ.get('BACKGROUND_WORKERS', 'true').lower() == 'true'
+
+# 初始化扩展（db实例定义在models包中，供各模型模块共享）
+from models import db
+from utils.engine import init_engine
+from utils.schema import ensure_column
+init_engine(app, db)
 jwt = JWTManager(app)
 CORS(app, origins=['http://localhost:3000', 'http://localhost:5173', 'http://localhost:8080'])
 
-# 导入路由（延迟导入模型避免循环依赖）
+# 导入并注册路由（导入即注册，gunicorn app:app 等WSGI服务器直接加载本模块时同样提供 /api 接口）
 from routes.client_api import client_bp
 from routes.admin_api import admin_bp
 
-# 注册蓝图将在init_database后调用
+app.register_blueprint(client_bp, url_prefix='/api')
+app.register_blueprint(admin_bp, url_prefix='/api/admin')
+
+# 后台任务
+from utils.sweeper import start_background_workers, start_on_first_request
+if app.config['BACKGROUND_WORKERS']:
+    start_on_first_request(app, start_background_workers)
+
+@app.cli.command('sweep-temp-orders')
+def sweep_temp_orders_command():
+    """执行一次过期预订单清理、订单分区维护和操作日志每日汇总（供定时任务调用）"""
+    from utils.sweeper import OrderPartitionMaintainer, TempOrderSweeper
+    swept = TempOrderSweeper(
+        app, batch_size=app.config['TEMP_ORDER_SWEEP_BATCH_SIZE']
+    ).run_once()
+    print(f"已清理过期预订单 {swept} 条")
+    OrderPartitionMaintainer(app).run_once()
 
 # 全局错误处理
 @app.errorhandler(404)
@@ -76,14 +163,45 @@ def missing_token_callback(error):
 # 健康检查接口
 @app.route('/health')
 def health_check():
+    data = {
+        'service': '在线轮椅租赁系统',
+        'version': '1.0.0',
+        'status': 'healthy',
+        'db_engine_profile': app.extensions.get('db_engine_profile')
+    }
+    
+    sweeper = app.extensions.get('temp_order_sweeper')
+    if sweeper:
+        data['temp_order_sweeper'] = sweeper.get_metrics()
+    
+    partition_maintainer = app.extensions.get('order_partition_maintainer')
+    if partition_maintainer:
+        data['order_partition_maintainer'] = partition_maintainer.get_metrics()
+    
+    principal_cache = app.extensions.get('admin_principal_cache')
+    if principal_cache:
+        data['admin_principal_cache'] = principal_cache.stats()
+    
+    password_hasher = app.extensions.get('password_hasher')
+    if password_hasher:
+        data['password_hasher'] = password_hasher.stats()
+    
+    log_writer = app.extensions.get('operation_log_writer')
+    if log_writer:
+        data['operation_log_writer'] = log_writer.get_metrics()
+    
+    replica_router = app.extensions.get('replica_router')
+    if replica_router:
+        data['replica'] = replica_router.stats()
+    
+    catalogue_cache = app.extensions.get('catalogue_cache')
+    if catalogue_cache:
+        data['catalogue_cache'] = catalogue_cache.stats()
+    
     return jsonify({
         'code': 200,
         'message': '服务运行正常',
-        'data': {
-            'service': '在线轮椅租赁系统',
-            'version': '1.0.0',
-            'status': 'healthy'
-        }
+        'data': data
     })
 
 # 根路径
@@ -105,18 +223,53 @@ def index():
 
 # 初始化数据库
 def init_database():
-    """初始化数据库表结构"""
+    """初始化数据库表结构和基础数据（路由在模块导入时已注册）"""
     with app.app_context():
         # 导入数据模型
-        from models.wheelchair import Wheelchair
+        from models.wheelchair import init_db, init_search_index
         from models.order import FormalOrder, TempOrder
         from models.user import AdminUser
         from models.log import OperationLog
+        from models.stats import DailyOrderStat, DailyWheelchairStat
+        
+        # 注册轮椅模型（整个应用只构建一次映射类）
+        init_db(db)
+        
+        # PostgreSQL 的 formal_order 按月分区，需在创建其他表时一并建好
+        from models.partition import maintain_order_partitions
+        partitioned = db.engine.dialect.name == 'postgresql'
+        if partitioned:
+            partitions = maintain_order_partitions(app)
+            if partitions:
+                print(f"订单分区已就绪: {', '.join(partitions)}")
         
         # 创建所有表
         db.create_all()
+        if ensure_column(db.engine, 'operation_log', 'detail', 'VARCHAR(255)'):
+            print("operation_log 已补充 detail 列")
         print("数据库表创建完成")
         
+        # SQLite 把已结束的历史订单按月迁移到 ORDER_ARCHIVE_DIR
+        if not partitioned:
+            for month, count in maintain_order_partitions(app).items():
+                print(f"{month} 的 {count} 个已结束订单已迁移到历史分区")
+        
+        # 建立轮椅全文索引（SQLite FTS5）
+        if init_search_index(db):
+            print("轮椅全文索引已就绪")
+        
+        # 汇总已结束日期的操作日志（之后由后台维护任务定期刷新）
+        from models.log import OperationLogDaily
+        if OperationLogDaily.refresh():
+            print("操作日志每日汇总已刷新")
+        
+        # 首次部署汇总表时按已有订单重建每日汇总
+        if DailyOrderStat.query.first() is None and FormalOrder.query.first() is not None:
+            DailyOrderStat.rebuild()
+            DailyWheelchairStat.rebuild()
+            db.session.commit()
+            print("订单每日汇总已重建")
+        
         # 检查是否需要初始化数据
         if AdminUser.query.count() == 0:
             print("正在初始化基础数据...")
@@ -126,6 +279,9 @@ if __name__ == '__main__':
     # 初始化数据库
     init_database()
     
+    # debug模式默认开启，FLASK_DEBUG=0 时关闭（同时关闭重载器）
+    debug = os.environ.get('FLASK_DEBUG', '1').lower() not in ('0', 'false', 'no')
+    
     # 启动应用
     print("正在启动在线轮椅租赁系统后端服务...")
     print("客户端API: http://localhost:5000/api")
@@ -135,5 +291,5 @@ if __name__ == '__main__':
     app.run(
         host='0.0.0.0',
         port=5000,
-        debug=True
+        debug=debug
     )
\ No newline at end of file
@@ -5,15 +5,22 @@
 用于测试基本功能
 """
 
+import json
 import os
 import uuid
-import bcrypt
 from datetime import datetime, timedelta
 from flask import Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from flask_cors import CORS
-from sqlalchemy import or_
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import joinedload
+from utils.pagination import paginate_query
+from utils.engine import init_engine
+from utils.order_no import next_order_no
+from utils.password import PasswordHasherBusy, get_password_hasher
+from utils.schema import ensure_column
+from utils.sweeper import TempOrderSweeper, start_on_first_request, start_temp_order_sweeper
 
 # 创建Flask应用实例
 app = Flask(__name__)
@@ -23,13 +30,30 @@ app.config['SECRET_KEY'] = 'wheelchair-rental-system-secret-key-2025'
 app.config['JWT_SECRET_KEY'] = 'jwt-secret-string-wheelchair-rental'
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 
-# 数据库配置
+# 数据库配置（未配置 DATABASE_URL 时使用本地SQLite文件）
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "wheelchair_rental.db")}'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL', f'sqlite:///{os.path.join(basedir, "wheelchair_rental.db")}'
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# 数据库引擎配置档：auto、default、sqlite_wal 或 postgresql_pool
+app.config['DB_ENGINE_PROFILE'] = os.environ.get('DB_ENGINE_PROFILE', 'auto')
+
+# 密码哈希配置：bcrypt在有界线程池中执行，超出并发+排队容量的登录请求返回429
+app.config['BCRYPT_ROUNDS'] = int(os.environ.get('BCRYPT_ROUNDS', 12))
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+app.config['PASSWORD_HASH_QUEUE_SIZE'] = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 16))
+
+# 过期预订单后台清理：在每个服务进程处理第一个请求时启动（python app_simple.py 与
+# gunicorn app_simple:app 均适用）；BACKGROUND_WORKERS=false 时关闭，
+# 改由定时任务执行 flask --app app_simple sweep-temp-orders
+app.config['BACKGROUND_WORKERS'] = os.environ.get('BACKGROUND_WORKERS', 'true').lower() == 'true'
+app.config['TEMP_ORDER_SWEEP_INTERVAL'] = int(os.environ.get('TEMP_ORDER_SWEEP_INTERVAL', 60))
+app.config['TEMP_ORDER_SWEEP_BATCH_SIZE'] = int(os.environ.get('TEMP_ORDER_SWEEP_BATCH_SIZE', 500))
 
 # 初始化扩展
-db = SQLAlchemy(app)
+db = SQLAlchemy()
+init_engine(app, db)
 jwt = JWTManager(app)
 CORS(app, origins=['http://localhost:3000', 'http://localhost:5173', 'http://localhost:5174', 'http://localhost:5175', 'http://localhost:5176', 'http://localhost:8080'])
 
@@ -64,6 +88,56 @@ class Wheelchair(db.Model):
             self.stock -= quantity
             return True
         return False
+    
+    @classmethod
+    def reserve_stock(cls, wheelchair_id, quantity=1):
+        """原子扣减库存（条件更新，以受影响行数判断是否成功，不提交事务）"""
+        result = db.session.execute(
+            update(cls)
+            .where(
+                cls.id == wheelchair_id,
+                cls.is_deleted == False,
+                cls.is_offline == False,
+                cls.stock >= quantity
+            )
+            .values(stock=cls.stock - quantity)
+            .execution_options(synchronize_session='fetch')
+        )
+        return result.rowcount == 1
+    
+    # 管理端批量状态对应的批量操作
+    BATCH_STATUS_ACTIONS = {'available': 'online', 'maintenance': 'offline', 'discontinued': 'offline'}
+    BATCH_CHUNK_SIZE = 500
+    BATCH_MAX_IDS = 10000
+    
+    @classmethod
+    def batch_operate(cls, wheelchair_ids, action):
+        """批量上架/下架/删除（每块ID一条 UPDATE ... WHERE id IN，不提交事务）
+        
+        Returns:
+            dict: requested（去重后的ID数）、affected（实际变更数）
+        """
+        if action == 'online':
+            conditions, values = [cls.is_deleted == False, cls.is_offline == True], {'is_offline': False}
+        elif action == 'offline':
+            conditions, values = [cls.is_deleted == False, cls.is_offline == False], {'is_offline': True}
+        elif action == 'delete':
+            conditions, values = [cls.is_deleted == False], {'is_deleted': True}
+        else:
+            raise ValueError(f'无效的批量操作类型: {action}')
+        
+        ids = list(dict.fromkeys(wheelchair_ids))
+        affected = 0
+        for start in range(0, len(ids), cls.BATCH_CHUNK_SIZE):
+            result = db.session.execute(
+                update(cls)
+                .where(cls.id.in_(ids[start:start + cls.BATCH_CHUNK_SIZE]), *conditions)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            affected += result.rowcount
+        db.session.expire_all()
+        return {'requested': len(ids), 'affected': affected}
 
 class FormalOrder(db.Model):
     """正式订单模型"""
@@ -97,11 +171,8 @@ class FormalOrder(db.Model):
         }
     
     @staticmethod
-    def generate_order_no():
-        now = datetime.now()
-        timestamp = now.strftime('%Y%m%d%H%M%S')
-        random_suffix = str(uuid.uuid4())[:6].upper()
-        return f'WR{timestamp}{random_suffix}'
+    def generate_order_no(now=None):
+        return next_order_no(now)
 
 class TempOrder(db.Model):
     """临时预订单模型"""
@@ -127,6 +198,21 @@ class TempOrder(db.Model):
     def get_expire_time(self):
         return self.create_time + timedelta(minutes=30)
     
+    @classmethod
+    def sweep_expired_batch(cls, batch_size=500):
+        """删除一批过期的预订单并提交（创建时间为本地时间），返回删除的行数"""
+        expired_ids = (
+            select(cls.id)
+            .where(cls.create_time < datetime.now() - timedelta(minutes=30))
+            .order_by(cls.create_time)
+            .limit(batch_size)
+        )
+        result = db.session.execute(
+            delete(cls).where(cls.id.in_(expired_ids)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
+    
     def is_expired(self):
         return datetime.utcnow() > self.get_expire_time()
 
@@ -141,19 +227,10 @@ class AdminUser(db.Model):
     is_deleted = db.Column(db.Boolean, default=False)
     
     def set_password(self, password):
-        if isinstance(password, str):
-            password = password.encode('utf-8')
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password, salt).decode('utf-8')
+        self.password_hash = get_password_hasher().hash(password)
     
     def check_password(self, password):
-        if isinstance(password, str):
-            password = password.encode('utf-8')
-        if isinstance(self.password_hash, str):
-            password_hash = self.password_hash.encode('utf-8')
-        else:
-            password_hash = self.password_hash
-        return bcrypt.checkpw(password, password_hash)
+        return get_password_hasher().verify(password, self.password_hash)
     
     def to_dict(self):
         return {
@@ -163,6 +240,28 @@ class AdminUser(db.Model):
             'is_deleted': self.is_deleted
         }
 
+class OperationLog(db.Model):
+    """操作日志模型（与 models.log.OperationLog 共用 operation_log 表）"""
+    __tablename__ = 'operation_log'
+    
+    TYPE_BATCH_OPERATE_WHEELCHAIR = '批量操作轮椅'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    operator_id = db.Column(db.Integer, db.ForeignKey('admin_user.id'), nullable=False)
+    operate_type = db.Column(db.String(50), nullable=False)
+    target_id = db.Column(db.Integer)
+    operate_time = db.Column(db.DateTime, default=datetime.utcnow)
+    detail = db.Column(db.String(255))
+    
+    @classmethod
+    def batch_summary(cls, operator_id, action, result):
+        """整批操作的汇总日志：一行记录动作、请求数和实际生效数"""
+        return cls(operator_id=operator_id, operate_type=cls.TYPE_BATCH_OPERATE_WHEELCHAIR, detail=json.dumps({
+            'action': action,
+            'requested': result['requested'],
+            'affected': result['affected']
+        }))
+
 class ClientUser(db.Model):
     """客户端用户模型"""
     __tablename__ = 'client_user'
@@ -176,19 +275,10 @@ class ClientUser(db.Model):
     last_login = db.Column(db.DateTime)
     
     def set_password(self, password):
-        if isinstance(password, str):
-            password = password.encode('utf-8')
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password, salt).decode('utf-8')
+        self.password_hash = get_password_hasher().hash(password)
     
     def check_password(self, password):
-        if isinstance(password, str):
-            password = password.encode('utf-8')
-        if isinstance(self.password_hash, str):
-            password_hash = self.password_hash.encode('utf-8')
-        else:
-            password_hash = self.password_hash
-        return bcrypt.checkpw(password, password_hash)
+        return get_password_hasher().verify(password, self.password_hash)
     
     def to_dict(self):
         return {
@@ -271,6 +361,9 @@ def client_register():
             'user_info': user.to_dict()
         }, '注册成功')
         
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return error_response(str(e), 429)
     except Exception as e:
         db.session.rollback()
         return error_response(f'注册失败: {str(e)}', 500)
@@ -303,6 +396,8 @@ def client_login():
             'user_info': user.to_dict()
         })
         
+    except PasswordHasherBusy as e:
+        return error_response(str(e), 429)
     except Exception as e:
         return error_response(f'登录失败: {str(e)}', 500)
 
@@ -363,8 +458,7 @@ def search_wheelchairs():
         else:
             query = query.order_by(Wheelchair.id.desc())
         
-        total = query.count()
-        wheelchairs = query.offset((page - 1) * limit).limit(limit).all()
+        wheelchairs, total = paginate_query(query, page, limit, request.args.get('count', 'exact'))
         
         wheelchair_list = [wheelchair.to_dict() for wheelchair in wheelchairs]
         
@@ -475,21 +569,30 @@ def submit_order():
             return error_response('轮椅不存在或库存不足', 404)
         
         try:
+            # 删除预订单，防止同一预订单被并发重复提交
+            deleted = TempOrder.query.filter(TempOrder.id == pre_order_id).delete()
+            if deleted != 1:
+                db.session.rollback()
+                return error_response('预订单已提交，请勿重复支付', 400)
+            
+            # 原子扣减库存，库存不足时整体回滚
+            if not Wheelchair.reserve_stock(temp_order.wheelchair_id, 1):
+                db.session.rollback()
+                return error_response('轮椅库存不足', 400)
+            
+            # 使用本地时间记录下单时间，确保管理员端显示与实际一致；订单号嵌入同一时间
+            now = datetime.now()
             formal_order = FormalOrder(
-                order_no=FormalOrder.generate_order_no(),
+                order_no=FormalOrder.generate_order_no(now),
                 user_name=temp_order.user_name,
                 user_phone=temp_order.user_phone,
                 user_address=temp_order.user_address,
                 wheelchair_id=temp_order.wheelchair_id,
                 deposit=wheelchair.price,
-                # 使用本地时间记录下单时间，确保管理员端显示与实际一致
-                create_time=datetime.now()
+                create_time=now
             )
             
-            wheelchair.reduce_stock(1)
-            
             db.session.add(formal_order)
-            db.session.delete(temp_order)
             db.session.commit()
             
             return success_response({
@@ -562,6 +665,8 @@ def admin_login():
             }
         })
         
+    except PasswordHasherBusy as e:
+        return error_response(str(e), 429)
     except Exception as e:
         return error_response(f'登录失败: {str(e)}', 500)
 
@@ -584,8 +689,8 @@ def get_inventory_list():
             )
             query = query.filter(search_filter)
         
-        total = query.count()
-        wheelchairs = query.order_by(Wheelchair.id.desc()).offset((page - 1) * limit).limit(limit).all()
+        query = query.order_by(Wheelchair.id.desc())
+        wheelchairs, total = paginate_query(query, page, limit, request.args.get('count', 'exact'))
         
         wheelchair_list = [wheelchair.to_dict() for wheelchair in wheelchairs]
         
@@ -681,7 +786,8 @@ def operate_wheelchair():
         if action:
             operate_type = action
         
-        # 处理批量状态更新
+        # 处理批量操作：status 可以是 online/offline/delete，也可以是管理端的
+        # available/maintenance/discontinued
         if operate_type == 'batch_status':
             ids = data.get('ids', [])
             status = data.get('status')
@@ -689,19 +795,28 @@ def operate_wheelchair():
             if not ids or not status:
                 return error_response('批量操作需要提供ids和status', 400)
             
-            updated_count = 0
-            
-            for wheelchair_id in ids:
-                wheelchair = Wheelchair.query.get(wheelchair_id)
-                if wheelchair:
-                    wheelchair.status = status
-                    updated_count += 1
+            batch_action = Wheelchair.BATCH_STATUS_ACTIONS.get(status, status)
+            if batch_action not in ('online', 'offline', 'delete'):
+                return error_response('无效的批量操作类型', 400)
+            if not isinstance(ids, list) or len(ids) > Wheelchair.BATCH_MAX_IDS:
+                return error_response(f'ids必须是不超过{Wheelchair.BATCH_MAX_IDS}个的列表', 400)
+            try:
+                ids = [int(wheelchair_id) for wheelchair_id in ids]
+            except (ValueError, TypeError):
+                return error_response('ids格式不正确', 400)
             
+            result = Wheelchair.batch_operate(ids, batch_action)
+            if result['affected']:
+                # 整批只写一条汇总日志，与状态更新同一事务提交
+                db.session.add(OperationLog.batch_summary(int(get_jwt_identity()), batch_action, result))
             db.session.commit()
             
             return success_response({
-                'message': f'成功更新 {updated_count} 个轮椅状态',
-                'updated_count': updated_count
+                'message': f"成功更新 {result['affected']} 个轮椅状态",
+                'action': batch_action,
+                'requested_count': result['requested'],
+                'updated_count': result['affected'],
+                'unchanged_count': result['requested'] - result['affected']
             })
         
         # 单个轮椅操作
@@ -747,13 +862,13 @@ def get_order_list():
         limit = int(request.args.get('limit', 10))
         status = request.args.get('status', '').strip()
         
-        query = FormalOrder.query
+        query = FormalOrder.query.options(joinedload(FormalOrder.wheelchair))
         
         if status:
             query = query.filter(FormalOrder.status == status)
         
-        total = query.count()
-        orders = query.order_by(FormalOrder.create_time.desc()).offset((page - 1) * limit).limit(limit).all()
+        query = query.order_by(FormalOrder.create_time.desc())
+        orders, total = paginate_query(query, page, limit, request.args.get('count', 'exact'))
         
         order_list = [order.to_dict() for order in orders]
         
@@ -776,6 +891,21 @@ def health_check():
         'status': 'healthy'
     })
 
+# 后台任务
+def start_background_workers(app):
+    start_temp_order_sweeper(app, sweepers=[TempOrder.sweep_expired_batch])
+
+if app.config['BACKGROUND_WORKERS']:
+    start_on_first_request(app, start_background_workers)
+
+@app.cli.command('sweep-temp-orders')
+def sweep_temp_orders_command():
+    """执行一次过期预订单清理（供定时任务调用）"""
+    swept = TempOrderSweeper(
+        app, batch_size=app.config['TEMP_ORDER_SWEEP_BATCH_SIZE'], sweepers=[TempOrder.sweep_expired_batch]
+    ).run_once()
+    print(f"已清理过期预订单 {swept} 条")
+
 # 根路径
 @app.route('/')
 def index():
@@ -794,6 +924,7 @@ def init_database():
     """初始化数据库表结构和基础数据"""
     with app.app_context():
         db.create_all()
+        ensure_column(db.engine, 'operation_log', 'detail', 'VARCHAR(255)')
         print("数据库表创建完成")
         
         # 检查是否需要初始化数据
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASGI 入口
+客户端只读接口（轮椅搜索、轮椅详情、订单详情）以协程方式在异步数据库驱动上执行，
+慢客户端不再各占一个线程；其余接口仍由 Flask 应用在线程池中处理
+
+用法: uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 4
+"""
+
+from app import app, init_database
+from routes.async_client_api import ASYNC_VIEWS
+from utils.asgi import AsgiApplication
+from utils.sweeper import start_background_workers
+
+# 初始化数据库（每个worker进程各自执行）
+init_database()
+
+# 协程接口不经过 Flask 的 before_request，后台任务在此直接启动
+if app.config['BACKGROUND_WORKERS']:
+    start_background_workers(app)
+
+application = AsgiApplication(app, ASYNC_VIEWS)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+同步/异步服务模式负载测试
+分别以同步模式（Flask 多线程服务器，与 app.run 相同）和 ASGI 模式（uvicorn + 协程接口）
+启动服务进程，保持大量并发连接（默认2000）持续请求轮椅搜索、轮椅详情和订单详情，
+对比吞吐量、p50/p95/p99 延迟和失败请求数（连接被拒绝、超时、非200响应）。
+
+用法: python benchmarks/bench_asgi_load.py [--connections 2000] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import create_bench_app, percentile
+from models import db, Wheelchair
+
+HOST = '127.0.0.1'
+
+def bench_app(database):
+    # 关闭目录缓存，让每次请求都执行查询
+    return create_bench_app(f'sqlite:///{database}', DB_ENGINE_PROFILE='sqlite_wal', CATALOGUE_CACHE_SIZE=0)
+
+def seed(database, rows, orders):
+    """写入测试数据，返回可请求的路径列表"""
+    app = bench_app(database)
+    with app.app_context():
+        for i in range(rows):
+            db.session.add(Wheelchair(
+                name=f'电动轮椅{i}',
+                price=100.0 + i,
+                description=f'测试轮椅描述{i}',
+                stock=1000,
+                manufacturer='基准测试厂商'
+            ))
+        db.session.commit()
+        wheelchair_ids = [row[0] for row in db.session.query(Wheelchair.id)]
+
+    client = app.test_client()
+    order_nos = []
+    for i in range(orders):
+        response = client.post('/api/order/precreate', json={
+            'name': '测试用户',
+            'phone': '13800138000',
+            'address': '测试地址',
+            'wheelchair_id': wheelchair_ids[i % len(wheelchair_ids)]
+        })
+        response = client.post('/api/order/submit', json={'pre_order_id': response.get_json()['data']['pre_order_id']})
+        order_nos.append(response.get_json()['data']['order_no'])
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+    paths = [f'/api/wheelchair/search?page={page}&limit=10' for page in range(1, 6)]
+    paths += [f'/api/wheelchair/detail/{wheelchair_id}' for wheelchair_id in wheelchair_ids]
+    paths += [f'/api/order/detail/{order_no}' for order_no in order_nos]
+    return paths
+
+def serve(mode, database, port):
+    """服务进程"""
+    app = bench_app(database)
+    if mode == 'sync':
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        app.run(host=HOST, port=port, threaded=True)
+        return
+
+    import uvicorn
+    from routes.async_client_api import ASYNC_VIEWS
+    from utils.asgi import AsgiApplication
+
+    uvicorn.run(AsgiApplication(app, ASYNC_VIEWS), host=HOST, port=port, log_level='error',
+                backlog=4096, access_log=False)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((HOST, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'服务未在{timeout}秒内启动')
+
+async def read_response(reader):
+    """读取一个HTTP响应，返回 (状态码, 连接是否可复用)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('连接已关闭')
+    version, status = status_line.split()[:2]
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+        return int(status), False
+    keep_alive = version == b'HTTP/1.1' and headers.get('connection') != 'close'
+    return int(status), keep_alive
+
+async def connection_loop(port, paths, deadline, timeout, result):
+    """单个连接持续发送请求（服务端不支持长连接时每次重新连接）"""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        path = random.choice(paths)
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(HOST, port), timeout)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\n\r\n'.encode('latin-1'))
+            status, keep_alive = await asyncio.wait_for(read_response(reader), timeout)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            result['errors'] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.1)
+            continue
+        result['samples'].append(time.perf_counter() - start)
+        if status != 200:
+            result['errors'] += 1
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+
+async def load(port, paths, args):
+    result = {'samples': [], 'errors': 0}
+    deadline = time.perf_counter() + args.duration
+    await asyncio.gather(*[
+        connection_loop(port, paths, deadline, args.timeout, result) for _ in range(args.connections)
+    ])
+    return result
+
+def run(mode, database, paths, args):
+    port = free_port()
+    server = subprocess.Popen([sys.executable, __file__, '--serve', mode, '--database', database, '--port', str(port)])
+    try:
+        wait_for_port(port)
+        result = asyncio.run(load(port, paths, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    samples = result['samples']
+    print(f'[{mode}] 并发连接={args.connections} 时长={args.duration}s')
+    print(f'  完成 {len(samples)} 个请求 ({len(samples) / args.duration:.0f}/s) 失败={result["errors"]}')
+    print(f'  p50={percentile(samples, 50):.1f}ms p95={percentile(samples, 95):.1f}ms '
+          f'p99={percentile(samples, 99):.1f}ms')
+
+def main():
+    parser = argparse.ArgumentParser(description='同步/异步服务模式负载测试')
+    parser.add_argument('--connections', type=int, default=2000)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--timeout', type=float, default=30.0, help='单个请求的超时时间（秒）')
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--serve', choices=['sync', 'async'], help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.database, args.port)
+        return
+
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    paths = seed(database, args.rows, args.orders)
+    for mode in ('sync', 'async'):
+        run(mode, database, paths, args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录风暴负载测试
+多个线程持续发起管理员登录（bcrypt校验）的同时，单线程测量轮椅搜索延迟，
+对比有界密码哈希线程池与近似无界（大线程池、大队列）两种配置下搜索延迟的变化，
+并统计被快速拒绝（429）的登录请求数。
+
+用法: python benchmarks/bench_login_storm.py [--login-threads 32] [--duration 5] [--rounds 12]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from common import create_bench_app, percentile
+from models import db, AdminUser, Wheelchair
+
+def seed(app, rows):
+    """写入测试数据"""
+    with app.app_context():
+        db.session.add(AdminUser(username='admin', password='123456', role=AdminUser.ROLE_ADMIN))
+        for i in range(rows):
+            db.session.add(Wheelchair(
+                name=f'电动轮椅{i}',
+                price=100.0 + i,
+                description=f'测试轮椅描述{i}',
+                stock=5,
+                manufacturer='基准测试厂商'
+            ))
+        db.session.commit()
+
+def measure_search(client, duration, samples):
+    """在指定时长内连续搜索，记录每次延迟"""
+    deadline = time.perf_counter() + duration
+    page = 0
+    while time.perf_counter() < deadline:
+        page = page % 5 + 1
+        start = time.perf_counter()
+        response = client.get(f'/api/wheelchair/search?page={page}&limit=10')
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200
+
+def login_storm(app, stop, results):
+    """持续登录直到收到停止信号"""
+    client = app.test_client()
+    while not stop.is_set():
+        response = client.post('/api/admin/login', json={'username': 'admin', 'password': '123456'})
+        results.append(response.status_code)
+        if response.status_code == 429:
+            # 被拒绝的客户端稍后重试
+            time.sleep(0.05)
+
+def run(label, args, workers, queue_size):
+    # 多线程并发访问，使用临时数据库文件而非内存数据库
+    tmpdir = tempfile.mkdtemp()
+    app = create_bench_app(
+        f'sqlite:///{os.path.join(tmpdir, "bench.db")}',
+        BCRYPT_ROUNDS=args.rounds,
+        PASSWORD_HASH_WORKERS=workers,
+        PASSWORD_HASH_QUEUE_SIZE=queue_size,
+        # 关闭目录缓存，让每次搜索都执行查询
+        CATALOGUE_CACHE_SIZE=0
+    )
+    seed(app, args.rows)
+    client = app.test_client()
+
+    baseline = []
+    measure_search(client, args.duration, baseline)
+
+    stop = threading.Event()
+    statuses = []
+    threads = [threading.Thread(target=login_storm, args=(app, stop, statuses))
+               for _ in range(args.login_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+
+    storm = []
+    measure_search(client, args.duration, storm)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f'[{label}] workers={workers} queue={queue_size}')
+    print(f'  搜索延迟 基线   p50={percentile(baseline, 50):.2f}ms p95={percentile(baseline, 95):.2f}ms '
+          f'p99={percentile(baseline, 99):.2f}ms n={len(baseline)}')
+    print(f'  搜索延迟 登录中 p50={percentile(storm, 50):.2f}ms p95={percentile(storm, 95):.2f}ms '
+          f'p99={percentile(storm, 99):.2f}ms n={len(storm)}')
+    print(f'  登录请求 成功={statuses.count(200)} 拒绝(429)={statuses.count(429)} '
+          f'其他={len(statuses) - statuses.count(200) - statuses.count(429)}')
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description='登录风暴负载测试')
+    parser.add_argument('--login-threads', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--queue-size', type=int, default=2)
+    args = parser.parse_args()
+
+    run('有界线程池', args, args.workers, args.queue_size)
+    run('近似无界', args, args.login_threads, args.login_threads)
+
+if __name__ == '__main__':
+    main()
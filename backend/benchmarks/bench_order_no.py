@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单号生成基准测试
+1. 冲突率：多个worker进程按目标速率（默认合计5000个/秒）生成订单号，统计重复数量；
+2. 写入吞吐量：按生成顺序把订单写入带 order_no 唯一索引的 formal_order 表，
+   统计每秒写入行数和因唯一约束被拒绝的行数。
+对比旧的生成方式（秒级时间 + uuid4 前6位）与 utils/order_no.py 的逻辑时钟生成器。
+
+用法: python benchmarks/bench_order_no.py [--rate 5000] [--workers 4] [--duration 5]
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from common import create_bench_app
+from models import db, FormalOrder
+from sqlalchemy import insert
+from utils.order_no import next_order_no
+
+def legacy_order_no():
+    """旧的生成方式"""
+    timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    return f'WR{timestamp}{str(uuid.uuid4())[:6].upper()}'
+
+GENERATORS = {
+    'legacy': legacy_order_no,
+    'sequence': next_order_no
+}
+
+def generate(args):
+    """worker进程：按 rate 个/秒的速率生成 duration 秒"""
+    name, rate, duration = args
+    generator = GENERATORS[name]
+    numbers = []
+    start = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            break
+        # 每10毫秒补齐到目标数量
+        target = int(elapsed * rate) + 1
+        while len(numbers) < target:
+            numbers.append(generator())
+        time.sleep(0.01)
+    return numbers
+
+def collision_rate(name, args):
+    per_worker = args.rate / args.workers
+    # spawn 保证每个worker都是新进程（与gunicorn的独立worker进程一致）
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.workers) as pool:
+        batches = pool.map(generate, [(name, per_worker, args.duration)] * args.workers)
+    # 各进程的订单号按嵌入的时间排列，近似实际的写入顺序
+    numbers = sorted((order_no for batch in batches for order_no in batch), key=lambda order_no: order_no[2:16])
+    return numbers, len(numbers) - len(set(numbers))
+
+def insert_throughput(numbers, batch_size):
+    """按生成顺序批量写入，返回 (每秒行数, 被唯一约束拒绝的行数)"""
+    tmpdir = tempfile.mkdtemp()
+    app = create_bench_app(f'sqlite:///{os.path.join(tmpdir, "bench.db")}')
+    now = datetime.utcnow()
+    rejected = 0
+    with app.app_context():
+        statement = insert(FormalOrder.__table__).prefix_with('OR IGNORE')
+        start = time.perf_counter()
+        for offset in range(0, len(numbers), batch_size):
+            rows = [{
+                'order_no': order_no,
+                'user_name': '测试用户',
+                'user_phone': '13800138000',
+                'user_address': '测试地址',
+                'wheelchair_id': 1,
+                'deposit': 100.0,
+                'status': FormalOrder.STATUS_PENDING,
+                'create_time': now
+            } for order_no in numbers[offset:offset + batch_size]]
+            rejected += len(rows) - db.session.execute(statement, rows).rowcount
+            db.session.commit()
+        elapsed = time.perf_counter() - start
+        db.session.remove()
+        db.engine.dispose()
+    return len(numbers) / elapsed, rejected
+
+def main():
+    parser = argparse.ArgumentParser(description='订单号生成基准测试')
+    parser.add_argument('--rate', type=int, default=5000, help='合计每秒生成数量')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    for name in GENERATORS:
+        numbers, duplicates = collision_rate(name, args)
+        throughput, rejected = insert_throughput(numbers, args.batch_size)
+        print(f'[{name}] 生成 {len(numbers)} 个 ({len(numbers) / args.duration:.0f}/s, {args.workers} 个进程)')
+        print(f'  重复 {duplicates} 个，冲突率 {duplicates / len(numbers):.4%}')
+        print(f'  写入 {throughput:.0f} 行/s，唯一约束拒绝 {rejected} 行')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 并发读写基准测试
+多个线程持续下单（预订单 + 正式订单，写事务）的同时，多个线程持续搜索轮椅（读），
+对比驱动默认设置（回滚日志）与 sqlite_wal 配置档下的吞吐量、延迟和失败请求数。
+
+用法: python benchmarks/bench_sqlite_contention.py [--writers 8] [--readers 8] [--duration 5]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from common import create_bench_app, percentile
+from models import db, Wheelchair
+
+def seed(app, rows):
+    """写入测试数据（库存足够大，下单不会因库存不足失败）"""
+    with app.app_context():
+        for i in range(rows):
+            db.session.add(Wheelchair(
+                name=f'电动轮椅{i}',
+                price=100.0 + i,
+                description=f'测试轮椅描述{i}',
+                stock=1000000,
+                manufacturer='基准测试厂商'
+            ))
+        db.session.commit()
+        return [row[0] for row in db.session.query(Wheelchair.id)]
+
+def writer(app, wheelchair_ids, stop, samples, statuses):
+    """持续下单直到收到停止信号"""
+    client = app.test_client()
+    index = 0
+    while not stop.is_set():
+        index += 1
+        start = time.perf_counter()
+        response = client.post('/api/order/precreate', json={
+            'name': '测试用户',
+            'phone': '13800138000',
+            'address': '测试地址',
+            'wheelchair_id': wheelchair_ids[index % len(wheelchair_ids)]
+        })
+        if response.status_code == 200:
+            pre_order_id = response.get_json()['data']['pre_order_id']
+            response = client.post('/api/order/submit', json={'pre_order_id': pre_order_id})
+        samples.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+
+def reader(app, stop, samples, statuses):
+    """持续搜索直到收到停止信号"""
+    client = app.test_client()
+    page = 0
+    while not stop.is_set():
+        page = page % 5 + 1
+        start = time.perf_counter()
+        response = client.get(f'/api/wheelchair/search?page={page}&limit=10')
+        samples.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+
+def run(profile, args):
+    # 多线程并发访问，使用临时数据库文件而非内存数据库
+    tmpdir = tempfile.mkdtemp()
+    app = create_bench_app(
+        f'sqlite:///{os.path.join(tmpdir, "bench.db")}',
+        DB_ENGINE_PROFILE=profile,
+        SQLITE_BUSY_TIMEOUT_MS=args.busy_timeout,
+        # 关闭目录缓存，让每次搜索都执行查询
+        CATALOGUE_CACHE_SIZE=0
+    )
+    wheelchair_ids = seed(app, args.rows)
+
+    stop = threading.Event()
+    write_samples, write_statuses = [], []
+    read_samples, read_statuses = [], []
+    threads = [threading.Thread(target=writer, args=(app, wheelchair_ids, stop, write_samples, write_statuses))
+               for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(app, stop, read_samples, read_statuses))
+                for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+
+    print(f'[{profile}] journal_mode={journal_mode} writers={args.writers} readers={args.readers}')
+    print(f'  下单 {len(write_samples) / args.duration:.1f}/s p50={percentile(write_samples, 50):.2f}ms '
+          f'p95={percentile(write_samples, 95):.2f}ms p99={percentile(write_samples, 99):.2f}ms '
+          f'失败={len(write_statuses) - write_statuses.count(200)}')
+    print(f'  搜索 {len(read_samples) / args.duration:.1f}/s p50={percentile(read_samples, 50):.2f}ms '
+          f'p95={percentile(read_samples, 95):.2f}ms p99={percentile(read_samples, 99):.2f}ms '
+          f'失败={len(read_statuses) - read_statuses.count(200)}')
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 并发读写基准测试')
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--busy-timeout', type=int, default=5000)
+    args = parser.parse_args()
+
+    run('default', args)
+    run('sqlite_wal', args)
+
+if __name__ == '__main__':
+    main()
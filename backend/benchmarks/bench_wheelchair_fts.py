@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轮椅全文搜索基准测试
+生成大量轮椅数据，对比 LIKE 匹配和 FTS5 trigram 全文索引的搜索延迟。
+
+用法: python benchmarks/bench_wheelchair_fts.py [--rows 100000] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from common import create_bench_app, percentile
+from models import db, Wheelchair
+from models.wheelchair import get_wheelchair_model
+
+TYPES = ['电动', '手动', '折叠', '运动型', '护理型', '站立式', '躺卧式', '智能']
+EDITIONS = ['豪华版', '标准版', '经济版', '便携版', '加宽版', '儿童版']
+FEATURES = ['GPS定位', '智能刹车', '可拆卸扶手', '加厚坐垫', '铝合金车架', '续航40公里', '一键折叠']
+MAKERS = ['智能康复设备有限公司', '康复器械制造厂', '医疗设备公司', '便携医疗器械厂', '运动康复设备公司']
+
+# 既包含命中少量行的精确关键词，也包含命中大量行的宽泛关键词
+KEYWORDS = ['轮椅豪华版4321', '版98765', '站立式轮椅儿童版', '豪华版', '智能刹车', '便携医疗器械']
+
+def seed(app, rows):
+    """批量生成轮椅数据"""
+    rng = random.Random(42)
+    WheelchairModel = get_wheelchair_model()
+    with app.app_context():
+        batch = []
+        for i in range(rows):
+            batch.append({
+                'name': f'{rng.choice(TYPES)}轮椅{rng.choice(EDITIONS)}{i}',
+                'description': '、'.join(rng.sample(FEATURES, 3)),
+                'manufacturer': rng.choice(MAKERS),
+                'price': round(rng.uniform(50, 500), 2),
+                'stock': rng.randint(0, 20),
+                'is_offline': False,
+                'is_deleted': False
+            })
+            if len(batch) == 5000:
+                db.session.execute(WheelchairModel.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(WheelchairModel.__table__.insert(), batch)
+        db.session.commit()
+
+def run(app, keyword, queries, fulltext):
+    samples = []
+    with app.app_context():
+        for _ in range(queries):
+            start = time.perf_counter()
+            Wheelchair.search(keyword=keyword, page=1, limit=10, fulltext=fulltext)
+            samples.append(time.perf_counter() - start)
+            db.session.remove()
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description='轮椅全文搜索基准测试')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = create_bench_app(f'sqlite:///{os.path.join(tmpdir, "bench.db")}')
+
+        start = time.perf_counter()
+        seed(app, args.rows)
+        print(f'已生成 {args.rows} 条轮椅数据（含触发器同步索引），耗时 {time.perf_counter() - start:.1f}s')
+
+        print(f"{'关键词':<16} {'命中数':>8} {'模式':<6} {'平均(ms)':>10} {'p99(ms)':>10}")
+        for keyword in KEYWORDS:
+            with app.app_context():
+                _, total = Wheelchair.search(keyword=keyword)
+            for label, fulltext in [('LIKE', False), ('FTS5', True)]:
+                samples = run(app, keyword, args.queries, fulltext)
+                avg = sum(samples) / len(samples) * 1000
+                print(f'{keyword:<16} {total:>8} {label:<6} {avg:>10.3f} {percentile(samples, 99):>10.3f}')
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+if __name__ == '__main__':
+    main()
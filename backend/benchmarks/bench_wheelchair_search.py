@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轮椅搜索基准测试
+连续执行大量搜索请求，按窗口输出平均延迟、内存占用和映射类数量，
+用于确认轮椅模型只构建一次、单次请求开销不随调用次数增长。
+
+用法: python benchmarks/bench_wheelchair_search.py [--iterations 100000] [--window 10000]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from common import create_bench_app, percentile
+from models import db, Wheelchair
+
+def seed(app, count):
+    """写入测试数据"""
+    with app.app_context():
+        for i in range(count):
+            db.session.add(Wheelchair(
+                name=f'电动轮椅{i}',
+                price=100.0 + i,
+                description=f'测试轮椅描述{i}',
+                stock=5,
+                manufacturer='基准测试厂商'
+            ))
+        db.session.commit()
+
+def mapper_count():
+    """当前已注册的映射类数量"""
+    return len(list(db.Model.registry.mappers))
+
+def main():
+    parser = argparse.ArgumentParser(description='轮椅搜索基准测试')
+    parser.add_argument('--iterations', type=int, default=100000)
+    parser.add_argument('--window', type=int, default=10000)
+    parser.add_argument('--rows', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    seed(app, args.rows)
+    client = app.test_client()
+    keywords = ['', '电动', '轮椅1', '厂商']
+
+    tracemalloc.start()
+    samples = []
+    print(f"{'请求数':>8} {'平均(ms)':>10} {'p99(ms)':>10} {'内存(KB)':>10} {'映射类':>6}")
+
+    for i in range(1, args.iterations + 1):
+        keyword = keywords[i % len(keywords)]
+        start = time.perf_counter()
+        response = client.get(f'/api/wheelchair/search?keyword={keyword}&page=1&limit=10')
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200
+
+        if i % args.window == 0:
+            gc.collect()
+            current, _ = tracemalloc.get_traced_memory()
+            avg = sum(samples) / len(samples) * 1000
+            print(f'{i:>8} {avg:>10.3f} {percentile(samples, 99):>10.3f} {current // 1024:>10} {mapper_count():>6}')
+            samples = []
+
+    tracemalloc.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试公共工具
+构建独立的测试应用和数据库，避免污染开发数据库
+"""
+
+import os
+import sys
+import time
+
+# 添加backend目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from models import db
+from models.wheelchair import init_db, init_search_index
+from routes import client_bp, admin_bp
+from utils.engine import init_engine
+
+def create_bench_app(database_uri='sqlite://', **config):
+    """创建基准测试用的Flask应用
+
+    Args:
+        database_uri: 数据库连接地址，默认使用内存数据库
+        **config: 额外的应用配置（DB_ENGINE_PROFILE 默认 default，即驱动默认设置）
+
+    Returns:
+        Flask: 已建表并注册蓝图的应用实例
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JWT_SECRET_KEY'] = 'bench-jwt-secret-key-for-wheelchair-rental'
+    app.config['DB_ENGINE_PROFILE'] = 'default'
+    app.config.update(config)
+
+    init_engine(app, db)
+    JWTManager(app)
+    app.register_blueprint(client_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+
+    with app.app_context():
+        init_db(db)
+        db.create_all()
+        init_search_index(db)
+
+    return app
+
+def percentile(samples, pct):
+    """计算百分位数（毫秒）"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index] * 1000
+
+class Timer:
+    """简单计时上下文"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pytest 公共夹具
+每个测试使用独立的临时SQLite数据库文件，避免污染开发数据库
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from models import db, AdminUser
+from models.wheelchair import init_db, init_search_index
+from routes import client_bp, admin_bp
+
+# app.py、app_simple.py 在导入时读取 DATABASE_URL（test_db.py、test_jwt.py 等直接导入）：
+# 指向开发数据库的临时副本，WAL等连接设置不会改写仓库中的 wheelchair_rental.db
+_dev_db_dir = tempfile.mkdtemp(prefix='wheelrent-test-')
+atexit.register(shutil.rmtree, _dev_db_dir, True)
+_dev_db = os.path.join(_dev_db_dir, 'wheelchair_rental.db')
+shutil.copy(os.path.join(os.path.dirname(__file__), 'wheelchair_rental.db'), _dev_db)
+os.environ['DATABASE_URL'] = f'sqlite:///{_dev_db}'
+
+@pytest.fixture
+def app(tmp_path):
+    """测试用Flask应用"""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "test.db"}'
+    test_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    test_app.config['JWT_SECRET_KEY'] = 'test-jwt-secret-key-for-wheelchair-rental'
+    test_app.config['TESTING'] = True
+    test_app.config['BCRYPT_ROUNDS'] = 4
+
+    db.init_app(test_app)
+    JWTManager(test_app)
+    test_app.register_blueprint(client_bp, url_prefix='/api')
+    test_app.register_blueprint(admin_bp, url_prefix='/api/admin')
+
+    with test_app.app_context():
+        init_db(db)
+        db.create_all()
+        init_search_index(db)
+
+    yield test_app
+
+    with test_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    """测试客户端"""
+    return app.test_client()
+
+@pytest.fixture
+def admin_headers(app):
+    """管理员认证请求头"""
+    with app.app_context():
+        user = AdminUser(username='admin', password='123456', role=AdminUser.ROLE_ADMIN)
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+    return {'Authorization': f'Bearer {token}'}
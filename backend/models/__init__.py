@@ -4,16 +4,29 @@
 数据模型包初始化文件
 """
 
+from flask_sqlalchemy import SQLAlchemy
+from utils.replica import RoutingSession
+
+# 共享数据库实例，需在导入各模型模块之前创建（会话可把只读接口的查询路由到副本）
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
 # 导入所有模型类，方便其他模块使用
 from .wheelchair import Wheelchair
-from .order import FormalOrder, TempOrder
+from .order import FormalOrder, TempOrder, StockHold
 from .user import AdminUser
-from .log import OperationLog
+from .log import OperationLog, OperationLogDaily, StatsWatermark
+from .stats import DailyOrderStat, DailyWheelchairStat
 
 __all__ = [
+    'db',
     'Wheelchair',
     'FormalOrder', 
     'TempOrder',
+    'StockHold',
     'AdminUser',
-    'OperationLog'
+    'OperationLog',
+    'OperationLogDaily',
+    'StatsWatermark',
+    'DailyOrderStat',
+    'DailyWheelchairStat'
 ]
\ No newline at end of file
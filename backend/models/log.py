@@ -5,11 +5,17 @@
 定义操作日志的数据结构和相关操作方法
 """
 
-from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
+import json
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, func, insert, literal, or_, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from utils.pagination import paginate_query, keyset_paginate
+from utils.stats import BUCKET_HOUR, bucket_expression, date_expression, full_day_range, parse_date
+from utils.log_writer import get_operation_log_writer
 
-# 全局db变量，将在app.py中初始化
-db = None
+# 共享db实例，在app.py中通过init_app绑定到应用
+from . import db
 
 class OperationLog(db.Model):
     """操作日志模型类"""
@@ -22,6 +28,13 @@ class OperationLog(db.Model):
     operate_type = db.Column(db.String(50), nullable=False, comment='操作类型')
     target_id = db.Column(db.Integer, comment='操作对象ID')
     operate_time = db.Column(db.DateTime, default=datetime.utcnow, comment='操作时间')
+    detail = db.Column(db.String(255), comment='操作详情（如批量操作的动作和数量）')
+    
+    __table_args__ = (
+        db.Index('idx_operation_log_operator', 'operator_id'),
+        db.Index('idx_operation_log_time', 'operate_time'),
+        db.Index('idx_operation_log_type', 'operate_type'),
+    )
     
     # 操作类型常量
     TYPE_ADD_WHEELCHAIR = '新增轮椅'
@@ -30,6 +43,8 @@ class OperationLog(db.Model):
     TYPE_OFFLINE_WHEELCHAIR = '下架轮椅'
     TYPE_ONLINE_WHEELCHAIR = '上架轮椅'
     TYPE_UPDATE_STOCK = '更新库存'
+    TYPE_IMPORT_WHEELCHAIR = '批量导入轮椅'
+    TYPE_BATCH_OPERATE_WHEELCHAIR = '批量操作轮椅'
     
     TYPE_UPDATE_ORDER_STATUS = '修改订单状态'
     TYPE_CANCEL_ORDER = '取消订单'
@@ -46,23 +61,32 @@ class OperationLog(db.Model):
     VALID_TYPES = [
         TYPE_ADD_WHEELCHAIR, TYPE_UPDATE_WHEELCHAIR, TYPE_DELETE_WHEELCHAIR,
         TYPE_OFFLINE_WHEELCHAIR, TYPE_ONLINE_WHEELCHAIR, TYPE_UPDATE_STOCK,
+        TYPE_IMPORT_WHEELCHAIR, TYPE_BATCH_OPERATE_WHEELCHAIR,
         TYPE_UPDATE_ORDER_STATUS, TYPE_CANCEL_ORDER,
         TYPE_ADD_USER, TYPE_UPDATE_USER, TYPE_DELETE_USER, TYPE_UPDATE_USER_ROLE,
         TYPE_LOGIN, TYPE_LOGOUT
     ]
     
-    def __init__(self, operator_id, operate_type, target_id=None):
+    def __init__(self, operator_id, operate_type, target_id=None, detail=None):
         """初始化操作日志对象"""
         self.operator_id = operator_id
         self.operate_type = operate_type
         self.target_id = target_id
+        self.detail = detail
         self.operate_time = datetime.utcnow()
     
+    @classmethod
+    def batch_summary(cls, operator_id, action, result):
+        """整批操作的汇总日志：一行记录动作、请求数和实际生效数"""
+        return cls(operator_id, cls.TYPE_BATCH_OPERATE_WHEELCHAIR, detail=json.dumps({
+            'action': action,
+            'requested': result['requested'],
+            'affected': result['affected']
+        }))
+    
     def to_dict(self):
-        """转换为字典格式"""
-        # 延迟导入避免循环依赖
-        from .user import AdminUser
-        operator = AdminUser.query.get(self.operator_id)
+        """转换为字典格式（列表查询已关联加载操作员，不再逐行查询）"""
+        operator = self.operator
         
         return {
             'id': self.id,
@@ -71,6 +95,7 @@ class OperationLog(db.Model):
             'operator_role': operator.role if operator else None,
             'operate_type': self.operate_type,
             'target_id': self.target_id,
+            'detail': self.detail,
             'operate_time': self.operate_time.strftime('%Y-%m-%d %H:%M:%S') if self.operate_time else None
         }
     
@@ -83,14 +108,20 @@ class OperationLog(db.Model):
             operate_type: 操作类型
             target_id: 操作对象ID（可选）
         
+        开启 OPERATION_LOG_ASYNC 时日志交给后台写入器批量写入，不单独提交事务
+        
         Returns:
-            bool: 是否记录成功
+            bool: 是否记录成功（异步写入时为是否已入队）
         """
         try:
             if operate_type not in cls.VALID_TYPES:
                 print(f"警告: 无效的操作类型 {operate_type}")
                 return False
             
+            writer = get_operation_log_writer()
+            if writer is not None:
+                return writer.submit(operator_id, operate_type, target_id)
+            
             log = cls(
                 operator_id=operator_id,
                 operate_type=operate_type,
@@ -106,7 +137,7 @@ class OperationLog(db.Model):
             return False
     
     @classmethod
-    def get_logs(cls, page=1, limit=20, operator_id=None, operate_type=None, start_date=None, end_date=None):
+    def get_logs(cls, page=1, limit=20, operator_id=None, operate_type=None, start_date=None, end_date=None, count_mode='exact'):
         """获取操作日志列表
         
         Args:
@@ -116,11 +147,38 @@ class OperationLog(db.Model):
             operate_type: 操作类型过滤
             start_date: 开始日期
             end_date: 结束日期
+            count_mode: 总数统计方式 (exact, none, estimate)
         
         Returns:
             tuple: (日志列表, 总数量)
         """
-        query = cls.query
+        query = cls._filtered_query(operator_id, operate_type, start_date, end_date)
+        
+        # 按时间倒序排列
+        query = query.order_by(cls.operate_time.desc())
+        
+        # 分页（数据和总数一次查询返回）
+        return paginate_query(query, page, limit, count_mode)
+    
+    @classmethod
+    def get_logs_by_cursor(cls, cursor=None, limit=20, operator_id=None, operate_type=None, start_date=None, end_date=None):
+        """按游标获取操作日志列表（按操作时间倒序）
+        
+        Args:
+            cursor: 上一页返回的游标，为空时返回第一页
+            limit: 每页数量
+            其余参数同 get_logs
+        
+        Returns:
+            tuple: (日志列表, 下一页游标)
+        """
+        query = cls._filtered_query(operator_id, operate_type, start_date, end_date)
+        return keyset_paginate(query, cls.operate_time, cls.id, cursor, limit)
+    
+    @classmethod
+    def _filtered_query(cls, operator_id=None, operate_type=None, start_date=None, end_date=None):
+        """构建带过滤条件的日志查询（关联加载操作员）"""
+        query = cls.query.options(joinedload(cls.operator))
         
         # 操作员过滤
         if operator_id:
@@ -136,14 +194,14 @@ class OperationLog(db.Model):
         if end_date:
             query = query.filter(cls.operate_time <= end_date)
         
-        # 按时间倒序排列
-        query = query.order_by(cls.operate_time.desc())
-        
-        # 分页
-        total = query.count()
-        logs = query.offset((page - 1) * limit).limit(limit).all()
-        
-        return logs, total
+        return query
+    
+    @classmethod
+    def export_query(cls, operator_id=None, operate_type=None, start_date=None, end_date=None):
+        """导出查询（过滤条件与 get_logs 相同，按操作时间倒序）"""
+        return cls._filtered_query(operator_id, operate_type, start_date, end_date).order_by(
+            cls.operate_time.desc(), cls.id.desc()
+        )
     
     @classmethod
     def get_operator_logs(cls, operator_id, page=1, limit=20):
@@ -158,48 +216,192 @@ class OperationLog(db.Model):
     @classmethod
     def get_recent_logs(cls, limit=10):
         """获取最近的操作日志"""
-        logs = cls.query.order_by(cls.operate_time.desc()).limit(limit).all()
+        logs = cls.query.options(joinedload(cls.operator)).order_by(cls.operate_time.desc()).limit(limit).all()
         return logs
     
     @classmethod
-    def get_statistics(cls, start_date=None, end_date=None):
+    def get_statistics(cls, start_date=None, end_date=None, bucket=None):
         """获取操作统计信息
         
+        按操作类型、操作员（以及可选的时间分桶）分组计数，一条SQL返回全部结果：
+        已汇总的完整历史日期读取每日汇总表，其余时间段分组扫描日志表，两部分以
+        UNION ALL 合并后在内存中累加出各维度统计。只读查询，不刷新汇总表
+        （由后台维护任务 OrderPartitionMaintainer 或 sweep-temp-orders 命令刷新）。
+        
         Args:
-            start_date: 开始日期
-            end_date: 结束日期
+            start_date: 开始时间（含），datetime/date/'YYYY-MM-DD'
+            end_date: 结束时间（含），datetime/date/'YYYY-MM-DD'
+            bucket: 时间分桶粒度，hour 或 day，为空时不分桶
         
         Returns:
             dict: 统计信息
         """
-        query = cls.query
+        start_date = parse_date(start_date)
+        end_date = parse_date(end_date)
+        dialect_name = db.engine.dialect.name
         
+        # 按小时分桶无法使用每日汇总；水位之后尚未汇总的日期直接统计日志表
+        through = OperationLogDaily.through_date() if bucket != BUCKET_HOUR else None
+        rollup_days = full_day_range(start_date, end_date, through)
+        
+        bucket_column = (
+            bucket_expression(cls.operate_time, bucket, dialect_name) if bucket else literal(None)
+        ).label('bucket')
+        raw = select(
+            cls.operate_type, cls.operator_id, bucket_column, func.count(cls.id).label('total')
+        )
         if start_date:
-            query = query.filter(cls.operate_time >= start_date)
+            raw = raw.where(cls.operate_time >= start_date)
         if end_date:
-            query = query.filter(cls.operate_time <= end_date)
+            raw = raw.where(cls.operate_time <= end_date)
         
-        # 总操作数
-        total_operations = query.count()
+        statement = raw
+        if rollup_days:
+            first_day, last_day = rollup_days
+            day_after = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+            if first_day == date.min:
+                raw = raw.where(cls.operate_time >= day_after)
+            else:
+                raw = raw.where(or_(
+                    cls.operate_time < datetime.combine(first_day, datetime.min.time()),
+                    cls.operate_time >= day_after
+                ))
+            
+            daily = OperationLogDaily
+            rollup_bucket = (
+                bucket_expression(daily.stat_date, bucket, dialect_name) if bucket else literal(None)
+            ).label('bucket')
+            rollup = select(
+                daily.operate_type, daily.operator_id, rollup_bucket, func.sum(daily.count).label('total')
+            ).where(daily.stat_date <= last_day)
+            if first_day != date.min:
+                rollup = rollup.where(daily.stat_date >= first_day)
+            rollup = rollup.group_by(daily.operate_type, daily.operator_id, rollup_bucket)
+            statement = union_all(
+                raw.group_by(cls.operate_type, cls.operator_id, bucket_column), rollup
+            )
+        else:
+            statement = raw.group_by(cls.operate_type, cls.operator_id, bucket_column)
         
-        # 按操作类型统计
+        total_operations = 0
         type_stats = {}
-        for operate_type in cls.VALID_TYPES:
-            count = query.filter(cls.operate_type == operate_type).count()
-            if count > 0:
-                type_stats[operate_type] = count
-        
-        # 按操作员统计
         operator_stats = {}
-        operators = db.session.query(cls.operator_id, db.func.count(cls.id)).group_by(cls.operator_id).all()
-        for operator_id, count in operators:
-            operator_stats[operator_id] = count
+        bucket_stats = {}
+        for operate_type, operator_id, bucket_key, count in db.session.execute(statement):
+            count = int(count)
+            total_operations += count
+            type_stats[operate_type] = type_stats.get(operate_type, 0) + count
+            operator_stats[operator_id] = operator_stats.get(operator_id, 0) + count
+            if bucket:
+                entry = bucket_stats.setdefault(bucket_key, {'total': 0, 'types': {}})
+                entry['total'] += count
+                entry['types'][operate_type] = entry['types'].get(operate_type, 0) + count
         
-        return {
+        result = {
             'total_operations': total_operations,
             'type_statistics': type_stats,
             'operator_statistics': operator_stats
         }
+        if bucket:
+            result['bucket'] = bucket
+            result['bucket_statistics'] = [
+                dict(bucket_stats[key], time=key) for key in sorted(bucket_stats)
+            ]
+        return result
     
     def __repr__(self):
-        return f'<OperationLog {self.id}: {self.operate_type} by {self.operator_id}>'
\ No newline at end of file
+        return f'<OperationLog {self.id}: {self.operate_type} by {self.operator_id}>'
+
+class OperationLogDaily(db.Model):
+    """操作日志每日汇总表
+    
+    按 (日期, 操作类型, 操作员) 保存当天的操作次数，只汇总已经结束且不再有
+    迟到日志写入的日期（异步日志写入器可能在零点后才写入前一天的日志），
+    汇总进度记录在 StatsWatermark 中。
+    """
+    
+    __tablename__ = 'operation_log_daily'
+    
+    stat_date = db.Column(db.Date, primary_key=True, comment='统计日期')
+    operate_type = db.Column(db.String(50), primary_key=True, comment='操作类型')
+    operator_id = db.Column(db.Integer, primary_key=True, comment='操作员ID')
+    count = db.Column(db.Integer, nullable=False, default=0, comment='操作次数')
+    
+    WATERMARK_NAME = 'operation_log_daily'
+    
+    # 只汇总早于昨天的日期，给迟到的日志留出一天时间
+    SETTLE_DAYS = 1
+    
+    @classmethod
+    def through_date(cls):
+        """汇总表已覆盖到的最后一天，尚未汇总过时返回None"""
+        watermark = db.session.get(StatsWatermark, cls.WATERMARK_NAME)
+        return watermark.through_date if watermark else None
+    
+    @classmethod
+    def refresh(cls, today=None):
+        """把尚未汇总的已结束日期写入汇总表
+        
+        Args:
+            today: 当前日期（UTC），默认取当前时间
+        
+        Returns:
+            date: 汇总表已覆盖到的最后一天，没有可汇总的日期时返回None
+        """
+        today = today or datetime.utcnow().date()
+        target = today - timedelta(days=1 + cls.SETTLE_DAYS)
+        watermark = db.session.get(StatsWatermark, cls.WATERMARK_NAME)
+        through = watermark.through_date if watermark else None
+        if through is not None and through >= target:
+            return through
+        
+        if through is None:
+            # 首次汇总从最早的日志开始
+            earliest = db.session.query(func.min(OperationLog.operate_time)).scalar()
+            if earliest is None or earliest.date() > target:
+                return None
+            start = earliest.date()
+        else:
+            start = through + timedelta(days=1)
+        
+        log = OperationLog
+        day = date_expression(log.operate_time, db.engine.dialect.name)
+        rows = select(day, log.operate_type, log.operator_id, func.count(log.id)).where(
+            and_(
+                log.operate_time >= datetime.combine(start, datetime.min.time()),
+                log.operate_time < datetime.combine(target + timedelta(days=1), datetime.min.time())
+            )
+        ).group_by(day, log.operate_type, log.operator_id)
+        
+        try:
+            db.session.execute(
+                insert(cls).from_select(['stat_date', 'operate_type', 'operator_id', 'count'], rows)
+            )
+            if watermark:
+                watermark.through_date = target
+            else:
+                db.session.add(StatsWatermark(name=cls.WATERMARK_NAME, through_date=target))
+            db.session.commit()
+        except IntegrityError:
+            # 其他进程已完成同一段汇总
+            db.session.rollback()
+            watermark = db.session.get(StatsWatermark, cls.WATERMARK_NAME)
+            return watermark.through_date if watermark else None
+        
+        return target
+    
+    @classmethod
+    def rebuild(cls):
+        """清空并重新生成汇总表（迟到日志超过 SETTLE_DAYS 时使用）"""
+        db.session.query(cls).delete()
+        db.session.query(StatsWatermark).filter(StatsWatermark.name == cls.WATERMARK_NAME).delete()
+        db.session.commit()
+        return cls.refresh()
+
+class StatsWatermark(db.Model):
+    """统计汇总进度表，记录各汇总表已覆盖到的日期"""
+    
+    __tablename__ = 'stats_watermark'
+    
+    name = db.Column(db.String(50), primary_key=True, comment='汇总名称')
+    through_date = db.Column(db.Date, nullable=False, comment='已汇总到的日期（含）')
@@ -7,10 +7,14 @@
 
 import uuid
 from datetime import datetime, timedelta
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import joinedload
+from utils.order_no import next_order_no
+from utils.pagination import paginate_query, keyset_paginate, decode_cursor, encode_cursor
 
-# 全局db变量，将在app.py中初始化
-db = None
+# 共享db实例，在app.py中通过init_app绑定到应用
+from . import db
+from .partition import add_months, archived_statuses, get_order_archive, order_no_time_range
 
 class FormalOrder(db.Model):
     """正式订单模型类"""
@@ -28,6 +32,11 @@ class FormalOrder(db.Model):
     status = db.Column(db.String(20), nullable=False, default='待配送', comment='订单状态')
     create_time = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
     
+    __table_args__ = (
+        db.Index('idx_formal_order_status', 'status', 'create_time'),
+        db.Index('idx_formal_order_create_time', 'create_time'),
+    )
+    
     # 订单状态常量
     STATUS_PENDING = '待配送'
     STATUS_DELIVERING = '配送中'
@@ -36,16 +45,30 @@ class FormalOrder(db.Model):
     
     VALID_STATUSES = [STATUS_PENDING, STATUS_DELIVERING, STATUS_COMPLETED, STATUS_CANCELLED]
     
+    # 状态机：每个状态允许转换到的状态，已完成和已取消为终态
+    TRANSITIONS = {
+        STATUS_PENDING: [STATUS_DELIVERING, STATUS_CANCELLED],
+        STATUS_DELIVERING: [STATUS_COMPLETED, STATUS_CANCELLED],
+        STATUS_COMPLETED: [],
+        STATUS_CANCELLED: []
+    }
+    
+    # 批量状态转换每条语句包含的订单数
+    BULK_CHUNK_SIZE = 500
+    
+    # 单次批量状态转换允许的最大订单数
+    BULK_MAX_ORDERS = 5000
+    
     def __init__(self, user_name, user_phone, user_address, wheelchair_id, deposit):
         """初始化正式订单对象"""
-        self.order_no = self.generate_order_no()
+        self.create_time = datetime.utcnow()
+        self.order_no = self.generate_order_no(self.create_time)
         self.user_name = user_name
         self.user_phone = user_phone
         self.user_address = user_address
         self.wheelchair_id = wheelchair_id
         self.deposit = deposit
         self.status = self.STATUS_PENDING
-        self.create_time = datetime.utcnow()
     
     def to_dict(self):
         """转换为字典格式"""
@@ -63,20 +86,24 @@ class FormalOrder(db.Model):
         }
     
     @staticmethod
-    def generate_order_no():
-        """生成订单号"""
-        now = datetime.now()
-        timestamp = now.strftime('%Y%m%d%H%M%S')
-        random_suffix = str(uuid.uuid4())[:6].upper()
-        return f'WR{timestamp}{random_suffix}'
+    def generate_order_no(now=None):
+        """生成订单号（嵌入的时间为UTC创建时间，用于定位订单所在分区；格式见 utils/order_no.py）"""
+        return next_order_no(now)
+    
+    @classmethod
+    def can_transition(cls, old_status, new_status):
+        """检查状态转换是否符合状态机"""
+        return new_status in cls.TRANSITIONS.get(old_status, [])
     
     def update_status(self, new_status):
-        """更新订单状态"""
-        if new_status in self.VALID_STATUSES:
-            old_status = self.status
-            self.status = new_status
-            return True, f'订单状态从 {old_status} 更新为 {new_status}'
-        return False, f'无效的订单状态: {new_status}'
+        """更新订单状态（按 TRANSITIONS 校验，终态订单不能再变更）"""
+        if new_status not in self.VALID_STATUSES:
+            return False, f'无效的订单状态: {new_status}'
+        if not self.can_transition(self.status, new_status):
+            return False, f'订单状态不能从 {self.status} 变更为 {new_status}'
+        old_status = self.status
+        self.status = new_status
+        return True, f'订单状态从 {old_status} 更新为 {new_status}'
     
     def can_cancel(self):
         """检查订单是否可以取消"""
@@ -90,23 +117,284 @@ class FormalOrder(db.Model):
         return False
     
     @classmethod
-    def get_by_status(cls, status, page=1, limit=10):
+    def bulk_transition(cls, order_ids, new_status, operator_id=None, skip_invalid=False):
+        """批量转换订单状态（不提交事务，由调用方统一提交或回滚）
+        
+        每块订单先加锁读取当前状态并按状态机校验，再执行一条
+        UPDATE ... WHERE id IN (...)；取消的订单按轮椅汇总后，每个轮椅执行一条
+        UPDATE wheelchair SET stock = stock + n。每日汇总按 (日期, 状态) 聚合后累加。
+        
+        Args:
+            order_ids: 订单ID列表（重复ID只计一次）
+            new_status: 目标状态
+            operator_id: 操作员ID，不为空时在同一事务中为每个订单写入一条状态变更日志
+                （开启异步日志写入时由调用方在提交后交给写入器，此处传None）
+            skip_invalid: 为False时存在不存在或不可转换的订单则不做任何修改
+        
+        Returns:
+            dict: updated（转换的订单数）、updated_ids（转换的订单ID）、
+                restored_stock（按轮椅ID汇总的恢复库存）、errors（不存在或不可转换的订单）
+        """
+        from sqlalchemy import update
+        from .log import OperationLog
+        from .stats import record_order_stat, record_wheelchair_stat
+        from .wheelchair import Wheelchair
+        
+        if new_status not in cls.VALID_STATUSES:
+            raise ValueError(f'无效的订单状态: {new_status}')
+        
+        ids = list(dict.fromkeys(order_ids))
+        rows = []
+        errors = []
+        for start in range(0, len(ids), cls.BULK_CHUNK_SIZE):
+            chunk = ids[start:start + cls.BULK_CHUNK_SIZE]
+            found = {row.id: row for row in db.session.execute(
+                select(cls.id, cls.wheelchair_id, cls.status, cls.deposit, cls.create_time)
+                .where(cls.id.in_(chunk))
+                .with_for_update()
+            )}
+            for order_id in chunk:
+                row = found.get(order_id)
+                if row is None:
+                    errors.append({'order_id': order_id, 'error': '订单不存在'})
+                elif not cls.can_transition(row.status, new_status):
+                    errors.append({'order_id': order_id, 'error': f'订单状态不能从 {row.status} 变更为 {new_status}'})
+                else:
+                    rows.append(row)
+        
+        result = {'updated': 0, 'updated_ids': [], 'restored_stock': {}, 'errors': errors}
+        if (errors and not skip_invalid) or not rows:
+            return result
+        
+        from_statuses = [status for status, targets in cls.TRANSITIONS.items() if new_status in targets]
+        for start in range(0, len(rows), cls.BULK_CHUNK_SIZE):
+            chunk = [row.id for row in rows[start:start + cls.BULK_CHUNK_SIZE]]
+            updated = db.session.execute(
+                update(cls)
+                .where(cls.id.in_(chunk), cls.status.in_(from_statuses))
+                .values(status=new_status)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if updated != len(chunk):
+                # 读取后状态被并发修改（不支持行锁的数据库），整批回滚
+                raise RuntimeError('订单状态已被其他操作修改，请重试')
+        
+        # 每日汇总：按 (创建日期, 原状态) 聚合
+        moved = {}
+        cancels = {}
+        for row in rows:
+            create_date = row.create_time.date()
+            count, deposit = moved.get((create_date, row.status), (0, 0))
+            moved[(create_date, row.status)] = (count + 1, deposit + (row.deposit or 0))
+            if new_status == cls.STATUS_CANCELLED:
+                key = (row.wheelchair_id, create_date)
+                cancels[key] = cancels.get(key, 0) + 1
+        for (create_date, old_status), (count, deposit) in moved.items():
+            record_order_stat(create_date, old_status, -count, -deposit)
+            record_order_stat(create_date, new_status, count, deposit)
+        for (wheelchair_id, create_date), count in cancels.items():
+            record_wheelchair_stat(wheelchair_id, create_date, cancels=count)
+        
+        # 取消的订单按轮椅汇总恢复库存
+        restored = {}
+        for (wheelchair_id, _), count in cancels.items():
+            restored[wheelchair_id] = restored.get(wheelchair_id, 0) + count
+        for wheelchair_id, quantity in restored.items():
+            Wheelchair.restore_stock(wheelchair_id, quantity)
+        
+        if operator_id is not None:
+            now = datetime.utcnow()
+            db.session.execute(insert(OperationLog), [
+                {
+                    'operator_id': operator_id,
+                    'operate_type': OperationLog.TYPE_UPDATE_ORDER_STATUS,
+                    'target_id': row.id,
+                    'operate_time': now
+                }
+                for row in rows
+            ])
+        
+        # 会话中已加载的订单未同步，使其在下次访问时重新读取
+        db.session.expire_all()
+        result['updated'] = len(rows)
+        result['updated_ids'] = [row.id for row in rows]
+        result['restored_stock'] = restored
+        return result
+    
+    @classmethod
+    def list_query(cls):
+        """订单列表查询（同一条SQL关联加载轮椅，避免 to_dict 逐行查询轮椅名称）"""
+        return cls.query.options(joinedload(cls.wheelchair))
+    
+    @classmethod
+    def get_by_status(cls, status, page=1, limit=10, count_mode='exact'):
         """根据状态获取订单列表"""
-        query = cls.query.filter(cls.status == status)
-        total = query.count()
-        orders = query.order_by(cls.create_time.desc()).offset((page - 1) * limit).limit(limit).all()
-        return orders, total
+        return cls.get_all(page, limit, status_filter=status, count_mode=count_mode)
+    
+    @classmethod
+    def get_all(cls, page=1, limit=10, status_filter=None, count_mode='exact'):
+        """获取所有订单（配置了历史分区时合并各分区的结果）"""
+        query = cls.list_query()
+        if status_filter:
+            query = query.filter(cls.status == status_filter)
+        
+        query = query.order_by(cls.create_time.desc(), cls.id.desc())
+        archive, months = cls._archive_months(status_filter)
+        if not months:
+            return paginate_query(query, page, limit, count_mode)
+        
+        # 每个分区最多需要前 page * limit 行，归并后取当前页
+        need = page * limit
+        items, total = paginate_query(query, 1, need, count_mode)
+        merged = cls._merge_archived(items, archive, months, need, status_filter=status_filter)
+        total += sum(archive.count(month, status_filter) for month in months)
+        return merged[(page - 1) * limit:need], total
+    
+    @classmethod
+    def get_by_order_no(cls, order_no):
+        """按订单号查询（按订单号中的时间限定创建时间范围，PostgreSQL 只扫描对应的分区）"""
+        order = cls.order_no_query(order_no).first()
+        if order is not None:
+            return order
+        return cls.get_archived_by_order_no(order_no)
+    
+    @classmethod
+    def order_no_query(cls, order_no):
+        """按订单号查询主表的查询对象"""
+        query = cls.list_query().filter(cls.order_no == order_no)
+        time_range = order_no_time_range(order_no)
+        if time_range:
+            query = query.filter(cls.create_time >= time_range[0], cls.create_time < time_range[1])
+        return query
+    
+    @classmethod
+    def get_archived_by_order_no(cls, order_no):
+        """在历史分区中按订单号查询，订单号不含时间或未配置历史分区时返回None"""
+        archive = get_order_archive()
+        row = archive.find(order_no) if archive else None
+        return cls._from_archived_rows([row])[0] if row is not None else None
+    
+    @classmethod
+    def _archive_months(cls, status_filter=None):
+        """需要合并的历史分区月份（历史分区只保存终态订单）"""
+        archive = get_order_archive()
+        if archive is None or (status_filter and status_filter not in archived_statuses()):
+            return archive, []
+        return archive, archive.months()
+    
+    @classmethod
+    def _merge_archived(cls, items, archive, months, need, **filters):
+        """把主表结果与各历史分区的结果按 (创建时间, ID) 倒序归并，返回前 need 条
+        
+        分区按月份倒序读取，已有 need 条都比某个月份更新时，更早的分区不再读取。
+        迁移过程中同一订单可能同时出现在主表和历史分区，按订单号去重（SQLite 的订单ID
+        没有 AUTOINCREMENT，迁出后可能被新订单复用，不能用来去重）。
+        """
+        def sort_key(order):
+            return order.create_time, order.id
+        
+        merged = list(items)
+        seen = {order.order_no for order in merged}
+        for month in months:
+            if len(merged) >= need and merged[need - 1].create_time >= add_months(month, 1):
+                break
+            rows = [row for row in archive.fetch(month, limit=need, **filters) if row.order_no not in seen]
+            merged = sorted(merged + rows, key=sort_key, reverse=True)[:need]
+        
+        archived = [order for order in merged if not isinstance(order, cls)]
+        converted = iter(cls._from_archived_rows(archived))
+        return [order if isinstance(order, cls) else next(converted) for order in merged]
+    
+    @classmethod
+    def _from_archived_rows(cls, rows):
+        """把历史分区的行转换为订单对象（不加入会话，一次查询取回轮椅）"""
+        from sqlalchemy.orm.attributes import set_committed_value
+        from .wheelchair import get_wheelchair_model
+        
+        WheelchairModel = get_wheelchair_model()
+        wheelchair_ids = {row.wheelchair_id for row in rows}
+        wheelchairs = {
+            wheelchair.id: wheelchair
+            for wheelchair in WheelchairModel.query.filter(WheelchairModel.id.in_(wheelchair_ids))
+        } if wheelchair_ids else {}
+        
+        orders = []
+        for row in rows:
+            order = cls._sa_class_manager.new_instance()
+            for key, value in row._mapping.items():
+                set_committed_value(order, key, value)
+            set_committed_value(order, 'wheelchair', wheelchairs.get(row.wheelchair_id))
+            orders.append(order)
+        return orders
+    
+    @classmethod
+    def export_query(cls, status_filter=None, start_date=None, end_date=None):
+        """导出查询（按创建时间倒序，关联加载轮椅）
+        
+        Args:
+            status_filter: 订单状态过滤
+            start_date: 创建时间下限（含）
+            end_date: 创建时间上限（不含）
+        """
+        query = cls.list_query()
+        if status_filter:
+            query = query.filter(cls.status == status_filter)
+        if start_date:
+            query = query.filter(cls.create_time >= start_date)
+        if end_date:
+            query = query.filter(cls.create_time < end_date)
+        return query.order_by(cls.create_time.desc(), cls.id.desc())
+    
+    @classmethod
+    def iter_export(cls, status_filter=None, start_date=None, end_date=None):
+        """导出的订单迭代器（主表流式读取，历史分区按月读取后归并）"""
+        import heapq
+        from utils.export import stream_query
+        
+        rows = stream_query(cls.export_query(status_filter, start_date, end_date))
+        archive, months = cls._archive_months(status_filter)
+        if start_date:
+            months = [month for month in months if add_months(month, 1) > start_date]
+        if end_date:
+            months = [month for month in months if month < end_date]
+        if not months:
+            return rows
+        
+        def archived_orders():
+            # 各分区月份不重叠，按月份倒序依次读取即为整体倒序
+            for month in months:
+                yield from cls._from_archived_rows(archive.fetch(
+                    month, status_filter=status_filter, start_date=start_date, end_date=end_date
+                ))
+        
+        return heapq.merge(rows, archived_orders(), key=lambda order: (order.create_time, order.id), reverse=True)
     
     @classmethod
-    def get_all(cls, page=1, limit=10, status_filter=None):
-        """获取所有订单"""
-        query = cls.query
+    def get_by_cursor(cls, cursor=None, limit=10, status_filter=None):
+        """按游标获取订单列表（按创建时间倒序）
+        
+        Args:
+            cursor: 上一页返回的游标，为空时返回第一页
+            limit: 每页数量
+            status_filter: 订单状态过滤
+        
+        Returns:
+            tuple: (订单列表, 下一页游标)
+        """
+        query = cls.list_query()
         if status_filter:
             query = query.filter(cls.status == status_filter)
+        archive, months = cls._archive_months(status_filter)
+        if not months:
+            return keyset_paginate(query, cls.create_time, cls.id, cursor, limit)
         
-        total = query.count()
-        orders = query.order_by(cls.create_time.desc()).offset((page - 1) * limit).limit(limit).all()
-        return orders, total
+        # 各分区多取一条用于判断是否还有下一页
+        items, _ = keyset_paginate(query, cls.create_time, cls.id, cursor, limit + 1)
+        before = decode_cursor(cursor) if cursor else None
+        merged = cls._merge_archived(items, archive, months, limit + 1, status_filter=status_filter, before=before)
+        items = merged[:limit]
+        next_cursor = encode_cursor(items[-1].create_time, items[-1].id) if len(merged) > limit else None
+        return items, next_cursor
     
     def __repr__(self):
         return f'<FormalOrder {self.order_no}: {self.user_name}>'
@@ -125,9 +413,17 @@ class TempOrder(db.Model):
     wheelchair_id = db.Column(db.Integer, comment='轮椅ID')
     create_time = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
     
+    __table_args__ = (
+        db.Index('idx_temp_order_create_time', 'create_time'),
+        db.Index('idx_temp_order_wheelchair', 'wheelchair_id'),
+    )
+    
     # 预订单过期时间（分钟）
     EXPIRE_MINUTES = 30
     
+    # 过期清理每批删除的最大行数
+    SWEEP_BATCH_SIZE = 500
+    
     def __init__(self, user_name, user_phone, user_address, wheelchair_id):
         """初始化临时预订单对象"""
         self.id = str(uuid.uuid4())
@@ -173,16 +469,54 @@ class TempOrder(db.Model):
         return formal_order, '转换成功'
     
     @classmethod
-    def cleanup_expired(cls):
-        """清理过期的临时订单"""
-        expire_time = datetime.utcnow() - timedelta(minutes=cls.EXPIRE_MINUTES)
-        expired_orders = cls.query.filter(cls.create_time < expire_time).all()
+    def sweep_expired_batch(cls, batch_size=None):
+        """删除一批过期的临时订单并提交
+        
+        使用 DELETE ... WHERE id IN (SELECT id ... WHERE create_time < ? ORDER BY create_time LIMIT n)，
+        子查询沿 idx_temp_order_create_time 索引取最早的 n 行，不把数据加载到内存。
         
-        for order in expired_orders:
-            db.session.delete(order)
+        Args:
+            batch_size: 本批最多删除的行数
         
+        Returns:
+            int: 实际删除的行数
+        """
+        batch_size = batch_size or cls.SWEEP_BATCH_SIZE
+        expire_time = datetime.utcnow() - timedelta(minutes=cls.EXPIRE_MINUTES)
+        
+        expired_ids = (
+            select(cls.id)
+            .where(cls.create_time < expire_time)
+            .order_by(cls.create_time)
+            .limit(batch_size)
+        )
+        result = db.session.execute(
+            delete(cls)
+            .where(cls.id.in_(expired_ids))
+            .execution_options(synchronize_session=False)
+        )
         db.session.commit()
-        return len(expired_orders)
+        return result.rowcount
+    
+    @classmethod
+    def cleanup_expired(cls, batch_size=None):
+        """分批清理过期的临时订单及其库存预占记录
+        
+        Returns:
+            int: 清理的临时订单数量
+        """
+        batch_size = batch_size or cls.SWEEP_BATCH_SIZE
+        total = 0
+        while True:
+            swept = cls.sweep_expired_batch(batch_size)
+            total += swept
+            if swept < batch_size:
+                break
+        
+        while StockHold.sweep_expired_batch(batch_size) >= batch_size:
+            pass
+        
+        return total
     
     @classmethod
     def get_by_id(cls, temp_order_id):
@@ -190,4 +524,120 @@ class TempOrder(db.Model):
         return cls.query.filter(cls.id == temp_order_id).first()
     
     def __repr__(self):
-        return f'<TempOrder {self.id}: {self.user_name}>'
\ No newline at end of file
+        return f'<TempOrder {self.id}: {self.user_name}>'
+
+
+class StockHold(db.Model):
+    """库存预占模型类
+
+    预订单创建时占用一件库存，记录以预订单ID为主键。预占在 expire_time 之后自动失效
+    （不再计入占用），提交正式订单时删除记录并转为真实扣减。
+    可用库存 = 轮椅库存 - 未过期预占数量，通过 (wheelchair_id, expire_time, quantity)
+    覆盖索引计算，不扫描整表。
+    """
+    
+    __tablename__ = 'stock_hold'
+    
+    # 字段定义
+    temp_order_id = db.Column(db.String(50), primary_key=True, comment='预订单ID')
+    wheelchair_id = db.Column(db.Integer, nullable=False, comment='轮椅ID')
+    quantity = db.Column(db.Integer, nullable=False, default=1, comment='占用数量')
+    expire_time = db.Column(db.DateTime, nullable=False, comment='过期时间')
+    
+    __table_args__ = (
+        db.Index('idx_stock_hold_active', 'wheelchair_id', 'expire_time', 'quantity'),
+        db.Index('idx_stock_hold_expire_time', 'expire_time'),
+    )
+    
+    @classmethod
+    def active_quantity(cls, wheelchair_id, now=None):
+        """未过期预占数量的标量子查询（可关联到外层轮椅ID列）"""
+        now = now or datetime.utcnow()
+        return (
+            select(func.coalesce(func.sum(cls.quantity), 0))
+            .where(cls.wheelchair_id == wheelchair_id, cls.expire_time > now)
+            .scalar_subquery()
+        )
+    
+    @classmethod
+    def hold(cls, temp_order, quantity=1):
+        """为预订单占用库存（不提交事务）
+        
+        仅当 库存 - 未过期预占 >= quantity 时插入预占记录，判断与插入在同一条
+        INSERT ... SELECT 中完成；PostgreSQL 下先对轮椅行加锁，保证并发预占串行化。
+        
+        Args:
+            temp_order: 临时预订单对象
+            quantity: 占用数量
+        
+        Returns:
+            bool: 是否占用成功
+        """
+        from .wheelchair import get_wheelchair_model
+        WheelchairModel = get_wheelchair_model()
+        
+        now = datetime.utcnow()
+        db.session.execute(
+            select(WheelchairModel.id)
+            .where(WheelchairModel.id == temp_order.wheelchair_id)
+            .with_for_update()
+        )
+        
+        available = (
+            select(
+                literal(temp_order.id),
+                WheelchairModel.id,
+                literal(quantity),
+                literal(temp_order.get_expire_time())
+            )
+            .where(
+                WheelchairModel.id == temp_order.wheelchair_id,
+                WheelchairModel.is_deleted == False,
+                WheelchairModel.is_offline == False,
+                WheelchairModel.stock - cls.active_quantity(WheelchairModel.id, now) >= quantity
+            )
+        )
+        result = db.session.execute(
+            insert(cls).from_select(
+                ['temp_order_id', 'wheelchair_id', 'quantity', 'expire_time'],
+                available
+            )
+        )
+        return result.rowcount == 1
+    
+    @classmethod
+    def release(cls, temp_order_id):
+        """释放预订单的库存预占（不提交事务）
+        
+        Returns:
+            int: 删除的预占记录数
+        """
+        return cls.query.filter(cls.temp_order_id == temp_order_id).delete()
+    
+    @classmethod
+    def sweep_expired_batch(cls, batch_size=500):
+        """删除一批已过期的预占记录并提交（过期预占已不计入占用，仅做物理清理）
+        
+        Returns:
+            int: 实际删除的行数
+        """
+        expired_ids = (
+            select(cls.temp_order_id)
+            .where(cls.expire_time <= datetime.utcnow())
+            .limit(batch_size)
+        )
+        result = db.session.execute(
+            delete(cls)
+            .where(cls.temp_order_id.in_(expired_ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
+    
+    @classmethod
+    def get_active_quantity(cls, wheelchair_id):
+        """获取轮椅当前未过期的预占数量"""
+        return db.session.execute(select(cls.active_quantity(wheelchair_id))).scalar()
+    
+    def __repr__(self):
+        return f'<StockHold {self.temp_order_id}: wheelchair {self.wheelchair_id} x{self.quantity}>'
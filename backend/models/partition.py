@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单分区
+formal_order 按创建月份分区：PostgreSQL 使用原生范围分区；SQLite 把已结束（已完成/已取消）
+的历史订单按月迁移到独立的数据库文件，主表只保留近期和未结束的订单。
+订单号 WR{yyyymmddHHMMSS} 中的时间用于定位分区，列表查询在各分区上分别执行后按时间归并。
+订单号全局唯一：PostgreSQL 由 formal_order_no 表保证；SQLite 主表和各历史分区各自有唯一约束，
+同一订单号嵌入的时间只对应一个月份，不会同时出现在主表和不同的分区中。
+"""
+
+import glob
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import create_engine, delete, func, select, text, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# 共享db实例，在app.py中通过init_app绑定到应用
+from . import db
+
+ORDER_NO_PATTERN = re.compile(r'^WR(\d{14})')
+
+# 旧订单号按服务器本地时间生成，与UTC创建时间最多相差一天
+ORDER_NO_CLOCK_SKEW = timedelta(days=1)
+
+def parse_order_no_time(order_no):
+    """解析订单号中嵌入的时间，格式不符时返回None"""
+    match = ORDER_NO_PATTERN.match(order_no or '')
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), '%Y%m%d%H%M%S')
+    except ValueError:
+        return None
+
+def order_no_time_range(order_no):
+    """订单号对应的创建时间范围 [开始, 结束)，用于分区裁剪"""
+    order_time = parse_order_no_time(order_no)
+    if order_time is None:
+        return None
+    return order_time - ORDER_NO_CLOCK_SKEW, order_time + ORDER_NO_CLOCK_SKEW
+
+def month_start(value):
+    """所在月份的第一天零点"""
+    return datetime(value.year, value.month, 1)
+
+def add_months(month, count):
+    """月份加减"""
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def months_between(start, end):
+    """[start, end) 时间范围覆盖的月份（倒序）"""
+    months = []
+    month = month_start(end - timedelta(microseconds=1))
+    while month >= month_start(start):
+        months.append(month)
+        month = add_months(month, -1)
+    return months
+
+def archived_statuses():
+    """可以迁移到历史分区的订单状态（状态机中的终态，迁移后不会再被修改）"""
+    from .order import FormalOrder
+    return [status for status, targets in FormalOrder.TRANSITIONS.items() if not targets]
+
+# PostgreSQL 原生分区：主键和唯一约束必须包含分区键，
+# (order_no, create_time) 唯一约束只能保证同一分区内不重复，全局唯一由 formal_order_no 表保证
+POSTGRES_PARENT_DDL = """CREATE TABLE IF NOT EXISTS formal_order (
+    id SERIAL,
+    order_no VARCHAR(50) NOT NULL,
+    user_name VARCHAR(50) NOT NULL,
+    user_phone VARCHAR(20) NOT NULL,
+    user_address TEXT NOT NULL,
+    wheelchair_id INTEGER NOT NULL REFERENCES wheelchair (id),
+    deposit DOUBLE PRECISION NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT '待配送',
+    create_time TIMESTAMP NOT NULL,
+    PRIMARY KEY (id, create_time),
+    UNIQUE (order_no, create_time)
+) PARTITION BY RANGE (create_time)"""
+
+POSTGRES_INDEX_DDL = [
+    'CREATE INDEX IF NOT EXISTS idx_formal_order_status ON formal_order (status, create_time)',
+    'CREATE INDEX IF NOT EXISTS idx_formal_order_create_time ON formal_order (create_time)',
+    # 未落入任何月份分区的行进入默认分区，保证写入不会失败
+    'CREATE TABLE IF NOT EXISTS formal_order_default PARTITION OF formal_order DEFAULT',
+]
+
+# 订单号全局唯一：formal_order 的写入和删除通过触发器同步到以订单号为主键的 formal_order_no，
+# 重复的订单号在触发器中违反主键约束，整条语句回滚
+POSTGRES_ORDER_NO_DDL = [
+    """CREATE TABLE IF NOT EXISTS formal_order_no (
+    order_no VARCHAR(50) PRIMARY KEY,
+    create_time TIMESTAMP NOT NULL
+)""",
+    """CREATE OR REPLACE FUNCTION formal_order_no_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM formal_order_no WHERE order_no = OLD.order_no;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO formal_order_no (order_no, create_time) VALUES (NEW.order_no, NEW.create_time);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql""",
+    'DROP TRIGGER IF EXISTS formal_order_no_sync ON formal_order',
+    """CREATE TRIGGER formal_order_no_sync
+    AFTER INSERT OR DELETE OR UPDATE OF order_no, create_time ON formal_order
+    FOR EACH ROW EXECUTE FUNCTION formal_order_no_sync()""",
+]
+
+# 多个worker同时启动或维护时串行执行分区DDL（事务级咨询锁，事务结束自动释放）
+POSTGRES_PARTITION_LOCK_KEY = 7305001
+
+def attach_postgres_partition(connection, month):
+    """创建月份分区并挂到 formal_order 上
+
+    默认分区中已有该月的订单时，直接 CREATE TABLE ... PARTITION OF 会因默认分区包含
+    新分区范围内的行而失败，因此先建独立表，把默认分区中该月的订单移入后再挂载。
+
+    Returns:
+        int: 从默认分区移入的订单数
+    """
+    name = f"formal_order_p{month.strftime('%Y%m')}"
+    lower, upper = f'{month:%Y-%m-%d}', f'{add_months(month, 1):%Y-%m-%d}'
+    connection.execute(text(
+        f'CREATE TABLE {name} (LIKE formal_order INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    ))
+    # 与分区范围一致的检查约束使挂载时不必再扫描新表
+    connection.execute(text(
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_range "
+        f"CHECK (create_time >= '{lower}' AND create_time < '{upper}')"
+    ))
+    moved = connection.execute(text(
+        f"WITH moved AS (DELETE FROM formal_order_default "
+        f"WHERE create_time >= '{lower}' AND create_time < '{upper}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )).rowcount
+    if moved:
+        # 从默认分区删除时触发器已删掉订单号记录，新表挂载前没有触发器，需补回
+        connection.execute(text(
+            f'INSERT INTO formal_order_no (order_no, create_time) '
+            f'SELECT order_no, create_time FROM {name} ON CONFLICT (order_no) DO NOTHING'
+        ))
+    connection.execute(text(
+        f"ALTER TABLE formal_order ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    connection.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT {name}_range'))
+    return moved
+
+def ensure_postgres_partitions(connection, now=None, months_ahead=3):
+    """创建 formal_order 分区表及当前月起若干个月的分区（可重复执行）
+
+    默认分区中落入的其他月份订单（如服务停止期间超出预建范围的订单）也会建好对应月份的
+    分区并移出默认分区。已存在的非分区 formal_order 表不做迁移，只打印警告。
+
+    Returns:
+        list: 本次新建的分区表名
+    """
+    now = now or datetime.utcnow()
+    connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': POSTGRES_PARTITION_LOCK_KEY})
+    kind = connection.execute(text(
+        "SELECT relkind FROM pg_class WHERE relname = 'formal_order' AND relkind IN ('r', 'p')"
+    )).scalar()
+    if kind == 'r':
+        print("警告: formal_order 已是普通表，需手动迁移为分区表后才能按月分区")
+        return []
+
+    connection.execute(text(POSTGRES_PARENT_DDL))
+    for statement in POSTGRES_INDEX_DDL:
+        connection.execute(text(statement))
+
+    backfill = connection.execute(text("SELECT to_regclass('formal_order_no') IS NULL")).scalar()
+    for statement in POSTGRES_ORDER_NO_DDL:
+        connection.execute(text(statement))
+    if backfill:
+        connection.execute(text(
+            'INSERT INTO formal_order_no (order_no, create_time) '
+            'SELECT order_no, create_time FROM formal_order ON CONFLICT (order_no) DO NOTHING'
+        ))
+
+    months = {add_months(month_start(now), offset) for offset in range(months_ahead + 1)}
+    months.update(row[0] for row in connection.execute(text(
+        "SELECT DISTINCT date_trunc('month', create_time) FROM formal_order_default"
+    )))
+
+    partitions = []
+    for month in sorted(months):
+        name = f"formal_order_p{month.strftime('%Y%m')}"
+        if connection.execute(text('SELECT to_regclass(:name)'), {'name': name}).scalar() is not None:
+            continue
+        moved = attach_postgres_partition(connection, month)
+        if moved:
+            print(f"默认分区中 {month:%Y-%m} 的 {moved} 个订单已移入 {name}")
+        partitions.append(name)
+    return partitions
+
+class OrderArchive:
+    """SQLite 订单历史分区
+
+    每个月一个数据库文件（formal_order_YYYYMM.db），表结构与 formal_order 相同。
+    迁移时先写入历史分区再从主表删除，可重复执行；两步之间异常退出时同一订单会短暂
+    同时存在于两处，查询归并时以主表为准。
+    """
+
+    FILE_PREFIX = 'formal_order_'
+
+    def __init__(self, directory, batch_size=1000):
+        """初始化历史分区
+
+        Args:
+            directory: 分区文件目录
+            batch_size: 迁移时每批处理的订单数
+        """
+        self.directory = directory
+        self.batch_size = batch_size
+        self._engines = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, month):
+        return os.path.join(self.directory, f"{self.FILE_PREFIX}{month.strftime('%Y%m')}.db")
+
+    def months(self):
+        """已有的分区月份（倒序）"""
+        months = []
+        for path in glob.glob(os.path.join(glob.escape(self.directory), f'{self.FILE_PREFIX}*.db')):
+            suffix = os.path.basename(path)[len(self.FILE_PREFIX):-3]
+            try:
+                months.append(datetime.strptime(suffix, '%Y%m'))
+            except ValueError:
+                continue
+        return sorted(months, reverse=True)
+
+    def engine(self, month, create=False):
+        """分区数据库引擎，分区不存在且 create 为False时返回None"""
+        path = self.path(month)
+        with self._lock:
+            engine = self._engines.get(path)
+            if engine is None:
+                if not create and not os.path.exists(path):
+                    return None
+                engine = create_engine(f'sqlite:///{path}')
+                self._engines[path] = engine
+            return engine
+
+    def archive_month(self, month):
+        """把主表中该月已结束的订单迁移到历史分区（不影响每日汇总）
+
+        Returns:
+            int: 迁移的订单数
+        """
+        from .order import FormalOrder
+
+        table = FormalOrder.__table__
+        conditions = [
+            table.c.create_time >= month,
+            table.c.create_time < add_months(month, 1),
+            table.c.status.in_(archived_statuses())
+        ]
+        engine = self.engine(month, create=True)
+        with engine.begin() as connection:
+            table.create(connection, checkfirst=True)
+
+        archived = 0
+        last_id = 0
+        while True:
+            rows = [dict(row._mapping) for row in db.session.execute(
+                select(table).where(*conditions, table.c.id > last_id).order_by(table.c.id).limit(self.batch_size)
+            )]
+            if not rows:
+                break
+            with engine.begin() as connection:
+                connection.execute(sqlite_insert(table).on_conflict_do_nothing(), rows)
+            db.session.execute(delete(table).where(table.c.id.in_([row['id'] for row in rows])))
+            db.session.commit()
+            archived += len(rows)
+            last_id = rows[-1]['id']
+
+        with self._lock:
+            for key in [key for key in self._counts if key[0] == month]:
+                del self._counts[key]
+        return archived
+
+    def archive_before(self, cutoff):
+        """迁移 cutoff 所在月份之前各月已结束的订单
+
+        Returns:
+            dict: 月份('YYYY-MM') -> 迁移的订单数
+        """
+        from .order import FormalOrder
+
+        earliest = db.session.query(func.min(FormalOrder.create_time)).filter(
+            FormalOrder.status.in_(archived_statuses())
+        ).scalar()
+        if earliest is None:
+            return {}
+
+        result = {}
+        month = month_start(earliest)
+        while month < month_start(cutoff):
+            count = self.archive_month(month)
+            if count:
+                result[month.strftime('%Y-%m')] = count
+            month = add_months(month, 1)
+        return result
+
+    def count(self, month, status_filter=None):
+        """分区中的订单数（历史分区只在迁移时变化，结果缓存）"""
+        key = (month, status_filter)
+        with self._lock:
+            if key in self._counts:
+                return self._counts[key]
+
+        from .order import FormalOrder
+
+        table = FormalOrder.__table__
+        statement = select(func.count()).select_from(table)
+        if status_filter:
+            statement = statement.where(table.c.status == status_filter)
+        engine = self.engine(month)
+        if engine is None:
+            return 0
+        with engine.connect() as connection:
+            total = connection.execute(statement).scalar()
+        with self._lock:
+            self._counts[key] = total
+        return total
+
+    def fetch(self, month, status_filter=None, before=None, limit=None, start_date=None, end_date=None):
+        """按 (创建时间, ID) 倒序读取分区中的订单
+
+        Args:
+            month: 分区月份
+            status_filter: 订单状态过滤
+            before: (创建时间, ID)，只返回排在其后的订单（游标分页）
+            limit: 最多返回的行数
+            start_date: 创建时间下限（含）
+            end_date: 创建时间上限（不含）
+
+        Returns:
+            list: 行对象列表（字段与 formal_order 相同）
+        """
+        from .order import FormalOrder
+
+        engine = self.engine(month)
+        if engine is None:
+            return []
+
+        table = FormalOrder.__table__
+        statement = select(table)
+        if status_filter:
+            statement = statement.where(table.c.status == status_filter)
+        if before:
+            statement = statement.where(tuple_(table.c.create_time, table.c.id) < tuple_(*before))
+        if start_date:
+            statement = statement.where(table.c.create_time >= start_date)
+        if end_date:
+            statement = statement.where(table.c.create_time < end_date)
+        statement = statement.order_by(table.c.create_time.desc(), table.c.id.desc())
+        if limit is not None:
+            statement = statement.limit(limit)
+        with engine.connect() as connection:
+            return connection.execute(statement).all()
+
+    def execute(self, month, statement):
+        """在分区上执行查询语句，返回全部行"""
+        engine = self.engine(month)
+        if engine is None:
+            return []
+        with engine.connect() as connection:
+            return connection.execute(statement).all()
+
+    def find(self, order_no):
+        """按订单号在对应月份的分区中查找"""
+        from .order import FormalOrder
+
+        time_range = order_no_time_range(order_no)
+        if time_range is None:
+            return None
+
+        table = FormalOrder.__table__
+        for month in months_between(*time_range):
+            engine = self.engine(month)
+            if engine is None:
+                continue
+            with engine.connect() as connection:
+                row = connection.execute(select(table).where(table.c.order_no == order_no)).first()
+            if row is not None:
+                return row
+        return None
+
+    def dispose(self):
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+
+def get_order_archive(app=None):
+    """获取当前应用的订单历史分区，未配置 ORDER_ARCHIVE_DIR 时返回None
+
+    配置项:
+        ORDER_ARCHIVE_DIR: 历史分区文件目录（仅SQLite）
+        ORDER_ARCHIVE_BATCH_SIZE: 迁移时每批处理的订单数，默认1000
+    """
+    if app is None and not has_app_context():
+        return None
+    app = app or current_app
+    directory = app.config.get('ORDER_ARCHIVE_DIR')
+    if not directory:
+        return None
+
+    archive = app.extensions.get('order_archive')
+    if archive is None:
+        archive = OrderArchive(directory, app.config.get('ORDER_ARCHIVE_BATCH_SIZE', 1000))
+        archive = app.extensions.setdefault('order_archive', archive)
+    return archive
+
+def maintain_order_partitions(app, now=None):
+    """维护订单分区：PostgreSQL 预建后续月份分区，SQLite 迁移已结束的历史订单
+
+    配置项:
+        ORDER_PARTITION_MONTHS_AHEAD: PostgreSQL 预建的月份数，默认3
+        ORDER_ARCHIVE_AFTER_MONTHS: SQLite 保留在主表中的月份数（含当月），默认3
+    """
+    now = now or datetime.utcnow()
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            with db.engine.begin() as connection:
+                # formal_order 引用的表需先于分区表创建（须在 db.create_all() 之前调用）
+                db.metadata.create_all(connection, tables=[
+                    table for table in db.metadata.sorted_tables if table.name != 'formal_order'
+                ])
+                return ensure_postgres_partitions(
+                    connection, now, app.config.get('ORDER_PARTITION_MONTHS_AHEAD', 3)
+                )
+
+        archive = get_order_archive(app)
+        if archive is None:
+            return {}
+        cutoff = add_months(month_start(now), 1 - app.config.get('ORDER_ARCHIVE_AFTER_MONTHS', 3))
+        return archive.archive_before(cutoff)
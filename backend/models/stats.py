@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每日汇总数据模型
+订单按创建日期和当前状态汇总数量与定金，轮椅按日期汇总租出次数和库存变化。
+汇总行在业务写入的同一事务中增量更新，统计接口只需读取 O(天数) 行。
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, case, event, func, insert, inspect, literal, select
+
+# 共享db实例，在app.py中通过init_app绑定到应用
+from . import db
+
+class DailyOrderStat(db.Model):
+    """订单每日汇总：按 (创建日期, 当前状态) 保存订单数和定金合计
+
+    订单状态变更时，把该订单从创建日期的旧状态行移到新状态行，
+    因此任意日期范围内各状态的合计即为这些天创建的订单当前的状态分布。
+    """
+
+    __tablename__ = 'daily_order_stat'
+
+    stat_date = db.Column(db.Date, primary_key=True, comment='订单创建日期')
+    status = db.Column(db.String(20), primary_key=True, comment='订单状态')
+    order_count = db.Column(db.Integer, nullable=False, default=0, comment='订单数')
+    deposit_total = db.Column(db.Float, nullable=False, default=0, comment='定金合计')
+
+    @classmethod
+    def rebuild(cls):
+        """按 formal_order 全量重建（首次部署或数据修复时使用，不提交事务）"""
+        from .order import FormalOrder
+        from utils.stats import date_expression
+
+        day = date_expression(FormalOrder.create_time, db.engine.dialect.name)
+        db.session.query(cls).delete()
+        db.session.execute(insert(cls).from_select(
+            ['stat_date', 'status', 'order_count', 'deposit_total'],
+            select(day, FormalOrder.status, func.count(FormalOrder.id), func.sum(FormalOrder.deposit))
+            .group_by(day, FormalOrder.status)
+        ))
+        
+        # 已迁移到历史分区的订单
+        table = FormalOrder.__table__
+        archived_day = date_expression(table.c.create_time, 'sqlite')
+        for stat_date, status, order_count, deposit in _archived_rows(
+            select(archived_day, table.c.status, func.count(table.c.id), func.sum(table.c.deposit))
+            .group_by(archived_day, table.c.status)
+        ):
+            record_order_stat(date.fromisoformat(stat_date), status, order_count, deposit or 0)
+
+class DailyWheelchairStat(db.Model):
+    """轮椅每日汇总：按 (日期, 轮椅) 保存租出次数、取消次数和库存净变化
+
+    租出和取消次数计入订单创建日期，库存变化计入发生变化的日期。
+    """
+
+    __tablename__ = 'daily_wheelchair_stat'
+
+    stat_date = db.Column(db.Date, primary_key=True, comment='统计日期')
+    wheelchair_id = db.Column(db.Integer, primary_key=True, comment='轮椅ID')
+    rental_count = db.Column(db.Integer, nullable=False, default=0, comment='租出次数')
+    cancel_count = db.Column(db.Integer, nullable=False, default=0, comment='取消次数')
+    stock_change = db.Column(db.Integer, nullable=False, default=0, comment='库存净变化')
+
+    @classmethod
+    def rebuild(cls):
+        """按 formal_order 全量重建租出和取消次数（历史库存变化无法还原，不提交事务）"""
+        from .order import FormalOrder
+        from utils.stats import date_expression
+
+        day = date_expression(FormalOrder.create_time, db.engine.dialect.name)
+        cancelled = func.sum(case((FormalOrder.status == FormalOrder.STATUS_CANCELLED, 1), else_=0))
+        db.session.query(cls).delete()
+        db.session.execute(insert(cls).from_select(
+            ['stat_date', 'wheelchair_id', 'rental_count', 'cancel_count', 'stock_change'],
+            select(day, FormalOrder.wheelchair_id, func.count(FormalOrder.id), cancelled, literal(0))
+            .group_by(day, FormalOrder.wheelchair_id)
+        ))
+        
+        # 已迁移到历史分区的订单
+        table = FormalOrder.__table__
+        archived_day = date_expression(table.c.create_time, 'sqlite')
+        archived_cancelled = func.sum(case((table.c.status == FormalOrder.STATUS_CANCELLED, 1), else_=0))
+        for stat_date, wheelchair_id, rentals, cancels in _archived_rows(
+            select(archived_day, table.c.wheelchair_id, func.count(table.c.id), archived_cancelled)
+            .group_by(archived_day, table.c.wheelchair_id)
+        ):
+            record_wheelchair_stat(wheelchair_id, date.fromisoformat(stat_date), rentals=rentals, cancels=cancels)
+
+def _archived_rows(statement):
+    """在各订单历史分区上执行汇总查询（未配置历史分区时为空）"""
+    from .partition import get_order_archive
+
+    archive = get_order_archive()
+    if archive is None:
+        return []
+    return [row for month in archive.months() for row in archive.execute(month, statement)]
+
+def _upsert_statement(model, keys, increments):
+    """生成 INSERT ... ON CONFLICT 累加语句"""
+    values = dict(keys, **increments)
+    table = model.__table__
+    dialect_name = db.engine.dialect.name
+    if dialect_name in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(table).values(**values)
+        return statement.on_duplicate_key_update(
+            **{name: table.c[name] + statement.inserted[name] for name in increments}
+        )
+
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    statement = dialect_insert(table).values(**values)
+    return statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: table.c[name] + statement.excluded[name] for name in increments}
+    )
+
+def record_order_stat(stat_date, status, count, deposit):
+    """累加订单汇总（在当前事务中执行）"""
+    db.session.execute(_upsert_statement(
+        DailyOrderStat,
+        {'stat_date': stat_date, 'status': status},
+        {'order_count': count, 'deposit_total': deposit}
+    ))
+
+def record_wheelchair_stat(wheelchair_id, stat_date=None, rentals=0, cancels=0, stock_change=0):
+    """累加轮椅汇总（在当前事务中执行）"""
+    if not (rentals or cancels or stock_change):
+        return
+    db.session.execute(_upsert_statement(
+        DailyWheelchairStat,
+        {'stat_date': stat_date or datetime.utcnow().date(), 'wheelchair_id': wheelchair_id},
+        {'rental_count': rentals, 'cancel_count': cancels, 'stock_change': stock_change}
+    ))
+
+@event.listens_for(db.session, 'before_flush')
+def _maintain_daily_stats(session, flush_context, instances):
+    """随订单新增、订单状态变更和ORM方式修改库存同步更新汇总
+
+    库存的原子扣减/恢复使用批量UPDATE，不经过ORM，由 Wheelchair.reserve_stock /
+    restore_stock 直接调用 record_wheelchair_stat。
+    """
+    from .order import FormalOrder
+    from .wheelchair import Wheelchair
+
+    for obj in list(session.new):
+        if isinstance(obj, FormalOrder):
+            create_date = (obj.create_time or datetime.utcnow()).date()
+            record_order_stat(create_date, obj.status, 1, obj.deposit or 0)
+            record_wheelchair_stat(obj.wheelchair_id, create_date, rentals=1)
+        elif isinstance(obj, Wheelchair) and obj.stock:
+            # 新增轮椅的初始库存，轮椅ID在插入后才生成，延后到 after_flush 记录
+            session.info.setdefault('new_wheelchair_stock', []).append(obj)
+
+    for obj in list(session.dirty):
+        if isinstance(obj, FormalOrder):
+            history = inspect(obj).attrs.status.history
+            if history.deleted and history.added and history.deleted[0] != history.added[0]:
+                old_status, new_status = history.deleted[0], history.added[0]
+                create_date = obj.create_time.date()
+                record_order_stat(create_date, old_status, -1, -(obj.deposit or 0))
+                record_order_stat(create_date, new_status, 1, obj.deposit or 0)
+                # 取消次数与租出次数一样计入订单创建日期
+                if new_status == FormalOrder.STATUS_CANCELLED:
+                    record_wheelchair_stat(obj.wheelchair_id, create_date, cancels=1)
+                elif old_status == FormalOrder.STATUS_CANCELLED:
+                    record_wheelchair_stat(obj.wheelchair_id, create_date, cancels=-1)
+        elif isinstance(obj, Wheelchair):
+            history = inspect(obj).attrs.stock.history
+            if history.deleted and history.added:
+                record_wheelchair_stat(obj.id, stock_change=(history.added[0] or 0) - (history.deleted[0] or 0))
+
+@event.listens_for(db.session, 'after_flush')
+def _record_new_wheelchair_stock(session, flush_context):
+    for wheelchair in session.info.pop('new_wheelchair_stock', []):
+        record_wheelchair_stat(wheelchair.id, stock_change=wheelchair.stock)
+
+def get_dashboard_statistics(days=30, top=10, today=None):
+    """管理端仪表盘统计（全部读取汇总表，查询量与天数成正比，与订单数无关）
+
+    Args:
+        days: 趋势统计的天数（含今天）
+        top: 轮椅租用排行返回条数
+        today: 当前日期（UTC），默认取当前时间
+
+    Returns:
+        dict: 与前端 DashboardStats 对应的统计数据
+    """
+    from .order import FormalOrder
+    from .user import AdminUser
+    from .wheelchair import Wheelchair
+
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+    month_start = today.replace(day=1)
+    active_statuses = [FormalOrder.STATUS_PENDING, FormalOrder.STATUS_DELIVERING]
+
+    # 订单趋势、状态分布、区间定金（统计区间内创建的订单）
+    daily = {start + timedelta(days=i): {'count': 0, 'deposit': 0.0} for i in range(days)}
+    status_distribution = {}
+    revenue = 0.0
+    rows = db.session.query(
+        DailyOrderStat.stat_date, DailyOrderStat.status,
+        DailyOrderStat.order_count, DailyOrderStat.deposit_total
+    ).filter(DailyOrderStat.stat_date >= start, DailyOrderStat.stat_date <= today)
+    for stat_date, status, order_count, deposit_total in rows:
+        daily[stat_date]['count'] += order_count
+        status_distribution[status] = status_distribution.get(status, 0) + order_count
+        if status != FormalOrder.STATUS_CANCELLED:
+            daily[stat_date]['deposit'] += deposit_total
+            revenue += deposit_total
+
+    # 全部订单数、进行中订单数、本月定金
+    total_orders = 0
+    active_orders = 0
+    monthly_revenue = 0.0
+    totals = db.session.query(
+        DailyOrderStat.status,
+        func.sum(DailyOrderStat.order_count),
+        func.sum(case((DailyOrderStat.stat_date >= month_start, DailyOrderStat.deposit_total), else_=0))
+    ).group_by(DailyOrderStat.status)
+    for status, order_count, month_deposit in totals:
+        total_orders += int(order_count or 0)
+        if status in active_statuses:
+            active_orders += int(order_count or 0)
+        if status != FormalOrder.STATUS_CANCELLED:
+            monthly_revenue += float(month_deposit or 0)
+
+    # 轮椅租用排行（统计区间内，扣除已取消）
+    usage = func.sum(DailyWheelchairStat.rental_count - DailyWheelchairStat.cancel_count)
+    usage_rows = db.session.query(
+        DailyWheelchairStat.wheelchair_id, usage.label('usage_count'),
+        func.sum(DailyWheelchairStat.stock_change)
+    ).filter(
+        DailyWheelchairStat.stat_date >= start, DailyWheelchairStat.stat_date <= today
+    ).group_by(DailyWheelchairStat.wheelchair_id).order_by(usage.desc()).limit(top).all()
+    names = dict(db.session.query(Wheelchair.id, Wheelchair.name).filter(
+        Wheelchair.id.in_([row[0] for row in usage_rows])
+    )) if usage_rows else {}
+
+    total_wheelchairs, available_wheelchairs = db.session.query(
+        func.count(Wheelchair.id),
+        func.sum(case((and_(Wheelchair.is_offline == False, Wheelchair.stock > 0), 1), else_=0))
+    ).filter(Wheelchair.is_deleted == False).one()
+
+    return {
+        'total_wheelchairs': total_wheelchairs or 0,
+        'available_wheelchairs': int(available_wheelchairs or 0),
+        'total_orders': total_orders,
+        'active_orders': active_orders,
+        'total_users': AdminUser.query.filter(AdminUser.is_deleted == False).count(),
+        'monthly_revenue': round(monthly_revenue, 2),
+        'revenue': round(revenue, 2),
+        'daily_orders': [
+            {'date': day.strftime('%Y-%m-%d'), 'count': value['count'], 'deposit': round(value['deposit'], 2)}
+            for day, value in sorted(daily.items())
+        ],
+        'wheelchair_usage': [
+            {
+                'wheelchair_id': wheelchair_id,
+                'name': names.get(wheelchair_id),
+                'usage_count': int(usage_count or 0),
+                'stock_change': int(stock_change or 0)
+            }
+            for wheelchair_id, usage_count, stock_change in usage_rows
+        ],
+        'order_status_distribution': [
+            {'status': status, 'count': count}
+            for status, count in status_distribution.items() if count
+        ]
+    }
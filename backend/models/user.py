@@ -5,11 +5,15 @@
 定义管理用户的数据结构和相关操作方法
 """
 
-import bcrypt
-from flask_sqlalchemy import SQLAlchemy
+from flask import has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.cache import get_principal_cache
+from utils.pagination import paginate_query
+from utils.password import get_password_hasher
 
-# 全局db变量，将在app.py中初始化
-db = None
+# 共享db实例，在app.py中通过init_app绑定到应用
+from . import db
 
 class AdminUser(db.Model):
     """管理用户模型类"""
@@ -54,24 +58,22 @@ class AdminUser(db.Model):
         return data
     
     def set_password(self, password):
-        """设置密码（自动加密）"""
-        if isinstance(password, str):
-            password = password.encode('utf-8')
+        """设置密码（自动加密，在密码哈希线程池中执行）
         
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password, salt).decode('utf-8')
+        Raises:
+            PasswordHasherBusy: 线程池已满
+        """
+        self.password_hash = get_password_hasher().hash(password)
     
     def check_password(self, password):
-        """验证密码"""
-        if isinstance(password, str):
-            password = password.encode('utf-8')
-        
-        if isinstance(self.password_hash, str):
-            password_hash = self.password_hash.encode('utf-8')
-        else:
-            password_hash = self.password_hash
+        """验证密码（在密码哈希线程池中执行）
         
-        return bcrypt.checkpw(password, password_hash)
+        Raises:
+            PasswordHasherBusy: 线程池已满
+        """
+        return get_password_hasher().verify(
+            password, self.password_hash, memo_key=(self.__tablename__, self.id)
+        )
     
     def is_admin(self):
         """检查是否为管理员"""
@@ -96,19 +98,30 @@ class AdminUser(db.Model):
     def soft_delete(self):
         """逻辑删除用户"""
         self.is_deleted = True
+        self.invalidate_principal()
     
     def restore(self):
         """恢复已删除的用户"""
         self.is_deleted = False
+        self.invalidate_principal()
     
     def update_role(self, new_role):
         """更新用户角色"""
         if new_role in self.VALID_ROLES:
             old_role = self.role
             self.role = new_role
+            self.invalidate_principal()
             return True, f'角色从 {old_role} 更新为 {new_role}'
         return False, f'无效的角色: {new_role}'
     
+    def invalidate_principal(self):
+        """标记该用户的身份缓存需要失效
+        
+        失效在事务提交后执行，避免提交前其他请求把旧角色重新写入缓存
+        """
+        if self.id is not None:
+            db.session.info.setdefault(PRINCIPAL_INVALIDATIONS_KEY, set()).add(self.id)
+    
     @classmethod
     def authenticate(cls, username, password):
         """用户认证
@@ -128,10 +141,19 @@ class AdminUser(db.Model):
         if not user:
             return None, '用户不存在'
         
-        if user.check_password(password):
-            return user, '认证成功'
-        else:
+        if not user.check_password(password):
             return None, '密码错误'
+        
+        # bcrypt cost 配置变更后，在登录时用新的cost重新哈希，无需强制重置密码
+        if get_password_hasher().needs_rehash(user.password_hash):
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"密码重新哈希失败: {str(e)}")
+        
+        return user, '认证成功'
     
     @classmethod
     def get_by_username(cls, username, include_deleted=False):
@@ -150,7 +172,7 @@ class AdminUser(db.Model):
         return query.first()
     
     @classmethod
-    def get_all(cls, page=1, limit=10, include_deleted=False, role_filter=None):
+    def get_all(cls, page=1, limit=10, include_deleted=False, role_filter=None, count_mode='exact'):
         """获取所有用户"""
         query = cls.query
         
@@ -160,9 +182,8 @@ class AdminUser(db.Model):
         if role_filter:
             query = query.filter(cls.role == role_filter)
         
-        total = query.count()
-        users = query.order_by(cls.id.desc()).offset((page - 1) * limit).limit(limit).all()
-        return users, total
+        query = query.order_by(cls.id.desc())
+        return paginate_query(query, page, limit, count_mode)
     
     @classmethod
     def username_exists(cls, username, exclude_id=None):
@@ -208,4 +229,20 @@ class AdminUser(db.Model):
             return None, f'用户创建失败: {str(e)}'
     
     def __repr__(self):
-        return f'<AdminUser {self.id}: {self.username} ({self.role})>'
\ No newline at end of file
+        return f'<AdminUser {self.id}: {self.username} ({self.role})>'
+
+PRINCIPAL_INVALIDATIONS_KEY = 'admin_principal_invalidations'
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_principals_after_commit(session):
+    """事务提交后失效已变更用户的身份缓存"""
+    user_ids = session.info.pop(PRINCIPAL_INVALIDATIONS_KEY, None)
+    if user_ids and has_app_context():
+        cache = get_principal_cache()
+        for user_id in user_ids:
+            cache.invalidate(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_principal_invalidations(session):
+    """事务回滚后丢弃待失效标记"""
+    session.info.pop(PRINCIPAL_INVALIDATIONS_KEY, None)
\ No newline at end of file
@@ -5,120 +5,301 @@
 定义轮椅信息的数据结构和相关操作方法
 """
 
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import or_
+import threading
+from sqlalchemy import Column, Integer, MetaData, Table, literal_column, or_, select, text, update
+from sqlalchemy.exc import OperationalError
+from utils.pagination import paginate_query
 
 # 延迟导入避免循环依赖
 db = None
 
+# 轮椅数据库模型注册表（每个数据库实例只构建一次映射类）
+_model_registry = {}
+_registry_lock = threading.Lock()
+
+# 全文索引（SQLite FTS5 trigram 分词，中文子串同样可以命中）
+FTS_TABLE_NAME = 'wheelchair_fts'
+FTS_MIN_KEYWORD_LENGTH = 3  # trigram 分词要求关键词至少3个字符
+
+# 全文索引表仅用于构建查询，不加入模型元数据，避免 create_all 尝试建表
+_fts_table = Table(
+    FTS_TABLE_NAME, MetaData(),
+    Column('rowid', Integer),
+    Column('rank')
+)
+
+# 各数据库是否已建立全文索引（按连接地址缓存检测结果）
+_fts_available = {}
+
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE_NAME} USING fts5(
+        name, description, manufacturer,
+        content='wheelchair', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE_NAME}_ai AFTER INSERT ON wheelchair BEGIN
+        INSERT INTO {FTS_TABLE_NAME}(rowid, name, description, manufacturer)
+        VALUES (new.id, new.name, new.description, new.manufacturer);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE_NAME}_ad AFTER DELETE ON wheelchair BEGIN
+        INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}, rowid, name, description, manufacturer)
+        VALUES ('delete', old.id, old.name, old.description, old.manufacturer);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE_NAME}_au AFTER UPDATE OF name, description, manufacturer ON wheelchair BEGIN
+        INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}, rowid, name, description, manufacturer)
+        VALUES ('delete', old.id, old.name, old.description, old.manufacturer);
+        INSERT INTO {FTS_TABLE_NAME}(rowid, name, description, manufacturer)
+        VALUES (new.id, new.name, new.description, new.manufacturer);
+    END""",
+]
+
 def init_db(database):
+    """绑定数据库实例并注册轮椅模型（在 init_database 中调用一次）"""
     global db
     db = database
+    return get_wheelchair_model()
 
 def get_db():
     """获取数据库实例"""
-    from app import db as app_db
-    return app_db
-
-class Wheelchair:
-    """轮椅模型类"""
-    
-    def __init__(self, name, price, description=None, stock=1, manufacturer=None):
-        """初始化轮椅对象"""
-        self.name = name
-        self.price = price
-        self.description = description
-        self.stock = stock
-        self.manufacturer = manufacturer
-        self.is_offline = False
-        self.is_deleted = False
-    
-    def to_dict(self):
-        """转换为字典格式"""
-        return {
-            'id': getattr(self, 'id', None),
-            'name': self.name,
-            'description': self.description,
-            'price': self.price,
-            'stock': self.stock,
-            'manufacturer': self.manufacturer,
-            'is_offline': self.is_offline,
-            'is_deleted': self.is_deleted
-        }
-    
-    def is_available(self):
-        """检查轮椅是否可用（未下架、未删除、有库存）"""
-        return not self.is_offline and not self.is_deleted and self.stock > 0
-    
-    def reduce_stock(self, quantity=1):
-        """减少库存"""
-        if self.stock >= quantity:
-            self.stock -= quantity
-            return True
+    if db is not None:
+        return db
+    from . import db as models_db
+    return models_db
+
+def init_search_index(database):
+    """建立轮椅全文索引及同步触发器（需在 create_all 之后调用，仅支持SQLite）
+
+    首次建立时从 wheelchair 表重建索引内容；之后由触发器保持同步，
+    库存等非文本字段的更新不会触发索引写入。
+
+    Returns:
+        bool: 全文索引是否可用
+    """
+    engine = database.engine
+    if engine.dialect.name != 'sqlite':
+        _fts_available[str(engine.url)] = False
         return False
-    
-    def increase_stock(self, quantity=1):
-        """增加库存"""
-        self.stock += quantity
-    
-    def set_offline(self):
-        """设置为下架状态"""
-        self.is_offline = True
-    
-    def set_online(self):
-        """设置为上架状态"""
-        self.is_offline = False
-    
-    def soft_delete(self):
-        """逻辑删除"""
-        self.is_deleted = True
-    
+
+    try:
+        with engine.begin() as conn:
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE_NAME}
+            ).first() is not None
+            for statement in FTS_DDL:
+                conn.execute(text(statement))
+            if not existed:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}) VALUES ('rebuild')"))
+        _fts_available[str(engine.url)] = True
+    except OperationalError as e:
+        # SQLite 版本过低（trigram 需要 3.34+）或未编译 FTS5 时退化为 LIKE 搜索
+        print(f"警告: 全文索引不可用，搜索将使用LIKE匹配: {str(e)}")
+        _fts_available[str(engine.url)] = False
+    return _fts_available[str(engine.url)]
+
+def fulltext_available():
+    """当前数据库是否已建立全文索引"""
+    engine = get_db().engine
+    key = str(engine.url)
+    if key not in _fts_available:
+        if engine.dialect.name != 'sqlite':
+            _fts_available[key] = False
+        else:
+            with engine.connect() as conn:
+                _fts_available[key] = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': FTS_TABLE_NAME}
+                ).first() is not None
+    return _fts_available[key]
+
+def _fts_phrase(keyword):
+    """将关键词转为FTS5短语查询（双引号包裹，内部双引号转义）"""
+    return '"' + keyword.replace('"', '""') + '"'
+
+def _build_wheelchair_model(database):
+    """构建轮椅数据库模型类"""
+
+    class WheelchairModel(database.Model):
+        """轮椅数据库模型类"""
+
+        __tablename__ = 'wheelchair'
+
+        # 字段定义
+        id = database.Column(database.Integer, primary_key=True, autoincrement=True)
+        name = database.Column(database.String(100), nullable=False, comment='轮椅名称')
+        description = database.Column(database.Text, comment='轮椅描述')
+        price = database.Column(database.Float, nullable=False, comment='租赁价格')
+        stock = database.Column(database.Integer, nullable=False, default=1, comment='库存数量')
+        manufacturer = database.Column(database.String(100), comment='制造商')
+        is_offline = database.Column(database.Boolean, default=False, comment='是否下架')
+        is_deleted = database.Column(database.Boolean, default=False, comment='是否逻辑删除')
+
+        # 关系定义
+        formal_orders = database.relationship('FormalOrder', backref='wheelchair', lazy=True)
+
+        def to_dict(self):
+            """转换为字典格式"""
+            return {
+                'id': self.id,
+                'name': self.name,
+                'description': self.description,
+                'price': self.price,
+                'stock': self.stock,
+                'manufacturer': self.manufacturer,
+                'is_offline': self.is_offline,
+                'is_deleted': self.is_deleted
+            }
+
+        def is_available(self):
+            """检查轮椅是否可用（未下架、未删除、有库存）"""
+            return not self.is_offline and not self.is_deleted and self.stock > 0
+
+        def reduce_stock(self, quantity=1):
+            """减少库存"""
+            if self.stock >= quantity:
+                self.stock -= quantity
+                return True
+            return False
+
+        def increase_stock(self, quantity=1):
+            """增加库存"""
+            self.stock += quantity
+
+        def set_offline(self):
+            """设置为下架状态"""
+            self.is_offline = True
+
+        def set_online(self):
+            """设置为上架状态"""
+            self.is_offline = False
+
+        def soft_delete(self):
+            """逻辑删除"""
+            self.is_deleted = True
+
+        def __repr__(self):
+            return f'<Wheelchair {self.id}: {self.name}>'
+
+    return WheelchairModel
+
+def get_wheelchair_model():
+    """获取轮椅数据库模型（首次调用时构建，之后直接返回缓存的映射类）"""
+    database = get_db()
+    model = _model_registry.get(id(database))
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        model = _model_registry.get(id(database))
+        if model is None:
+            model = _build_wheelchair_model(database)
+            _model_registry[id(database)] = model
+    return model
+
+
+class _WheelchairMeta(type):
+    """将类属性访问（query、字段列等）转发到已注册的轮椅模型"""
+
+    def __getattr__(cls, name):
+        return getattr(get_wheelchair_model(), name)
+
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, get_wheelchair_model())
+
+
+class Wheelchair(metaclass=_WheelchairMeta):
+    """轮椅模型门面类
+
+    Wheelchair(...) 直接返回已注册模型的实例，Wheelchair.query、Wheelchair.id
+    等属性同样转发到该模型，业务查询方法定义在本类中。
+    """
+
+    # 批量操作类型
+    BATCH_ONLINE = 'online'
+    BATCH_OFFLINE = 'offline'
+    BATCH_DELETE = 'delete'
+    VALID_BATCH_ACTIONS = [BATCH_ONLINE, BATCH_OFFLINE, BATCH_DELETE]
+
+    # 管理端批量状态（available/maintenance/discontinued）对应的批量操作
+    BATCH_STATUS_ACTIONS = {
+        'available': BATCH_ONLINE,
+        'maintenance': BATCH_OFFLINE,
+        'discontinued': BATCH_OFFLINE
+    }
+
+    # 单条 UPDATE ... WHERE id IN (...) 的最大ID数（低于旧版SQLite的999个参数上限）
+    BATCH_CHUNK_SIZE = 500
+
+    # 单次批量操作允许的最大ID数
+    BATCH_MAX_IDS = 10000
+
+    def __new__(cls, *args, **kwargs):
+        return get_wheelchair_model()(*args, **kwargs)
+
     @classmethod
-    def search(cls, keyword=None, sort_type=None, page=1, limit=10, include_offline=False):
+    def search(cls, keyword=None, sort_type=None, page=1, limit=10, include_offline=False, count_mode='exact',
+               fulltext=True):
         """搜索轮椅
-        
+
+        关键词不少于3个字符且全文索引可用时走FTS5索引，未指定排序时按相关度排序；
+        否则退化为 name/description/manufacturer 的 LIKE 匹配。
+
         Args:
             keyword: 搜索关键词
             sort_type: 排序类型 (price_asc, price_desc)
             page: 页码
             limit: 每页数量
             include_offline: 是否包含下架商品
-        
+            count_mode: 总数统计方式 (exact, none, estimate)
+            fulltext: 是否允许使用全文索引
+
         Returns:
             tuple: (轮椅列表, 总数量)
         """
-        db = get_db()
+        # 分页（数据和总数一次查询返回）
+        query = cls.search_query(keyword, sort_type, include_offline, fulltext)
+        return paginate_query(query, page, limit, count_mode)
+
+    @classmethod
+    def search_query(cls, keyword=None, sort_type=None, include_offline=False, fulltext=True):
+        """搜索查询（已设置过滤和排序条件，参数同 search）"""
         WheelchairModel = get_wheelchair_model()
-        
+        rank = None
+
         query = WheelchairModel.query.filter(WheelchairModel.is_deleted == False)
-        
+
         # 是否包含下架商品
         if not include_offline:
             query = query.filter(WheelchairModel.is_offline == False)
-        
+
         # 关键词搜索
-        if keyword:
+        if keyword and fulltext and len(keyword) >= FTS_MIN_KEYWORD_LENGTH and fulltext_available():
+            matched = (
+                select(_fts_table.c.rowid.label('id'), _fts_table.c.rank.label('rank'))
+                .where(literal_column(FTS_TABLE_NAME).op('MATCH')(_fts_phrase(keyword)))
+                .subquery()
+            )
+            query = query.join(matched, matched.c.id == WheelchairModel.id)
+            rank = matched.c.rank
+        elif keyword:
             search_filter = or_(
                 WheelchairModel.name.contains(keyword),
                 WheelchairModel.description.contains(keyword),
                 WheelchairModel.manufacturer.contains(keyword)
             )
             query = query.filter(search_filter)
-        
+
         # 排序
         if sort_type == 'price_asc':
             query = query.order_by(WheelchairModel.price.asc())
         elif sort_type == 'price_desc':
             query = query.order_by(WheelchairModel.price.desc())
+        elif rank is not None:
+            query = query.order_by(rank, WheelchairModel.id.desc())  # 全文检索按相关度排序
         else:
             query = query.order_by(WheelchairModel.id.desc())  # 默认按ID倒序
-        
-        # 分页
-        total = query.count()
-        wheelchairs = query.offset((page - 1) * limit).limit(limit).all()
-        
-        return wheelchairs, total
-    
+
+        return query
+
     @classmethod
     def get_available_by_id(cls, wheelchair_id):
         """根据ID获取可用的轮椅"""
@@ -129,83 +310,131 @@ class Wheelchair:
             WheelchairModel.is_offline == False,
             WheelchairModel.stock > 0
         ).first()
-    
+
+    @classmethod
+    def reserve_stock(cls, wheelchair_id, quantity=1):
+        """原子扣减库存
+
+        使用单条条件更新 UPDATE ... SET stock = stock - n WHERE id = ? AND stock >= n，
+        由数据库保证并发下不会超卖（PostgreSQL 会对目标行加行锁并在锁释放后重新校验条件）。
+        条件中同时扣除其他预订单未过期的库存预占，转换自身预占时应先释放该预占。
+        本方法不提交事务，由调用方统一提交或回滚。
+
+        Args:
+            wheelchair_id: 轮椅ID
+            quantity: 扣减数量
+
+        Returns:
+            bool: 是否扣减成功（以受影响行数判断）
+        """
+        from .order import StockHold
+        WheelchairModel = get_wheelchair_model()
+        held = StockHold.active_quantity(WheelchairModel.id)
+        result = get_db().session.execute(
+            update(WheelchairModel)
+            .where(
+                WheelchairModel.id == wheelchair_id,
+                WheelchairModel.is_deleted == False,
+                WheelchairModel.is_offline == False,
+                WheelchairModel.stock - held >= quantity
+            )
+            .values(stock=WheelchairModel.stock - quantity)
+            .execution_options(synchronize_session='fetch')
+        )
+        if result.rowcount != 1:
+            return False
+        from .stats import record_wheelchair_stat
+        record_wheelchair_stat(wheelchair_id, stock_change=-quantity)
+        return True
+
+    @classmethod
+    def restore_stock(cls, wheelchair_id, quantity=1):
+        """原子恢复库存（不提交事务）
+
+        Returns:
+            bool: 是否恢复成功
+        """
+        WheelchairModel = get_wheelchair_model()
+        result = get_db().session.execute(
+            update(WheelchairModel)
+            .where(WheelchairModel.id == wheelchair_id)
+            .values(stock=WheelchairModel.stock + quantity)
+            .execution_options(synchronize_session='fetch')
+        )
+        if result.rowcount != 1:
+            return False
+        from .stats import record_wheelchair_stat
+        record_wheelchair_stat(wheelchair_id, stock_change=quantity)
+        return True
+
+    @classmethod
+    def get_available_stock(cls, wheelchair_id):
+        """获取可用库存（库存减去未过期的预订单预占）"""
+        from .order import StockHold
+        wheelchair = cls.get_by_id(wheelchair_id)
+        if not wheelchair:
+            return 0
+        return max(wheelchair.stock - StockHold.get_active_quantity(wheelchair_id), 0)
+
     @classmethod
     def get_by_id(cls, wheelchair_id, include_deleted=False):
         """根据ID获取轮椅"""
+        return cls.by_id_query(wheelchair_id, include_deleted).first()
+
+    @classmethod
+    def by_id_query(cls, wheelchair_id, include_deleted=False):
+        """按ID查询轮椅的查询对象"""
         WheelchairModel = get_wheelchair_model()
         query = WheelchairModel.query.filter(WheelchairModel.id == wheelchair_id)
         if not include_deleted:
             query = query.filter(WheelchairModel.is_deleted == False)
-        return query.first()
-    
-    def __repr__(self):
-        return f'<Wheelchair {getattr(self, "id", "new")}: {self.name}>'
+        return query
 
-def get_wheelchair_model():
-    """获取轮椅数据库模型"""
-    db = get_db()
-    
-    class WheelchairModel(db.Model):
-        """轮椅数据库模型类"""
-        
-        __tablename__ = 'wheelchair'
-        
-        # 字段定义
-        id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-        name = db.Column(db.String(100), nullable=False, comment='轮椅名称')
-        description = db.Column(db.Text, comment='轮椅描述')
-        price = db.Column(db.Float, nullable=False, comment='租赁价格')
-        stock = db.Column(db.Integer, nullable=False, default=1, comment='库存数量')
-        manufacturer = db.Column(db.String(100), comment='制造商')
-        is_offline = db.Column(db.Boolean, default=False, comment='是否下架')
-        is_deleted = db.Column(db.Boolean, default=False, comment='是否逻辑删除')
-        
-        # 关系定义
-        formal_orders = db.relationship('FormalOrder', backref='wheelchair', lazy=True)
-        temp_orders = db.relationship('TempOrder', backref='wheelchair', lazy=True)
-        
-        def to_dict(self):
-            """转换为字典格式"""
-            return {
-                'id': self.id,
-                'name': self.name,
-                'description': self.description,
-                'price': self.price,
-                'stock': self.stock,
-                'manufacturer': self.manufacturer,
-                'is_offline': self.is_offline,
-                'is_deleted': self.is_deleted
-            }
-        
-        def is_available(self):
-            """检查轮椅是否可用（未下架、未删除、有库存）"""
-            return not self.is_offline and not self.is_deleted and self.stock > 0
-        
-        def reduce_stock(self, quantity=1):
-            """减少库存"""
-            if self.stock >= quantity:
-                self.stock -= quantity
-                return True
-            return False
-        
-        def increase_stock(self, quantity=1):
-            """增加库存"""
-            self.stock += quantity
-        
-        def set_offline(self):
-            """设置为下架状态"""
-            self.is_offline = True
-        
-        def set_online(self):
-            """设置为上架状态"""
-            self.is_offline = False
-        
-        def soft_delete(self):
-            """逻辑删除"""
-            self.is_deleted = True
-    
-    return WheelchairModel
+    @classmethod
+    def batch_operate(cls, wheelchair_ids, action, chunk_size=None):
+        """批量上架/下架/删除轮椅
+
+        每块ID执行一条 UPDATE ... WHERE id IN (...)，条件中排除状态已符合的轮椅，
+        受影响行数即实际变更的数量。本方法不提交事务，由调用方统一提交或回滚。
+
+        Args:
+            wheelchair_ids: 轮椅ID列表（重复ID只计一次）
+            action: online、offline 或 delete
+            chunk_size: 每条UPDATE语句包含的ID数，默认 BATCH_CHUNK_SIZE
+
+        Returns:
+            dict: requested（去重后的ID数）、affected（实际变更数）、chunks（执行的语句数）
+        """
+        if action not in cls.VALID_BATCH_ACTIONS:
+            raise ValueError(f'无效的批量操作类型: {action}')
+
+        WheelchairModel = get_wheelchair_model()
+        if action == cls.BATCH_ONLINE:
+            conditions = [WheelchairModel.is_deleted == False, WheelchairModel.is_offline == True]
+            values = {'is_offline': False}
+        elif action == cls.BATCH_OFFLINE:
+            conditions = [WheelchairModel.is_deleted == False, WheelchairModel.is_offline == False]
+            values = {'is_offline': True}
+        else:
+            conditions = [WheelchairModel.is_deleted == False]
+            values = {'is_deleted': True}
+
+        ids = list(dict.fromkeys(wheelchair_ids))
+        chunk_size = chunk_size or cls.BATCH_CHUNK_SIZE
+        session = get_db().session
+        affected = 0
+        chunks = 0
+        for start in range(0, len(ids), chunk_size):
+            result = session.execute(
+                update(WheelchairModel)
+                .where(WheelchairModel.id.in_(ids[start:start + chunk_size]), *conditions)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            affected += result.rowcount
+            chunks += 1
 
-# 为了向后兼容，创建一个别名
-Wheelchair = get_wheelchair_model
\ No newline at end of file
+        if chunks:
+            # 未同步会话中已加载的对象，使其在下次访问时重新读取
+            session.expire_all()
+        return {'requested': len(ids), 'affected': affected, 'chunks': chunks}
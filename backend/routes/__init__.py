@@ -8,4 +8,4 @@
 from .client_api import client_bp
 from .admin_api import admin_bp
 
-__all__ = ['client_bp', 'admin_
\ No newline at end of file
+__all__ = ['client_bp', 'admin_bp']
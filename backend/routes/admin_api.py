@@ -6,33 +6,62 @@
 """
 
 from functools import wraps
+from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
 from models.user import AdminUser
 from models.wheelchair import Wheelchair
 from models.order import FormalOrder
 from models.log import OperationLog
+from models.stats import get_dashboard_statistics
 from utils.validators import validate_required_fields
 from utils.response import success_response, error_response
+from utils.cache import get_catalogue_cache, get_principal_cache
+from utils.password import PasswordHasherBusy
+from utils.stats import VALID_BUCKETS
+from utils.export import VALID_EXPORT_FORMATS, export_response, stream_query
+from utils.importer import VALID_IMPORT_FORMATS, InventoryImporter, iter_import_rows
+from utils.replica import read_replica
+from utils.log_writer import get_operation_log_writer
 
 # 创建蓝图
 admin_bp = Blueprint('admin_api', __name__)
 
+def get_current_principal():
+    """获取当前JWT身份对应的管理用户（id、role）
+    
+    优先读取身份缓存，未命中时查询数据库并写入缓存
+    
+    Returns:
+        dict: {'id', 'role'}，用户不存在或已删除时返回None
+    
+    Raises:
+        ValueError: JWT identity 不是有效的用户ID
+    """
+    # JWT identity是字符串，需要转换为整数
+    user_id = int(get_jwt_identity())
+    cache = get_principal_cache()
+    principal = cache.get(user_id)
+    if principal is None:
+        user = AdminUser.get_by_id(user_id)
+        if not user:
+            return None
+        principal = {'id': user.id, 'role': user.role}
+        cache.set(user_id, principal)
+    return principal
+
 # 权限装饰器
 def admin_required(f):
     """管理员权限装饰器"""
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        # JWT identity是字符串，需要转换为整数
         try:
-            user_id = int(current_user_id)
-            user = AdminUser.get_by_id(user_id)
+            principal = get_current_principal()
         except (ValueError, TypeError):
             return error_response('无效的用户令牌', 401)
         
-        if not user or not user.is_admin():
+        if not principal or principal['role'] != AdminUser.ROLE_ADMIN:
             return error_response('需要管理员权限', 403)
         
         return f(*args, **kwargs)
@@ -43,15 +72,12 @@ def operator_required(f):
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        # JWT identity是字符串，需要转换为整数
         try:
-            user_id = int(current_user_id)
-            user = AdminUser.get_by_id(user_id)
+            principal = get_current_principal()
         except (ValueError, TypeError):
             return error_response('无效的用户令牌', 401)
         
-        if not user or not (user.is_admin() or user.is_operator()):
+        if not principal or principal['role'] not in AdminUser.VALID_ROLES:
             return error_response('需要操作员权限', 403)
         
         return f(*args, **kwargs)
@@ -94,6 +120,8 @@ def admin_login():
             }
         })
         
+    except PasswordHasherBusy as e:
+        return error_response(str(e), 429)
     except Exception as e:
         return error_response(f'登录失败: {str(e)}', 500)
 
@@ -114,6 +142,7 @@ def admin_logout():
 
 @admin_bp.route('/inventory/list', methods=['GET'])
 @operator_required
+@read_replica
 def get_inventory_list():
     """获取库存列表"""
     try:
@@ -122,6 +151,7 @@ def get_inventory_list():
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 10))
         include_offline = request.args.get('include_offline', 'false').lower() == 'true'
+        count_mode = request.args.get('count', 'exact')
         
         # 参数验证
         if page < 1:
@@ -134,7 +164,8 @@ def get_inventory_list():
             keyword=keyword if keyword else None,
             page=page,
             limit=limit,
-            include_offline=include_offline
+            include_offline=include_offline,
+            count_mode=count_mode
         )
         
         # 转换为字典格式
@@ -219,6 +250,7 @@ def save_wheelchair():
             message = '轮椅添加成功'
         
         db.session.commit()
+        get_catalogue_cache().invalidate(wheelchair.id)
         
         # 记录操作日志
         OperationLog.log_operation(user_id, operation_type, wheelchair.id)
@@ -235,6 +267,48 @@ def save_wheelchair():
         db.session.rollback()
         return error_response(f'保存轮椅失败: {str(e)}', 500)
 
+@admin_bp.route('/inventory/import', methods=['POST'])
+@operator_required
+def import_inventory():
+    """批量导入轮椅（CSV 或 NDJSON）
+    
+    请求体为文件内容，或以 multipart 表单的 file 字段上传；带 id 的行更新已有轮椅，
+    不带 id 的行新增轮椅。返回导入结果和逐行错误报告。
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        import_format = request.args.get('format', '').strip().lower()
+        batch_size = int(request.args.get('batch_size', 500))
+        
+        upload = request.files.get('file')
+        if not import_format:
+            filename = upload.filename if upload else ''
+            content_type = upload.mimetype if upload else request.mimetype
+            is_ndjson = filename.endswith(('.ndjson', '.jsonl')) or content_type in (
+                'application/x-ndjson', 'application/jsonl'
+            )
+            import_format = 'ndjson' if is_ndjson else 'csv'
+        
+        if import_format not in VALID_IMPORT_FORMATS:
+            return error_response('无效的导入格式', 400)
+        if batch_size < 1 or batch_size > 5000:
+            batch_size = 500
+        
+        importer = InventoryImporter(user_id, batch_size=batch_size)
+        report = importer.run(iter_import_rows(upload.stream if upload else request.stream, import_format))
+        
+        if report['inserted'] or report['updated']:
+            get_catalogue_cache().invalidate()
+        
+        return success_response(report, f"导入完成：新增 {report['inserted']} 条，更新 {report['updated']} 条，失败 {report['failed']} 条")
+        
+    except ValueError as e:
+        return error_response(f'参数错误: {str(e)}', 400)
+    except Exception as e:
+        from app import db
+        db.session.rollback()
+        return error_response(f'批量导入失败: {str(e)}', 500)
+
 @admin_bp.route('/inventory/operate', methods=['POST'])
 @operator_required
 def operate_wheelchair():
@@ -251,7 +325,8 @@ def operate_wheelchair():
         if action:
             operate_type = action
         
-        # 处理批量状态更新
+        # 处理批量操作：status 可以是 online/offline/delete，也可以是管理端的
+        # available/maintenance/discontinued
         if operate_type == 'batch_status':
             ids = data.get('ids', [])
             status = data.get('status')
@@ -259,23 +334,32 @@ def operate_wheelchair():
             if not ids or not status:
                 return error_response('批量操作需要提供ids和status', 400)
             
-            from app import db
-            updated_count = 0
-            
-            for wheelchair_id in ids:
-                wheelchair = Wheelchair.get_by_id(wheelchair_id)
-                if wheelchair:
-                    wheelchair.status = status
-                    updated_count += 1
+            batch_action = Wheelchair.BATCH_STATUS_ACTIONS.get(status, status)
+            if batch_action not in Wheelchair.VALID_BATCH_ACTIONS:
+                return error_response('无效的批量操作类型', 400)
+            if not isinstance(ids, list) or len(ids) > Wheelchair.BATCH_MAX_IDS:
+                return error_response(f'ids必须是不超过{Wheelchair.BATCH_MAX_IDS}个的列表', 400)
+            try:
+                ids = [int(wheelchair_id) for wheelchair_id in ids]
+            except (ValueError, TypeError):
+                return error_response('ids格式不正确', 400)
             
+            from app import db
+            result = Wheelchair.batch_operate(ids, batch_action)
+            if result['affected']:
+                # 整批只写一条汇总日志
+                db.session.add(OperationLog.batch_summary(int(current_user_id), batch_action, result))
             db.session.commit()
             
-            # 记录操作日志
-            OperationLog.log_operation(current_user_id, OperationLog.TYPE_UPDATE_WHEELCHAIR)
+            if result['affected']:
+                get_catalogue_cache().invalidate()
             
             return success_response({
-                'message': f'成功更新 {updated_count} 个轮椅状态',
-                'updated_count': updated_count
+                'message': f"成功更新 {result['affected']} 个轮椅状态",
+                'action': batch_action,
+                'requested_count': result['requested'],
+                'updated_count': result['affected'],
+                'unchanged_count': result['requested'] - result['affected']
             })
         
         # 单个轮椅操作
@@ -307,6 +391,7 @@ def operate_wheelchair():
             return error_response('无效的操作类型', 400)
         
         db.session.commit()
+        get_catalogue_cache().invalidate(wheelchair.id)
         
         # 记录操作日志
         OperationLog.log_operation(current_user_id, log_type, wheelchair.id)
@@ -323,6 +408,7 @@ def operate_wheelchair():
 
 @admin_bp.route('/order/list', methods=['GET'])
 @operator_required
+@read_replica
 def get_order_list():
     """获取订单列表"""
     try:
@@ -330,6 +416,7 @@ def get_order_list():
         status = request.args.get('status', '').strip()
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 10))
+        count_mode = request.args.get('count', 'exact')
         
         # 参数验证
         if page < 1:
@@ -337,11 +424,26 @@ def get_order_list():
         if limit < 1 or limit > 50:
             limit = 10
         
+        # 游标分页模式（传入cursor参数时启用，空值表示第一页）
+        if 'cursor' in request.args:
+            orders, next_cursor = FormalOrder.get_by_cursor(
+                cursor=request.args.get('cursor') or None,
+                limit=limit,
+                status_filter=status if status else None
+            )
+            return success_response({
+                'list': [order.to_dict() for order in orders],
+                'limit': limit,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
+            })
+        
         # 获取订单列表
         orders, total = FormalOrder.get_all(
             page=page,
             limit=limit,
-            status_filter=status if status else None
+            status_filter=status if status else None,
+            count_mode=count_mode
         )
         
         # 转换为字典格式
@@ -360,11 +462,45 @@ def get_order_list():
     except Exception as e:
         return error_response(f'获取订单列表失败: {str(e)}', 500)
 
+@admin_bp.route('/order/export', methods=['GET'])
+@operator_required
+def export_orders():
+    """流式导出订单（CSV 或 NDJSON）"""
+    try:
+        export_format = request.args.get('format', 'csv').strip().lower()
+        status = request.args.get('status', '').strip()
+        start_date = request.args.get('start_date', '').strip()
+        end_date = request.args.get('end_date', '').strip()
+        
+        if export_format not in VALID_EXPORT_FORMATS:
+            return error_response('无效的导出格式', 400)
+        
+        orders = FormalOrder.iter_export(
+            status_filter=status if status else None,
+            start_date=datetime.strptime(start_date, '%Y-%m-%d') if start_date else None,
+            end_date=datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+        )
+        fields = ['id', 'order_no', 'user_name', 'user_phone', 'user_address',
+                  'wheelchair_id', 'wheelchair_name', 'deposit', 'status', 'create_time']
+        rows = (order.to_dict() for order in orders)
+        return export_response(rows, fields, export_format, 'orders')
+        
+    except ValueError as e:
+        return error_response(f'参数错误: {str(e)}', 400)
+    except Exception as e:
+        return error_response(f'导出订单失败: {str(e)}', 500)
+
 @admin_bp.route('/order/update/status', methods=['POST'])
 @operator_required
 def update_order_status():
-    """更新订单状态"""
+    """更新订单状态
+    
+    状态转换与批量接口一样按 FormalOrder.TRANSITIONS 校验（已完成、已取消为终态，
+    不能再变更），不允许的转换返回400。
+    """
     try:
+        from app import db
+        
         data = request.get_json()
         current_user_id = get_jwt_identity()
         
@@ -378,7 +514,7 @@ def update_order_status():
         new_status = data['new_status']
         
         # 获取订单
-        order = FormalOrder.query.get(order_id)
+        order = db.session.get(FormalOrder, order_id)
         if not order:
             return error_response('订单不存在', 404)
         
@@ -387,16 +523,16 @@ def update_order_status():
         if not success:
             return error_response(message, 400)
         
-        from app import db
-        
-        # 如果订单被取消，需要恢复库存
-        if new_status == FormalOrder.STATUS_CANCELLED:
-            wheelchair = Wheelchair.get_by_id(order.wheelchair_id)
-            if wheelchair:
-                wheelchair.increase_stock(1)
+        # 如果订单被取消，需要恢复库存（状态机保证已取消的订单不会再次取消）
+        restored = new_status == FormalOrder.STATUS_CANCELLED
+        if restored:
+            Wheelchair.restore_stock(order.wheelchair_id, 1)
         
         db.session.commit()
         
+        if restored:
+            get_catalogue_cache().invalidate(order.wheelchair_id)
+        
         # 记录操作日志
         OperationLog.log_operation(current_user_id, OperationLog.TYPE_UPDATE_ORDER_STATUS, order.id)
         
@@ -410,8 +546,219 @@ def update_order_status():
         db.session.rollback()
         return error_response(f'更新订单状态失败: {str(e)}', 500)
 
+@admin_bp.route('/order/batch/status', methods=['POST'])
+@operator_required
+def batch_update_order_status():
+    """批量更新订单状态
+    
+    请求体: order_ids（订单ID列表）、new_status（目标状态）、skip_invalid（可选）。
+    状态转换按状态机校验；默认存在不存在或不可转换的订单时整批不修改并返回错误列表，
+    skip_invalid 为 true 时只转换可转换的订单。所有修改在一个事务中提交。
+    """
+    try:
+        data = request.get_json() or {}
+        current_user_id = int(get_jwt_identity())
+        
+        order_ids = data.get('order_ids')
+        new_status = data.get('new_status')
+        skip_invalid = bool(data.get('skip_invalid', False))
+        
+        if not order_ids or not new_status:
+            return error_response('批量操作需要提供order_ids和new_status', 400)
+        if new_status not in FormalOrder.VALID_STATUSES:
+            return error_response(f'无效的订单状态: {new_status}', 400)
+        if not isinstance(order_ids, list) or len(order_ids) > FormalOrder.BULK_MAX_ORDERS:
+            return error_response(f'order_ids必须是不超过{FormalOrder.BULK_MAX_ORDERS}个的列表', 400)
+        try:
+            order_ids = [int(order_id) for order_id in order_ids]
+        except (ValueError, TypeError):
+            return error_response('order_ids格式不正确', 400)
+        
+        from app import db
+        # 同步模式下状态变更日志与状态修改同一事务写入；开启异步写入时提交后再入队
+        # （与单个订单接口一致），回滚的批次不会留下日志
+        writer = get_operation_log_writer()
+        result = FormalOrder.bulk_transition(
+            order_ids, new_status, operator_id=current_user_id if writer is None else None,
+            skip_invalid=skip_invalid
+        )
+        if result['errors'] and not skip_invalid:
+            db.session.rollback()
+            return error_response(
+                f"{len(result['errors'])} 个订单不能变更为 {new_status}，未做任何修改", 400,
+                data={'errors': result['errors']}
+            )
+        
+        db.session.commit()
+        
+        if writer is not None:
+            for order_id in result['updated_ids']:
+                writer.submit(current_user_id, OperationLog.TYPE_UPDATE_ORDER_STATUS, order_id)
+        
+        if result['restored_stock']:
+            get_catalogue_cache().invalidate()
+        
+        return success_response({
+            'message': f"成功更新 {result['updated']} 个订单状态",
+            'updated_count': result['updated'],
+            'skipped_count': len(result['errors']),
+            'errors': result['errors'],
+            'restored_stock': [
+                {'wheelchair_id': wheelchair_id, 'quantity': quantity}
+                for wheelchair_id, quantity in result['restored_stock'].items()
+            ]
+        })
+        
+    except Exception as e:
+        from app import db
+        db.session.rollback()
+        return error_response(f'批量更新订单状态失败: {str(e)}', 500)
+
+@admin_bp.route('/log/list', methods=['GET'])
+@operator_required
+@read_replica
+def get_log_list():
+    """获取操作日志列表"""
+    try:
+        # 获取查询参数
+        page = int(request.args.get('page', 1))
+        limit = int(request.args.get('limit', 20))
+        count_mode = request.args.get('count', 'exact')
+        operator_id = request.args.get('operator_id', type=int)
+        operate_type = request.args.get('operate_type', '').strip()
+        start_date = request.args.get('start_date', '').strip()
+        end_date = request.args.get('end_date', '').strip()
+        
+        # 参数验证
+        if page < 1:
+            page = 1
+        if limit < 1 or limit > 100:
+            limit = 20
+        
+        filters = {
+            'operator_id': operator_id,
+            'operate_type': operate_type if operate_type else None,
+            'start_date': datetime.strptime(start_date, '%Y-%m-%d') if start_date else None,
+            'end_date': datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+        }
+        
+        # 游标分页模式（传入cursor参数时启用，空值表示第一页）
+        if 'cursor' in request.args:
+            logs, next_cursor = OperationLog.get_logs_by_cursor(
+                cursor=request.args.get('cursor') or None,
+                limit=limit,
+                **filters
+            )
+            return success_response({
+                'list': [log.to_dict() for log in logs],
+                'limit': limit,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
+            })
+        
+        logs, total = OperationLog.get_logs(
+            page=page,
+            limit=limit,
+            count_mode=count_mode,
+            **filters
+        )
+        
+        return success_response({
+            'list': [log.to_dict() for log in logs],
+            'total': total,
+            'page': page,
+            'limit': limit,
+            'pages': (total + limit - 1) // limit
+        })
+        
+    except ValueError as e:
+        return error_response(f'参数错误: {str(e)}', 400)
+    except Exception as e:
+        return error_response(f'获取操作日志失败: {str(e)}', 500)
+
+@admin_bp.route('/log/export', methods=['GET'])
+@operator_required
+def export_logs():
+    """流式导出操作日志（CSV 或 NDJSON）"""
+    try:
+        export_format = request.args.get('format', 'csv').strip().lower()
+        operator_id = request.args.get('operator_id', type=int)
+        operate_type = request.args.get('operate_type', '').strip()
+        start_date = request.args.get('start_date', '').strip()
+        end_date = request.args.get('end_date', '').strip()
+        
+        if export_format not in VALID_EXPORT_FORMATS:
+            return error_response('无效的导出格式', 400)
+        
+        query = OperationLog.export_query(
+            operator_id=operator_id,
+            operate_type=operate_type if operate_type else None,
+            start_date=datetime.strptime(start_date, '%Y-%m-%d') if start_date else None,
+            end_date=datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+        )
+        fields = ['id', 'operator_id', 'operator_name', 'operator_role',
+                  'operate_type', 'target_id', 'operate_time']
+        rows = (log.to_dict() for log in stream_query(query))
+        return export_response(rows, fields, export_format, 'operation_logs')
+        
+    except ValueError as e:
+        return error_response(f'参数错误: {str(e)}', 400)
+    except Exception as e:
+        return error_response(f'导出操作日志失败: {str(e)}', 500)
+
+@admin_bp.route('/log/statistics', methods=['GET'])
+@operator_required
+@read_replica
+def get_log_statistics():
+    """获取操作日志统计（按操作类型、操作员，可选按小时/天分桶）"""
+    try:
+        start_date = request.args.get('start_date', '').strip()
+        end_date = request.args.get('end_date', '').strip()
+        bucket = request.args.get('bucket', '').strip() or None
+        
+        if bucket and bucket not in VALID_BUCKETS:
+            return error_response('无效的分桶粒度', 400)
+        
+        statistics = OperationLog.get_statistics(
+            start_date=datetime.strptime(start_date, '%Y-%m-%d') if start_date else None,
+            # 结束日期包含当天
+            end_date=datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) - timedelta(microseconds=1)
+            if end_date else None,
+            bucket=bucket
+        )
+        return success_response(statistics)
+        
+    except ValueError as e:
+        return error_response(f'参数错误: {str(e)}', 400)
+    except Exception as e:
+        return error_response(f'获取操作统计失败: {str(e)}', 500)
+
+@admin_bp.route('/stats', methods=['GET'])
+@admin_bp.route('/dashboard/stats', methods=['GET'])
+@operator_required
+@read_replica
+def get_dashboard_stats():
+    """获取仪表盘统计（读取每日汇总表）"""
+    try:
+        days = int(request.args.get('days', 30))
+        top = int(request.args.get('top', 10))
+        
+        # 参数验证
+        if days < 1 or days > 366:
+            days = 30
+        if top < 1 or top > 100:
+            top = 10
+        
+        return success_response(get_dashboard_statistics(days=days, top=top))
+        
+    except ValueError as e:
+        return error_response(f'参数错误: {str(e)}', 400)
+    except Exception as e:
+        return error_response(f'获取统计数据失败: {str(e)}', 500)
+
 @admin_bp.route('/user/list', methods=['GET'])
 @admin_required
+@read_replica
 def get_user_list():
     """获取用户列表（仅管理员）"""
     try:
@@ -419,6 +766,7 @@ def get_user_list():
         role = request.args.get('role', '').strip()
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 10))
+        count_mode = request.args.get('count', 'exact')
         
         # 参数验证
         if page < 1:
@@ -430,7 +778,8 @@ def get_user_list():
         users, total = AdminUser.get_all(
             page=page,
             limit=limit,
-            role_filter=role if role else None
+            role_filter=role if role else None,
+            count_mode=count_mode
         )
         
         # 转换为字典格式
@@ -488,7 +837,8 @@ def save_user():
                 return error_response('用户名已存在', 400)
             
             user.username = username
-            user.role = role
+            # 通过update_role修改角色，提交后失效该用户的身份缓存
+            user.update_role(role)
             
             # 如果提供了新密码，则更新密码
             if password:
@@ -521,6 +871,10 @@ def save_user():
             'user': user.to_dict()
         })
         
+    except PasswordHasherBusy as e:
+        from app import db
+        db.session.rollback()
+        return error_response(str(e), 429)
     except Exception as e:
         from app import db
         db.session.rollback()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+客户端只读接口的协程版本（ASGI 模式）
+路由、参数和响应格式与 client_api 中的同名接口相同，查询在异步数据库驱动上执行，
+等待数据库期间不占用线程；Redis 目录缓存的读写是阻塞调用，在线程池中执行
+"""
+
+import asyncio
+from flask import current_app, request
+from sqlalchemy import select
+from models import Wheelchair, FormalOrder, StockHold
+from utils.async_db import async_read_replica, async_session, reading_from_replica
+from utils.cache import get_catalogue_cache
+from utils.pagination import paginate_query_async
+from utils.response import success_response, error_response
+
+async def catalogue_cache():
+    """当前应用的目录缓存（首次创建时可能连接Redis，在线程池中执行）"""
+    cache = current_app.extensions.get('catalogue_cache')
+    if cache is None:
+        cache = await asyncio.to_thread(get_catalogue_cache)
+    return cache
+
+async def cache_call(store, method, *args):
+    """执行目录缓存操作：共享存储（Redis）在线程池中执行，进程内存储直接调用"""
+    if store.shared:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+def can_cache(cache):
+    """缓存刚失效时副本可能尚未复制到最新数据，副本结果不写入缓存"""
+    return not (cache.recently_invalidated() and reading_from_replica())
+
+@async_read_replica
+async def search_wheelchairs():
+    """轮椅搜索接口"""
+    try:
+        # 获取查询参数
+        keyword = request.args.get('keyword', '').strip()
+        sort_type = request.args.get('sort_type', '')
+        page = int(request.args.get('page', 1))
+        limit = int(request.args.get('limit', 10))
+        count_mode = request.args.get('count', 'exact')
+
+        # 参数验证
+        if page < 1:
+            page = 1
+        if limit < 1 or limit > 50:
+            limit = 10
+
+        # 优先读取目录缓存
+        cache = await catalogue_cache()
+        cached = await cache_call(
+            cache.search_cache, cache.get_search, keyword, sort_type, page, limit, count_mode
+        )
+        if cached is not None:
+            return success_response(cached)
+
+        # 搜索轮椅
+        query = Wheelchair.search_query(
+            keyword=keyword if keyword else None,
+            sort_type=sort_type if sort_type else None,
+            include_offline=False
+        )
+        async with async_session() as session:
+            wheelchairs, total = await paginate_query_async(session, query, page, limit, count_mode)
+
+        payload = {
+            'list': [wheelchair.to_dict() for wheelchair in wheelchairs],
+            'total': total,
+            'page': page,
+            'limit': limit,
+            'pages': (total + limit - 1) // limit
+        }
+        if can_cache(cache):
+            await cache_call(
+                cache.search_cache, cache.set_search, keyword, sort_type, page, limit, count_mode, payload
+            )
+
+        return success_response(payload)
+
+    except ValueError as e:
+        return error_response(f'参数错误: {str(e)}', 400)
+    except Exception as e:
+        return error_response(f'搜索失败: {str(e)}', 500)
+
+@async_read_replica
+async def get_wheelchair_detail(wheelchair_id):
+    """获取轮椅详情"""
+    try:
+        # 优先读取目录缓存
+        cache = await catalogue_cache()
+        cached = await cache_call(cache.detail_cache, cache.get_detail, wheelchair_id)
+        if cached is not None:
+            return success_response(cached)
+
+        async with async_session() as session:
+            wheelchair = (await session.execute(
+                Wheelchair.by_id_query(wheelchair_id).statement.limit(1)
+            )).scalars().first()
+
+            if not wheelchair:
+                return error_response('轮椅不存在', 404)
+
+            if wheelchair.is_deleted or wheelchair.is_offline:
+                return error_response('轮椅已下架', 404)
+
+            held = (await session.execute(select(StockHold.active_quantity(wheelchair.id)))).scalar()
+
+        wheelchair_data = wheelchair.to_dict()
+        wheelchair_data['available_stock'] = max(wheelchair.stock - held, 0)
+        if can_cache(cache):
+            await cache_call(cache.detail_cache, cache.set_detail, wheelchair_id, wheelchair_data)
+
+        return success_response(wheelchair_data)
+
+    except Exception as e:
+        return error_response(f'获取轮椅详情失败: {str(e)}', 500)
+
+@async_read_replica
+async def get_order_detail(order_no):
+    """获取订单详情（通过订单号）"""
+    try:
+        async with async_session() as session:
+            order = (await session.execute(
+                FormalOrder.order_no_query(order_no).statement.limit(1)
+            )).scalars().first()
+
+        if not order:
+            # 历史分区是本地SQLite文件，在线程池中读取
+            order = await asyncio.to_thread(FormalOrder.get_archived_by_order_no, order_no)
+
+        if not order:
+            return error_response('订单不存在', 404)
+
+        return success_response(order.to_dict())
+
+    except Exception as e:
+        return error_response(f'获取订单详情失败: {str(e)}', 500)
+
+# 以协程方式执行的接口（Flask 端点名 -> 协程函数），其余接口仍由 Flask 应用处理
+ASYNC_VIEWS = {
+    'client_api.search_wheelchairs': search_wheelchairs,
+    'client_api.get_wheelchair_detail': get_wheelchair_detail,
+    'client_api.get_order_detail': get_order_detail
+}
@@ -8,14 +8,17 @@
 import re
 from flask import Blueprint, request, jsonify
 from models.wheelchair import Wheelchair
-from models.order import TempOrder, FormalOrder
+from models.order import TempOrder, FormalOrder, StockHold
 from utils.validators import validate_phone, validate_required_fields
 from utils.response import success_response, error_response
+from utils.cache import get_catalogue_cache
+from utils.replica import read_replica, reading_from_replica
 
 # 创建蓝图
 client_bp = Blueprint('client_api', __name__)
 
 @client_bp.route('/wheelchair/search', methods=['GET'])
+@read_replica
 def search_wheelchairs():
     """轮椅搜索接口"""
     try:
@@ -24,6 +27,7 @@ def search_wheelchairs():
         sort_type = request.args.get('sort_type', '')
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 10))
+        count_mode = request.args.get('count', 'exact')
         
         # 参数验证
         if page < 1:
@@ -31,25 +35,37 @@ def search_wheelchairs():
         if limit < 1 or limit > 50:
             limit = 10
         
+        # 优先读取目录缓存
+        cache = get_catalogue_cache()
+        cached = cache.get_search(keyword, sort_type, page, limit, count_mode)
+        if cached is not None:
+            return success_response(cached)
+        
         # 搜索轮椅
         wheelchairs, total = Wheelchair.search(
             keyword=keyword if keyword else None,
             sort_type=sort_type if sort_type else None,
             page=page,
             limit=limit,
-            include_offline=False
+            include_offline=False,
+            count_mode=count_mode
         )
         
         # 转换为字典格式
         wheelchair_list = [wheelchair.to_dict() for wheelchair in wheelchairs]
         
-        return success_response({
+        payload = {
             'list': wheelchair_list,
             'total': total,
             'page': page,
             'limit': limit,
             'pages': (total + limit - 1) // limit
-        })
+        }
+        # 缓存刚失效时副本可能尚未复制到最新数据，副本结果不写入缓存
+        if not (cache.recently_invalidated() and reading_from_replica()):
+            cache.set_search(keyword, sort_type, page, limit, count_mode, payload)
+        
+        return success_response(payload)
         
     except ValueError as e:
         return error_response(f'参数错误: {str(e)}', 400)
@@ -57,9 +73,16 @@ def search_wheelchairs():
         return error_response(f'搜索失败: {str(e)}', 500)
 
 @client_bp.route('/wheelchair/detail/<int:wheelchair_id>', methods=['GET'])
+@read_replica
 def get_wheelchair_detail(wheelchair_id):
     """获取轮椅详情"""
     try:
+        # 优先读取目录缓存
+        cache = get_catalogue_cache()
+        cached = cache.get_detail(wheelchair_id)
+        if cached is not None:
+            return success_response(cached)
+        
         wheelchair = Wheelchair.get_by_id(wheelchair_id)
         
         if not wheelchair:
@@ -68,7 +91,14 @@ def get_wheelchair_detail(wheelchair_id):
         if wheelchair.is_deleted or wheelchair.is_offline:
             return error_response('轮椅已下架', 404)
         
-        return success_response(wheelchair.to_dict())
+        wheelchair_data = wheelchair.to_dict()
+        wheelchair_data['available_stock'] = max(
+            wheelchair.stock - StockHold.get_active_quantity(wheelchair.id), 0
+        )
+        if not (cache.recently_invalidated() and reading_from_replica()):
+            cache.set_detail(wheelchair_id, wheelchair_data)
+        
+        return success_response(wheelchair_data)
         
     except Exception as e:
         return error_response(f'获取轮椅详情失败: {str(e)}', 500)
@@ -106,9 +136,6 @@ def create_temp_order():
         if not wheelchair:
             return error_response('轮椅不存在或已下架', 404)
         
-        if wheelchair.stock <= 0:
-            return error_response('轮椅库存不足', 400)
-        
         # 创建临时订单
         temp_order = TempOrder(
             user_name=user_name,
@@ -119,8 +146,17 @@ def create_temp_order():
         
         from app import db
         db.session.add(temp_order)
+        
+        # 预占一件库存，预订单过期后自动释放
+        if not StockHold.hold(temp_order, 1):
+            db.session.rollback()
+            return error_response('轮椅库存不足', 400)
+        
         db.session.commit()
         
+        # 预占改变了可用库存，失效该轮椅详情缓存
+        get_catalogue_cache().invalidate(wheelchair.id, search=False)
+        
         return success_response({
             'pre_order_id': temp_order.id,
             'expire_time': temp_order.get_expire_time().strftime('%Y-%m-%d %H:%M:%S'),
@@ -158,13 +194,22 @@ def submit_order():
         if not wheelchair:
             return error_response('轮椅不存在或已下架', 404)
         
-        if wheelchair.stock <= 0:
-            return error_response('轮椅库存不足', 400)
-        
         # 开始事务处理
         from app import db
         
         try:
+            # 删除临时订单（以受影响行数判断，防止同一预订单被重复提交）
+            deleted = TempOrder.query.filter(TempOrder.id == pre_order_id).delete()
+            if deleted != 1:
+                db.session.rollback()
+                return error_response('预订单已提交，请勿重复支付', 400)
+            
+            # 释放预订单的库存预占，转为真实扣减；库存不足时整体回滚
+            StockHold.release(pre_order_id)
+            if not Wheelchair.reserve_stock(temp_order.wheelchair_id, 1):
+                db.session.rollback()
+                return error_response('轮椅库存不足', 400)
+            
             # 创建正式订单
             formal_order = FormalOrder(
                 user_name=temp_order.user_name,
@@ -174,18 +219,15 @@ def submit_order():
                 deposit=wheelchair.price  # 定金等于租赁价格
             )
             
-            # 减少库存
-            wheelchair.reduce_stock(1)
-            
             # 保存正式订单
             db.session.add(formal_order)
             
-            # 删除临时订单
-            db.session.delete(temp_order)
-            
             # 提交事务
             db.session.commit()
             
+            # 库存已变更，失效目录缓存
+            get_catalogue_cache().invalidate(temp_order.wheelchair_id)
+            
             return success_response({
                 'order_no': formal_order.order_no,
                 'order_id': formal_order.id,
@@ -201,10 +243,11 @@ def submit_order():
         return error_response(f'提交订单失败: {str(e)}', 500)
 
 @client_bp.route('/order/detail/<order_no>', methods=['GET'])
+@read_replica
 def get_order_detail(order_no):
     """获取订单详情（通过订单号）"""
     try:
-        order = FormalOrder.query.filter_by(order_no=order_no).first()
+        order = FormalOrder.get_by_order_no(order_no)
         
         if not order:
             return error_response('订单不存在', 404)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+管理端身份缓存测试
+"""
+
+from flask_jwt_extended import create_access_token
+from models import db, AdminUser
+from test_query_count import count_queries
+
+def create_operator(app):
+    with app.app_context():
+        user = AdminUser(username='operator', password='123456', role=AdminUser.ROLE_OPERATOR)
+        db.session.add(user)
+        db.session.commit()
+        return user.id, {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+def test_repeated_admin_requests_skip_user_lookup(app, client, admin_headers):
+    client.get('/api/admin/user/list', headers=admin_headers)
+
+    with count_queries(app) as statements:
+        response = client.get('/api/admin/user/list', headers=admin_headers)
+
+    assert response.status_code == 200
+    assert not any('FROM admin_user' in s and 'admin_user.id = ?' in s for s in statements)
+
+def test_role_change_invalidates_cached_principal(app, client, admin_headers):
+    user_id, headers = create_operator(app)
+    assert client.get('/api/admin/order/list', headers=headers).status_code == 200
+    assert client.get('/api/admin/user/list', headers=headers).status_code == 403
+
+    response = client.post('/api/admin/user/save', headers=admin_headers, json={
+        'id': user_id, 'username': 'operator', 'role': AdminUser.ROLE_ADMIN
+    })
+    assert response.status_code == 200
+    assert client.get('/api/admin/user/list', headers=headers).status_code == 200
+
+def test_soft_delete_invalidates_cached_principal(app, client):
+    user_id, headers = create_operator(app)
+    assert client.get('/api/admin/order/list', headers=headers).status_code == 200
+
+    with app.app_context():
+        AdminUser.get_by_id(user_id).soft_delete()
+        db.session.commit()
+
+    assert client.get('/api/admin/order/list', headers=headers).status_code == 403
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+应用入口测试：WSGI服务器直接加载 app 模块时的路由和后台任务
+"""
+
+from datetime import datetime, timedelta
+from utils.sweeper import start_on_first_request
+
+def test_blueprints_registered_on_import():
+    from app import app
+
+    rules = {rule.rule for rule in app.url_map.iter_rules()}
+    assert '/api/wheelchair/search' in rules
+    assert '/api/admin/login' in rules
+    assert '/health' in rules
+
+def test_background_workers_start_on_first_request(app, client):
+    started = []
+    start_on_first_request(app, started.append)
+
+    client.get('/api/wheelchair/search')
+    client.get('/api/wheelchair/search')
+    assert started == [app]
+
+def test_app_simple_sweeps_expired_pre_orders():
+    from app_simple import app, db, TempOrder
+
+    with app.app_context():
+        expired = TempOrder('测试用户', '13800138000', '测试地址', 1)
+        expired.create_time = datetime.now() - timedelta(minutes=31)
+        fresh = TempOrder('测试用户', '13800138000', '测试地址', 1)
+        db.session.add_all([expired, fresh])
+        db.session.commit()
+        expired_id, fresh_id = expired.id, fresh.id
+
+    result = app.test_cli_runner().invoke(args=['sweep-temp-orders'])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        assert db.session.get(TempOrder, expired_id) is None
+        assert db.session.get(TempOrder, fresh_id) is not None
+        db.session.delete(db.session.get(TempOrder, fresh_id))
+        db.session.commit()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASGI 模式测试
+"""
+
+import asyncio
+import json
+from urllib.parse import quote
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('asgiref')
+
+from models import db, Wheelchair
+from routes.async_client_api import ASYNC_VIEWS
+from utils.asgi import AsgiApplication
+from utils.async_db import dispose_async_engines
+
+async def asgi_request(application, method, path, query_string='', body=None):
+    """直接调用ASGI应用，返回 (状态码, 响应头, JSON)"""
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'root_path': '',
+        'query_string': query_string.encode('latin-1'),
+        'headers': [(b'host', b'testserver'), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(payload)).encode('latin-1'))],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 12345)
+    }
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    start = next(message for message in sent if message['type'] == 'http.response.start')
+    content = b''.join(message.get('body', b'') for message in sent if message['type'] == 'http.response.body')
+    return start['status'], dict(start['headers']), json.loads(content)
+
+def run_requests(app, requests):
+    """在同一事件循环中依次发出请求，结束后关闭异步引擎"""
+    application = AsgiApplication(app, ASYNC_VIEWS)
+
+    async def scenario():
+        try:
+            return [await asgi_request(application, *request) for request in requests]
+        finally:
+            await dispose_async_engines(app)
+
+    return asyncio.run(scenario())
+
+@pytest.fixture
+def asgi_app(app):
+    # 关闭目录缓存，确保协程接口实际执行查询
+    app.config['CATALOGUE_CACHE_SIZE'] = 0
+    return app
+
+def seed_wheelchairs(app):
+    with app.app_context():
+        for i in range(12):
+            db.session.add(Wheelchair(
+                name=f'电动轮椅{i}', price=100.0 + i, description=f'轻便折叠{i}', stock=5,
+                manufacturer='测试厂商', is_offline=(i == 3)
+            ))
+        db.session.commit()
+        return [row[0] for row in db.session.query(Wheelchair.id).order_by(Wheelchair.id)]
+
+def test_async_views_match_sync_responses(asgi_app, client):
+    ids = seed_wheelchairs(asgi_app)
+    response = client.post('/api/order/precreate', json={
+        'name': '测试用户', 'phone': '13800138000', 'address': '测试地址', 'wheelchair_id': ids[0]
+    })
+    response = client.post('/api/order/submit', json={'pre_order_id': response.get_json()['data']['pre_order_id']})
+    order_no = response.get_json()['data']['order_no']
+
+    paths = [
+        ('/api/wheelchair/search', 'page=2&limit=5'),
+        ('/api/wheelchair/search', f"keyword={quote('电动轮椅1')}&sort_type=price_desc"),
+        ('/api/wheelchair/search', 'page=9&count=none'),
+        ('/api/wheelchair/search', 'page=abc'),
+        (f'/api/wheelchair/detail/{ids[0]}', ''),
+        (f'/api/wheelchair/detail/{ids[3]}', ''),
+        ('/api/wheelchair/detail/999999', ''),
+        (f'/api/order/detail/{order_no}', ''),
+        ('/api/order/detail/WR20240101000000NOTFOUND', '')
+    ]
+    results = run_requests(asgi_app, [('GET', path, query) for path, query in paths])
+    for (path, query), (status, headers, body) in zip(paths, results):
+        expected = client.get(f'{path}?{query}')
+        assert status == expected.status_code, path
+        assert body == expected.get_json(), path
+        assert headers[b'content-type'] == b'application/json'
+
+    # 详情接口扣除了预占库存后的可用库存
+    assert results[4][2]['data']['available_stock'] == 4
+    assert results[7][2]['data']['order_no'] == order_no
+
+def test_other_endpoints_fall_back_to_flask(asgi_app):
+    ids = seed_wheelchairs(asgi_app)
+    precreate = ('POST', '/api/order/precreate', '', {
+        'name': '测试用户', 'phone': '13800138000', 'address': '测试地址', 'wheelchair_id': ids[0]
+    })
+    (status, _, body), = run_requests(asgi_app, [precreate])
+    assert status == 200
+    assert body['data']['pre_order_id']
+
+    (status, _, body), = run_requests(asgi_app, [('GET', '/api/admin/order/list', '')])
+    assert status == 401
+
+def test_async_views_read_through_shared_cache(asgi_app):
+    import fakeredis
+    from utils.cache import get_catalogue_cache
+
+    asgi_app.config.update(CACHE_BACKEND='redis', CATALOGUE_CACHE_SIZE=16)
+    asgi_app.extensions['cache_redis_client'] = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+    ids = seed_wheelchairs(asgi_app)
+    try:
+        results = run_requests(asgi_app, [('GET', f'/api/wheelchair/detail/{ids[0]}', '')] * 2)
+        assert results[0][2] == results[1][2]
+        with asgi_app.app_context():
+            stats = get_catalogue_cache().stats()['detail']
+        assert (stats['backend'], stats['hits'], stats['misses']) == ('redis', 1, 1)
+    finally:
+        asgi_app.extensions['cache_invalidation_bus'].stop()
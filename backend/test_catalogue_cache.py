@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轮椅目录读缓存测试
+"""
+
+from models import db, Wheelchair
+from utils.cache import MemoryCache, get_catalogue_cache
+
+def add_wheelchair(app, stock=3):
+    with app.app_context():
+        wheelchair = Wheelchair(name='缓存测试轮椅', price=100.0, stock=stock)
+        db.session.add(wheelchair)
+        db.session.commit()
+        return wheelchair.id
+
+def test_memory_cache_lru_and_ttl():
+    cache = MemoryCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    cache.set('d', 4, ttl=-1)
+    assert cache.get('d') is None
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+
+def test_search_and_detail_are_served_from_cache(app, client):
+    wheelchair_id = add_wheelchair(app)
+
+    client.get('/api/wheelchair/search')
+    client.get('/api/wheelchair/search')
+    client.get(f'/api/wheelchair/detail/{wheelchair_id}')
+    client.get(f'/api/wheelchair/detail/{wheelchair_id}')
+
+    stats = get_catalogue_cache(app).stats()
+    assert stats['search']['hits'] == 1
+    assert stats['search']['misses'] == 1
+    assert stats['detail']['hits'] == 1
+
+def test_admin_write_invalidates_cache(app, client, admin_headers):
+    wheelchair_id = add_wheelchair(app)
+    assert client.get('/api/wheelchair/search').get_json()['data']['list'][0]['stock'] == 3
+
+    client.post('/api/admin/inventory/save', headers=admin_headers, json={
+        'id': wheelchair_id, 'name': '缓存测试轮椅', 'price': 100.0, 'stock': 8
+    })
+
+    assert client.get('/api/wheelchair/search').get_json()['data']['list'][0]['stock'] == 8
+    assert client.get(f'/api/wheelchair/detail/{wheelchair_id}').get_json()['data']['stock'] == 8
+
+def test_order_submit_invalidates_cache(app, client):
+    wheelchair_id = add_wheelchair(app)
+    assert client.get(f'/api/wheelchair/detail/{wheelchair_id}').get_json()['data']['available_stock'] == 3
+
+    pre_order_id = client.post('/api/order/precreate', json={
+        'name': '测试用户', 'phone': '13800138000', 'address': '测试地址', 'wheelchair_id': wheelchair_id
+    }).get_json()['data']['pre_order_id']
+    assert client.get(f'/api/wheelchair/detail/{wheelchair_id}').get_json()['data']['available_stock'] == 2
+
+    client.post('/api/order/submit', json={'pre_order_id': pre_order_id})
+    detail = client.get(f'/api/wheelchair/detail/{wheelchair_id}').get_json()['data']
+    assert detail['stock'] == 2
+    assert detail['available_stock'] == 2
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每日汇总与仪表盘统计测试
+"""
+
+from models import db, FormalOrder, DailyOrderStat, DailyWheelchairStat
+from test_order_submit import create_wheelchair, precreate
+from test_query_count import count_queries
+
+def place_order(client, wheelchair_id):
+    pre_order_id = precreate(client, wheelchair_id)
+    response = client.post('/api/order/submit', json={'pre_order_id': pre_order_id})
+    assert response.status_code == 200
+    return response.get_json()['data']['order_id']
+
+def rollup_snapshot(app):
+    with app.app_context():
+        orders = {
+            (row.stat_date, row.status): (row.order_count, round(row.deposit_total, 2))
+            for row in DailyOrderStat.query if row.order_count
+        }
+        wheelchairs = {
+            (row.stat_date, row.wheelchair_id): (row.rental_count, row.cancel_count)
+            for row in DailyWheelchairStat.query if row.rental_count or row.cancel_count
+        }
+        return orders, wheelchairs
+
+def test_rollups_track_orders_and_match_rebuild(app, client, admin_headers):
+    wheelchair_id = create_wheelchair(app, stock=5)
+    order_ids = [place_order(client, wheelchair_id) for _ in range(3)]
+
+    response = client.post('/api/admin/order/update/status', headers=admin_headers, json={
+        'order_id': order_ids[0], 'new_status': FormalOrder.STATUS_CANCELLED
+    })
+    assert response.status_code == 200
+    response = client.post('/api/admin/order/update/status', headers=admin_headers, json={
+        'order_id': order_ids[1], 'new_status': FormalOrder.STATUS_DELIVERING
+    })
+    assert response.status_code == 200
+
+    incremental = rollup_snapshot(app)
+    orders, wheelchairs = incremental
+    assert sum(count for count, _ in orders.values()) == 3
+    assert list(wheelchairs.values()) == [(3, 1)]
+    with app.app_context():
+        # 初始库存5，下单扣减3，取消恢复1
+        assert db.session.query(db.func.sum(DailyWheelchairStat.stock_change)).scalar() == 3
+
+    # 增量维护的结果与按订单全量重建一致
+    with app.app_context():
+        DailyOrderStat.rebuild()
+        DailyWheelchairStat.rebuild()
+        db.session.commit()
+    assert rollup_snapshot(app) == incremental
+
+def test_dashboard_stats_endpoint(app, client, admin_headers):
+    wheelchair_id = create_wheelchair(app, stock=5)
+    order_ids = [place_order(client, wheelchair_id) for _ in range(2)]
+    client.post('/api/admin/order/update/status', headers=admin_headers, json={
+        'order_id': order_ids[0], 'new_status': FormalOrder.STATUS_CANCELLED
+    })
+
+    with count_queries(app) as statements:
+        response = client.get('/api/admin/stats?days=7', headers=admin_headers)
+    assert response.status_code == 200
+    # 查询次数固定，不扫描 formal_order
+    assert not any('FROM formal_order' in statement for statement in statements)
+
+    data = response.get_json()['data']
+    assert data['total_orders'] == 2
+    assert data['active_orders'] == 1
+    assert len(data['daily_orders']) == 7
+    assert data['daily_orders'][-1]['count'] == 2
+    assert data['revenue'] == data['monthly_revenue'] > 0
+    assert data['wheelchair_usage'][0]['usage_count'] == 1
+    assert data['wheelchair_usage'][0]['name'] == '并发测试轮椅'
+    assert data['available_wheelchairs'] == 1
+    assert {item['status']: item['count'] for item in data['order_status_distribution']} == {
+        FormalOrder.STATUS_PENDING: 1, FormalOrder.STATUS_CANCELLED: 1
+    }
+
+    assert client.get('/api/admin/dashboard/stats', headers=admin_headers).status_code == 200
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库引擎配置档测试
+"""
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+from utils.engine import bind_engine_options, engine_options, init_engine, resolve_profile
+
+def test_resolve_profile():
+    assert resolve_profile('sqlite:///app.db') == 'sqlite_wal'
+    assert resolve_profile('postgresql+psycopg2://user@host/app') == 'postgresql_pool'
+    assert resolve_profile('mysql+pymysql://user@host/app') == 'default'
+    assert resolve_profile('sqlite:///app.db', 'default') == 'default'
+    with pytest.raises(ValueError):
+        resolve_profile('sqlite:///app.db', 'postgresql_pool')
+    with pytest.raises(ValueError):
+        resolve_profile('sqlite:///app.db', 'unknown')
+
+def test_postgresql_pool_options():
+    options = engine_options('postgresql_pool', {'DB_POOL_SIZE': 5, 'DB_STATEMENT_TIMEOUT_MS': 1500})
+    assert options['pool_size'] == 5
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args']['options'] == '-c statement_timeout=1500'
+
+def test_bind_options_follow_each_bind_url():
+    config = {'DB_POOL_SIZE': 5, 'SQLITE_BUSY_TIMEOUT_MS': 2500}
+    binds, profiles = bind_engine_options({
+        'replica': 'postgresql+psycopg2://user@host/app',
+        'archive': {'url': 'sqlite:///archive.db', 'connect_args': {'timeout': 1}}
+    }, 'sqlite_wal', config)
+
+    # 主库配置档为 sqlite_wal 时，PostgreSQL 副本仍使用连接池参数而不是 SQLite 的 timeout
+    assert profiles == {'replica': 'postgresql_pool', 'archive': 'sqlite_wal'}
+    assert binds['replica']['url'] == 'postgresql+psycopg2://user@host/app'
+    assert binds['replica']['pool_size'] == 5
+    assert 'timeout' not in binds['replica']['connect_args']
+    # 绑定中显式配置的参数优先
+    assert binds['archive']['connect_args'] == {'timeout': 1}
+
+def test_sqlite_wal_pragmas_applied_on_connect(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "wal.db"}'
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = 2500
+    app.config['SQLITE_CACHE_SIZE_KB'] = 4096
+    database = SQLAlchemy()
+
+    assert init_engine(app, database) == 'sqlite_wal'
+    with app.app_context():
+        with database.engine.connect() as connection:
+            assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            # NORMAL = 1
+            assert connection.execute(text('PRAGMA synchronous')).scalar() == 1
+            assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 2500
+            assert connection.execute(text('PRAGMA cache_size')).scalar() == -4096
+        database.engine.dispose()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单与操作日志流式导出测试
+"""
+
+import csv
+import io
+import json
+from models import db, Wheelchair, FormalOrder, OperationLog, AdminUser
+from utils.export import export_response
+
+def seed_orders(app, count):
+    with app.app_context():
+        wheelchair = Wheelchair(name='导出测试轮椅', price=100.0, stock=count)
+        db.session.add(wheelchair)
+        db.session.flush()
+        for i in range(count):
+            order = FormalOrder(f'用户{i}', '13800138000', '测试地址', wheelchair.id, 100.0)
+            if i % 2:
+                order.status = FormalOrder.STATUS_COMPLETED
+            db.session.add(order)
+        db.session.commit()
+
+def test_order_export_csv_applies_filters(app, client, admin_headers):
+    seed_orders(app, 10)
+
+    response = client.get(f'/api/admin/order/export?status={FormalOrder.STATUS_COMPLETED}',
+                          headers=admin_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True).lstrip('\ufeff'))))
+    assert len(rows) == 5
+    assert {row['status'] for row in rows} == {FormalOrder.STATUS_COMPLETED}
+    assert rows[0]['wheelchair_name'] == '导出测试轮椅'
+
+def test_log_export_ndjson(app, client, admin_headers):
+    with app.app_context():
+        operator_id = AdminUser.query.first().id
+        for i in range(3):
+            OperationLog.log_operation(operator_id, OperationLog.TYPE_UPDATE_STOCK, i)
+
+    response = client.get('/api/admin/log/export?format=ndjson', headers=admin_headers)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 3
+    assert lines[0]['operator_name'] == 'admin'
+
+    response = client.get('/api/admin/log/export?format=xml', headers=admin_headers)
+    assert response.status_code == 400
+
+def test_export_response_emits_one_chunk_per_batch(app):
+    rows = ({'id': i} for i in range(25))
+    with app.test_request_context():
+        response = export_response(rows, ['id'], 'ndjson', 'test', batch_size=10)
+        chunks = list(response.response)
+    assert len(chunks) == 3
+    assert sum(chunk.count('\n') for chunk in chunks) == 25
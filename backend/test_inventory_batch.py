@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轮椅批量上架/下架/删除测试
+"""
+
+import json
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+from models import db, Wheelchair, OperationLog
+
+def create_wheelchairs(app, count):
+    with app.app_context():
+        db.session.execute(insert(Wheelchair.__table__), [
+            {'name': f'批量轮椅{i}', 'price': 100.0, 'stock': 1, 'is_offline': False, 'is_deleted': False}
+            for i in range(count)
+        ])
+        db.session.commit()
+        return [row[0] for row in db.session.query(Wheelchair.id).order_by(Wheelchair.id)]
+
+def batch_operate(client, headers, ids, status):
+    response = client.post('/api/admin/inventory/operate', headers=headers, json={
+        'action': 'batch_status', 'ids': ids, 'status': status
+    })
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+def batch_log_count(app):
+    with app.app_context():
+        return OperationLog.query.filter(
+            OperationLog.operate_type == OperationLog.TYPE_BATCH_OPERATE_WHEELCHAIR
+        ).count()
+
+def test_batch_offline_online_delete(app, client, admin_headers):
+    ids = create_wheelchairs(app, 1200)
+    assert client.get('/api/wheelchair/search?limit=1').get_json()['data']['total'] == 1200
+
+    # 跨多个分块，包含不存在和重复的ID
+    result = batch_operate(client, admin_headers, ids[:1100] + [999999, ids[0]], 'maintenance')
+    assert result['action'] == 'offline'
+    assert result['requested_count'] == 1101
+    assert result['updated_count'] == 1100
+    assert batch_log_count(app) == 1
+    with app.app_context():
+        assert json.loads(OperationLog.query.one().detail) == {'action': 'offline', 'requested': 1101, 'affected': 1100}
+    # 目录缓存已失效
+    assert client.get('/api/wheelchair/search?limit=1').get_json()['data']['total'] == 100
+
+    # 状态已符合的轮椅不计入，也不写日志
+    result = batch_operate(client, admin_headers, ids[:10], 'offline')
+    assert result['updated_count'] == 0
+    assert batch_log_count(app) == 1
+
+    result = batch_operate(client, admin_headers, ids[:600], 'available')
+    assert (result['action'], result['updated_count']) == ('online', 600)
+
+    result = batch_operate(client, admin_headers, ids, 'delete')
+    assert result['updated_count'] == 1200
+    assert batch_log_count(app) == 3
+
+    with app.app_context():
+        assert Wheelchair.query.filter(Wheelchair.is_deleted == False).count() == 0
+        # 已删除的轮椅不会被重新上架
+        assert Wheelchair.batch_operate(ids, Wheelchair.BATCH_ONLINE)['affected'] == 0
+
+def test_batch_validation(client, admin_headers):
+    for payload in (
+        {'ids': [1], 'status': 'unknown'},
+        {'ids': ['abc'], 'status': 'offline'},
+        {'ids': list(range(Wheelchair.BATCH_MAX_IDS + 1)), 'status': 'offline'},
+        {'ids': [], 'status': 'offline'}
+    ):
+        response = client.post('/api/admin/inventory/operate', headers=admin_headers,
+                               json=dict(payload, action='batch_status'))
+        assert response.status_code == 400
+
+def test_app_simple_batch_status_writes_one_summary_log():
+    import app_simple
+
+    app_simple.init_database()
+    simple_db, SimpleLog = app_simple.db, app_simple.OperationLog
+    with app_simple.app.app_context():
+        admin_id = app_simple.AdminUser.query.filter_by(role='admin').first().id
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin_id))}'}
+        wheelchairs = [app_simple.Wheelchair(name=f'批量轮椅{i}', price=100.0, stock=1) for i in range(3)]
+        simple_db.session.add_all(wheelchairs)
+        simple_db.session.commit()
+        ids = [wheelchair.id for wheelchair in wheelchairs]
+        before = SimpleLog.query.count()
+
+    client = app_simple.app.test_client()
+    try:
+        for status, expected in (('offline', 3), ('online', 3)):
+            response = client.post('/api/admin/inventory/operate', headers=headers, json={
+                'action': 'batch_status', 'ids': ids + [999999], 'status': status
+            })
+            assert response.status_code == 200
+            with app_simple.app.app_context():
+                logs = SimpleLog.query.order_by(SimpleLog.id).offset(before).all()
+                # 每次批量调用恰好一条汇总日志
+                assert len(logs) == 1
+                assert logs[0].operator_id == admin_id
+                assert json.loads(logs[0].detail) == {'action': status, 'requested': 4, 'affected': expected}
+                simple_db.session.delete(logs[0])
+                simple_db.session.commit()
+    finally:
+        with app_simple.app.app_context():
+            app_simple.Wheelchair.query.filter(app_simple.Wheelchair.id.in_(ids)).delete()
+            simple_db.session.commit()
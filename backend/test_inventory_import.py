@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+库存批量导入测试
+"""
+
+import io
+import json
+import pytest
+from models import db, Wheelchair, OperationLog, DailyWheelchairStat
+from test_order_submit import create_wheelchair
+
+def test_csv_import_inserts_updates_and_reports_errors(app, client, admin_headers):
+    existing_id = create_wheelchair(app, stock=2)
+    lines = ['name,price,stock,description,manufacturer,id']
+    lines += [f'导入轮椅{i},{100 + i},{i % 5},描述{i},厂商A,' for i in range(12)]
+    lines.append(f'更新后的轮椅,88,9,,厂商B,{existing_id}')
+    lines.append(',100,1,,,')            # 缺少名称
+    lines.append('坏价格,abc,1,,,')       # 价格格式错误
+    lines.append('不存在的轮椅,100,1,,,999999')
+    body = '\n'.join(lines).encode('utf-8')
+
+    response = client.post('/api/admin/inventory/import?batch_size=5', headers=admin_headers,
+                           data=body, content_type='text/csv')
+    assert response.status_code == 200
+    report = response.get_json()['data']
+    assert report['total'] == 16
+    assert report['inserted'] == 12
+    assert report['updated'] == 1
+    assert report['failed'] == 3
+    assert sorted(error['row'] for error in report['errors']) == [15, 16, 17]
+
+    with app.app_context():
+        assert Wheelchair.query.count() == 13
+        updated = Wheelchair.get_by_id(existing_id)
+        assert (updated.name, updated.price, updated.stock) == ('更新后的轮椅', 88.0, 9)
+        # 每批一条汇总日志
+        assert OperationLog.query.filter(
+            OperationLog.operate_type == OperationLog.TYPE_IMPORT_WHEELCHAIR
+        ).count() == report['batches']
+
+def test_ndjson_upload(app, client, admin_headers):
+    rows = [json.dumps({'name': f'轮椅{i}', 'price': 50, 'stock': 3}, ensure_ascii=False) for i in range(3)]
+    rows.append('{not json')
+    upload = io.BytesIO('\n'.join(rows).encode('utf-8'))
+
+    response = client.post('/api/admin/inventory/import', headers=admin_headers,
+                           data={'file': (upload, 'catalogue.ndjson')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    report = response.get_json()['data']
+    assert report['inserted'] == 3
+    assert report['errors'][0]['row'] == 4
+
+    # 新导入的轮椅可以被搜索到（全文索引触发器同步）
+    response = client.get('/api/wheelchair/search?keyword=轮椅1')
+    assert response.get_json()['data']['total'] == 1
+
+@pytest.mark.parametrize('executemany_returning', [True, False])
+def test_import_records_stock_change_for_new_rows(app, client, admin_headers, executemany_returning):
+    with app.app_context():
+        dialect = db.engine.dialect
+    original = dialect.insert_executemany_returning
+    # 模拟不支持批量 RETURNING 的数据库
+    dialect.insert_executemany_returning = executemany_returning
+    try:
+        body = '\n'.join(['name,price,stock'] + [f'汇总轮椅{i},100,{i + 1}' for i in range(4)])
+        response = client.post('/api/admin/inventory/import?batch_size=3', headers=admin_headers,
+                               data=body.encode('utf-8'), content_type='text/csv')
+    finally:
+        dialect.insert_executemany_returning = original
+    assert response.get_json()['data']['inserted'] == 4
+
+    with app.app_context():
+        stock_changes = {
+            row.wheelchair_id: row.stock_change for row in DailyWheelchairStat.query
+        }
+        assert stock_changes == {
+            wheelchair.id: wheelchair.stock for wheelchair in Wheelchair.query
+        }
+        assert sum(stock_changes.values()) == 10
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+游标分页测试
+"""
+
+from datetime import datetime, timedelta
+from models import db, Wheelchair, FormalOrder, OperationLog
+
+def seed_orders(app, count):
+    with app.app_context():
+        wheelchair = Wheelchair(name='测试轮椅', price=100.0, stock=1)
+        db.session.add(wheelchair)
+        db.session.flush()
+        base_time = datetime(2025, 1, 1)
+        for i in range(count):
+            order = FormalOrder('测试用户', '13800138000', '测试地址', wheelchair.id, 100.0)
+            # 每三个订单共用同一时间，验证 (时间, ID) 游标不丢不重
+            order.create_time = base_time + timedelta(minutes=i // 3)
+            db.session.add(order)
+        db.session.commit()
+
+def test_order_cursor_walks_every_row_once(app, client, admin_headers):
+    seed_orders(app, 25)
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(f'/api/admin/order/list?limit=10&cursor={cursor}', headers=admin_headers)
+        data = response.get_json()['data']
+        seen.extend(order['id'] for order in data['list'])
+        cursor = data['next_cursor']
+
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    with app.app_context():
+        expected = [order.id for order in FormalOrder.query.order_by(
+            FormalOrder.create_time.desc(), FormalOrder.id.desc()).all()]
+    assert seen == expected
+
+def test_invalid_cursor_is_rejected(client, admin_headers):
+    response = client.get('/api/admin/order/list?cursor=not-a-cursor', headers=admin_headers)
+    assert response.status_code == 400
+
+def test_log_cursor_pagination(app, client, admin_headers):
+    with app.app_context():
+        for i in range(7):
+            db.session.add(OperationLog(1, OperationLog.TYPE_LOGIN, i))
+        db.session.commit()
+
+    first = client.get('/api/admin/log/list?limit=5&cursor=', headers=admin_headers).get_json()['data']
+    assert len(first['list']) == 5
+    assert first['has_next']
+    second = client.get(f"/api/admin/log/list?limit=5&cursor={first['next_cursor']}",
+                        headers=admin_headers).get_json()['data']
+    assert len(second['list']) == 2
+    assert second['next_cursor'] is None
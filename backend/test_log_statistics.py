@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+操作日志统计测试
+"""
+
+from datetime import datetime, timedelta
+from models import db, AdminUser, OperationLog, OperationLogDaily
+from test_query_count import count_queries
+from utils.sweeper import OrderPartitionMaintainer
+
+def seed_logs(app):
+    """写入跨越多天的日志：4天前、3天前各若干条，今天若干条"""
+    now = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        admin = AdminUser(username='admin', password='123456', role=AdminUser.ROLE_ADMIN)
+        operator = AdminUser(username='operator', password='123456', role=AdminUser.ROLE_OPERATOR)
+        db.session.add_all([admin, operator])
+        db.session.flush()
+        entries = [
+            (admin.id, OperationLog.TYPE_LOGIN, now - timedelta(days=4)),
+            (admin.id, OperationLog.TYPE_ADD_WHEELCHAIR, now - timedelta(days=4, hours=1)),
+            (operator.id, OperationLog.TYPE_LOGIN, now - timedelta(days=3)),
+            (operator.id, OperationLog.TYPE_UPDATE_ORDER_STATUS, now - timedelta(days=3, hours=2)),
+            (admin.id, OperationLog.TYPE_LOGIN, now),
+            (operator.id, OperationLog.TYPE_LOGIN, now - timedelta(hours=1)),
+        ]
+        for operator_id, operate_type, operate_time in entries:
+            log = OperationLog(operator_id, operate_type)
+            log.operate_time = operate_time
+            db.session.add(log)
+        db.session.commit()
+        return admin.id, operator.id, now
+
+def test_statistics_match_raw_counts_across_rollup_boundary(app):
+    admin_id, operator_id, now = seed_logs(app)
+    OrderPartitionMaintainer(app).run_once()
+
+    with app.app_context():
+        # 后台维护任务已把4天前、3天前写入每日汇总
+        assert OperationLogDaily.query.count() == 4
+        stats = OperationLog.get_statistics()
+
+        assert stats['total_operations'] == 6
+        assert stats['type_statistics'] == {
+            OperationLog.TYPE_LOGIN: 4,
+            OperationLog.TYPE_ADD_WHEELCHAIR: 1,
+            OperationLog.TYPE_UPDATE_ORDER_STATUS: 1
+        }
+        assert stats['operator_statistics'] == {admin_id: 3, operator_id: 3}
+
+        # 操作员统计同样受日期范围约束
+        start = (now - timedelta(days=3)).replace(hour=0)
+        ranged = OperationLog.get_statistics(start_date=start)
+        assert ranged['total_operations'] == 4
+        assert ranged['operator_statistics'] == {admin_id: 1, operator_id: 3}
+
+        # 范围起点落在汇总日期中间时，该日只统计范围内的日志
+        partial = OperationLog.get_statistics(start_date=now - timedelta(days=3, hours=1))
+        assert partial['total_operations'] == 3
+
+def test_statistics_read_only_before_rollup(app):
+    admin_id, operator_id, _ = seed_logs(app)
+
+    with app.app_context():
+        # 尚未汇总时全部从日志表统计，查询本身不写汇总表
+        stats = OperationLog.get_statistics(bucket='day')
+        assert stats['total_operations'] == 6
+        assert stats['operator_statistics'] == {admin_id: 3, operator_id: 3}
+        assert OperationLogDaily.query.count() == 0
+        assert OperationLogDaily.through_date() is None
+
+def test_statistics_buckets(app):
+    seed_logs(app)
+    OrderPartitionMaintainer(app).run_once()
+
+    with app.app_context():
+        daily = OperationLog.get_statistics(bucket='day')
+        assert [bucket['total'] for bucket in daily['bucket_statistics']] == [2, 2, 2]
+
+        hourly = OperationLog.get_statistics(bucket='hour', start_date=datetime.utcnow().date())
+        assert sum(bucket['total'] for bucket in hourly['bucket_statistics']) == 2
+        assert all(len(bucket['time']) == 16 for bucket in hourly['bucket_statistics'])
+
+def test_statistics_run_in_one_query(app):
+    seed_logs(app)
+    OrderPartitionMaintainer(app).run_once()
+
+    with count_queries(app) as statements:
+        with app.app_context():
+            OperationLog.get_statistics(bucket='day')
+
+    # 读取汇总进度 + 一条分组统计
+    assert len(statements) == 2
+
+def test_statistics_endpoint(app, client, admin_headers):
+    response = client.get('/api/admin/log/statistics?bucket=week', headers=admin_headers)
+    assert response.status_code == 400
+
+    response = client.get('/api/admin/log/statistics?bucket=day', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()['data']['total_operations'] == 0
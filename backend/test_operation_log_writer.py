@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+操作日志异步批量写入测试
+"""
+
+import os
+from sqlalchemy import event
+from models import db, AdminUser, OperationLog
+from utils.log_writer import OperationLogWriter
+
+def create_operator(app):
+    with app.app_context():
+        user = AdminUser(username='admin', password='123456', role=AdminUser.ROLE_ADMIN)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def log_count(app):
+    with app.app_context():
+        return OperationLog.query.count()
+
+def test_log_operation_is_queued_and_flushed_in_bulk(app):
+    operator_id = create_operator(app)
+    app.config['OPERATION_LOG_ASYNC'] = True
+    app.config['OPERATION_LOG_FLUSH_INTERVAL_MS'] = 60000
+    app.config['OPERATION_LOG_BATCH_SIZE'] = 1000
+
+    with app.app_context():
+        for i in range(50):
+            assert OperationLog.log_operation(operator_id, OperationLog.TYPE_LOGIN, i)
+        writer = app.extensions['operation_log_writer']
+
+    assert log_count(app) == 0
+
+    inserts = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda conn, cursor, statement, *args: inserts.append(statement) \
+        if statement.startswith('INSERT INTO operation_log') else None
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        writer.stop()
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+
+    assert log_count(app) == 50
+    assert len(inserts) == 1
+    metrics = writer.get_metrics()
+    assert metrics['written'] == 50
+    assert metrics['pending'] == 0
+
+def test_bounded_loss_mode_drops_when_queue_is_full(app):
+    operator_id = create_operator(app)
+    writer = OperationLogWriter(app, max_queue=3)
+    results = [writer.submit(operator_id, OperationLog.TYPE_LOGIN) for _ in range(5)]
+
+    assert results == [True, True, True, False, False]
+    assert writer.flush() == 3
+    assert writer.get_metrics()['dropped'] == 2
+    assert log_count(app) == 3
+
+def test_wal_mode_replays_unflushed_entries(app, tmp_path):
+    operator_id = create_operator(app)
+    wal_path = str(tmp_path / 'operation_log.wal')
+
+    writer = OperationLogWriter(app, flush_interval=60, wal_path=wal_path)
+    writer.start()
+    for i in range(7):
+        writer.submit(operator_id, OperationLog.TYPE_LOGOUT, i)
+    # 模拟进程异常退出：不写入数据库，直接释放槽位锁
+    writer._stop_event.set()
+    with writer._cond:
+        writer._pending.clear()
+        writer._cond.notify_all()
+    writer._thread.join()
+    writer._wal_file.close()
+    writer._slot_lock_file.close()
+
+    assert log_count(app) == 0
+    assert os.path.getsize(f'{wal_path}.0') > 0
+
+    recovered = OperationLogWriter(app, wal_path=wal_path)
+    recovered.start()
+    recovered.stop()
+
+    assert recovered.get_metrics()['recovered'] == 7
+    assert log_count(app) == 7
+    assert not os.path.exists(f'{wal_path}.0')
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单批量状态转换测试
+"""
+
+from models import db, FormalOrder, OperationLog, Wheelchair, DailyOrderStat, DailyWheelchairStat
+from test_order_submit import create_wheelchair
+from test_dashboard_stats import place_order, rollup_snapshot
+from test_query_count import count_queries
+
+def bulk_status(client, headers, order_ids, new_status, **extra):
+    return client.post('/api/admin/order/batch/status', headers=headers, json=dict(
+        extra, order_ids=order_ids, new_status=new_status
+    ))
+
+def test_bulk_cancel_restores_stock_per_wheelchair(app, client, admin_headers):
+    first = create_wheelchair(app, stock=5)
+    second = create_wheelchair(app, stock=5)
+    first_orders = [place_order(client, first) for _ in range(3)]
+    second_orders = [place_order(client, second) for _ in range(2)]
+
+    with count_queries(app) as statements:
+        response = bulk_status(client, admin_headers, first_orders + second_orders, FormalOrder.STATUS_CANCELLED)
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['updated_count'] == 5
+    assert sorted((item['wheelchair_id'], item['quantity']) for item in data['restored_stock']) == [
+        (first, 3), (second, 2)
+    ]
+    # 每个轮椅一条库存恢复语句，订单状态一条批量更新
+    stock_updates = [s for s in statements if s.startswith('UPDATE wheelchair SET stock')]
+    assert len(stock_updates) == 2
+    assert len([s for s in statements if s.startswith('UPDATE formal_order')]) == 1
+
+    with app.app_context():
+        assert Wheelchair.get_by_id(first).stock == 5
+        assert Wheelchair.get_by_id(second).stock == 5
+        assert FormalOrder.query.filter(FormalOrder.status == FormalOrder.STATUS_CANCELLED).count() == 5
+        assert OperationLog.query.filter(
+            OperationLog.operate_type == OperationLog.TYPE_UPDATE_ORDER_STATUS
+        ).count() == 5
+
+    # 增量汇总与全量重建一致
+    incremental = rollup_snapshot(app)
+    with app.app_context():
+        DailyOrderStat.rebuild()
+        DailyWheelchairStat.rebuild()
+        db.session.commit()
+    assert rollup_snapshot(app) == incremental
+
+def test_invalid_transition_rejects_whole_batch(app, client, admin_headers):
+    wheelchair_id = create_wheelchair(app, stock=5)
+    order_ids = [place_order(client, wheelchair_id) for _ in range(3)]
+
+    assert bulk_status(client, admin_headers, order_ids[:1], FormalOrder.STATUS_CANCELLED).status_code == 200
+
+    # 已取消为终态；待配送不能直接完成
+    response = bulk_status(client, admin_headers, order_ids + [999999], FormalOrder.STATUS_COMPLETED)
+    assert response.status_code == 400
+    errors = response.get_json()['data']['errors']
+    assert sorted(error['order_id'] for error in errors) == sorted(order_ids + [999999])
+    with app.app_context():
+        assert FormalOrder.query.filter(FormalOrder.status == FormalOrder.STATUS_PENDING).count() == 2
+
+    response = bulk_status(client, admin_headers, order_ids, FormalOrder.STATUS_DELIVERING)
+    assert response.status_code == 400
+    response = bulk_status(client, admin_headers, order_ids, FormalOrder.STATUS_DELIVERING, skip_invalid=True)
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert (data['updated_count'], data['skipped_count']) == (2, 1)
+
+    response = bulk_status(client, admin_headers, order_ids[1:], FormalOrder.STATUS_COMPLETED)
+    assert response.get_json()['data']['updated_count'] == 2
+    with app.app_context():
+        # 取消后恢复1个，另外2个订单已完成
+        assert Wheelchair.get_by_id(wheelchair_id).stock == 3
+
+    # 单个订单更新同样按状态机校验
+    response = client.post('/api/admin/order/update/status', headers=admin_headers, json={
+        'order_id': order_ids[1], 'new_status': FormalOrder.STATUS_PENDING
+    })
+    assert response.status_code == 400
+
+def update_status(client, headers, order_id, new_status):
+    return client.post('/api/admin/order/update/status', headers=headers, json={
+        'order_id': order_id, 'new_status': new_status
+    })
+
+def status_log_count(app):
+    with app.app_context():
+        return OperationLog.query.filter(
+            OperationLog.operate_type == OperationLog.TYPE_UPDATE_ORDER_STATUS
+        ).count()
+
+def test_single_order_update_rejects_terminal_transition(app, client, admin_headers):
+    wheelchair_id = create_wheelchair(app, stock=5)
+    completed, cancelled = place_order(client, wheelchair_id), place_order(client, wheelchair_id)
+    assert update_status(client, admin_headers, completed, FormalOrder.STATUS_DELIVERING).status_code == 200
+    assert update_status(client, admin_headers, completed, FormalOrder.STATUS_COMPLETED).status_code == 200
+    assert update_status(client, admin_headers, cancelled, FormalOrder.STATUS_CANCELLED).status_code == 200
+    logs = status_log_count(app)
+
+    # 已完成、已取消为终态：返回400，状态、库存和日志都不变（已取消的订单不会重复恢复库存）
+    for order_id, old_status in ((completed, FormalOrder.STATUS_COMPLETED),
+                                 (cancelled, FormalOrder.STATUS_CANCELLED)):
+        response = update_status(client, admin_headers, order_id, FormalOrder.STATUS_CANCELLED)
+        assert response.status_code == 400
+        with app.app_context():
+            assert db.session.get(FormalOrder, order_id).status == old_status
+    with app.app_context():
+        assert Wheelchair.get_by_id(wheelchair_id).stock == 4
+    assert status_log_count(app) == logs
+
+def test_bulk_status_logs_go_through_async_writer(app, client, admin_headers):
+    wheelchair_id = create_wheelchair(app, stock=5)
+    order_ids = [place_order(client, wheelchair_id) for _ in range(3)]
+    app.config['OPERATION_LOG_ASYNC'] = True
+    app.config['OPERATION_LOG_FLUSH_INTERVAL_MS'] = 60000
+
+    response = bulk_status(client, admin_headers, order_ids, FormalOrder.STATUS_CANCELLED)
+    assert response.status_code == 200
+    # 提交后才入队，由写入器批量写入
+    assert status_log_count(app) == 0
+    app.extensions['operation_log_writer'].stop()
+    assert status_log_count(app) == 3
+
+    # 整批被拒绝时不写日志
+    response = bulk_status(client, admin_headers, order_ids, FormalOrder.STATUS_COMPLETED)
+    assert response.status_code == 400
+    assert app.extensions['operation_log_writer'].get_metrics()['queued'] == 3
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单号生成器测试
+"""
+
+import os
+import threading
+from datetime import datetime
+
+import pytest
+
+from models import FormalOrder
+from models.partition import parse_order_no_time
+from utils.order_no import MAX_SEQUENCE, OrderNoGenerator, next_order_no
+
+NOW = datetime(2030, 1, 1, 8, 0, 0)
+
+def started_generator():
+    """启动已超过1秒的生成器（启动所在的一秒不发号）"""
+    generator = OrderNoGenerator()
+    generator._started -= 1
+    return generator
+
+def test_format_keeps_prefix_and_time():
+    order_no = started_generator().next(NOW, node_id=7)
+    assert order_no == f'WR20300101080000{7:02d}{os.getpid():07d}0000'
+    assert parse_order_no_time(order_no) == NOW
+
+def test_monotonic_within_process_across_threads():
+    generator = started_generator()
+    results = []
+
+    def worker():
+        results.append([generator.next(NOW) for _ in range(2000)])
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(numbers == sorted(numbers) for numbers in results)
+    merged = [order_no for numbers in results for order_no in numbers]
+    assert len(set(merged)) == 8000
+    assert {parse_order_no_time(order_no) for order_no in merged} == {NOW}
+
+def test_sequence_overflow_and_clock_rollback_never_repeat():
+    generator = started_generator()
+    numbers = [generator.next(NOW) for _ in range(MAX_SEQUENCE + 2)]
+    assert numbers == sorted(numbers)
+    assert len(set(numbers)) == len(numbers)
+    assert parse_order_no_time(numbers[-1]) == datetime(2030, 1, 1, 8, 0, 1)
+
+    # 系统时钟回拨时沿用上次的时间继续递增
+    earlier = generator.next(datetime(2029, 12, 31, 23, 0, 0))
+    assert earlier > numbers[-1]
+
+def test_startup_second_is_skipped():
+    generator = OrderNoGenerator()
+    assert parse_order_no_time(generator.next(NOW)) == datetime(2030, 1, 1, 8, 0, 1)
+
+    # 启动1秒之后首次发号直接使用调用方传入的时间（UTC或本地时间均可）
+    assert parse_order_no_time(started_generator().next(NOW)) == NOW
+
+def test_node_id_from_config(app):
+    app.config['ORDER_NO_NODE_ID'] = 42
+    with app.app_context():
+        order = FormalOrder('测试用户', '13800138000', '测试地址', 1, 100.0)
+    assert order.order_no[16:18] == '42'
+
+    app.config['ORDER_NO_NODE_ID'] = 100
+    with app.app_context(), pytest.raises(ValueError):
+        next_order_no()
+
+def test_app_simple_order_time_is_local():
+    import app_simple
+
+    with app_simple.app.app_context():
+        wheelchair = app_simple.Wheelchair(name='本地时间轮椅', price=100.0, stock=1)
+        app_simple.db.session.add(wheelchair)
+        app_simple.db.session.commit()
+        temp_order = app_simple.TempOrder('测试用户', '13800138000', '测试地址', wheelchair.id)
+        app_simple.db.session.add(temp_order)
+        app_simple.db.session.commit()
+        wheelchair_id, pre_order_id = wheelchair.id, temp_order.id
+
+    before = datetime.now().replace(microsecond=0)
+    response = app_simple.app.test_client().post('/api/order/submit', json={'pre_order_id': pre_order_id})
+    assert response.status_code == 200
+
+    with app_simple.app.app_context():
+        order = app_simple.FormalOrder.query.filter_by(order_no=response.get_json()['data']['order_no']).one()
+        try:
+            # 创建时间为本地时间，订单号嵌入同一时间
+            assert before <= order.create_time <= datetime.now()
+            assert parse_order_no_time(order.order_no) == order.create_time.replace(microsecond=0)
+        finally:
+            app_simple.db.session.delete(order)
+            app_simple.db.session.delete(app_simple.db.session.get(app_simple.Wheelchair, wheelchair_id))
+            app_simple.db.session.commit()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单分区测试
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from models import db, FormalOrder, DailyOrderStat, DailyWheelchairStat
+from models.partition import (
+    add_months, get_order_archive, maintain_order_partitions, months_between, parse_order_no_time
+)
+from test_order_submit import create_wheelchair
+from test_dashboard_stats import place_order, rollup_snapshot
+from utils.sweeper import OrderPartitionMaintainer
+
+NOW = datetime(2024, 6, 15, 12, 0, 0)
+
+@pytest.fixture
+def archive_app(app, tmp_path):
+    app.config['ORDER_ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    app.config['ORDER_ARCHIVE_AFTER_MONTHS'] = 3
+    app.config['ORDER_ARCHIVE_BATCH_SIZE'] = 2
+    yield app
+    archive = app.extensions.get('order_archive')
+    if archive is not None:
+        archive.dispose()
+
+def add_order(app, wheelchair_id, create_time, status):
+    """直接写入指定创建时间和状态的订单"""
+    with app.app_context():
+        order = FormalOrder('历史用户', '13800138000', '历史地址', wheelchair_id, 100.0)
+        order.create_time = create_time
+        # 生成器的逻辑时钟不会倒退，历史订单的订单号换成创建时间（后缀仍唯一）
+        order.order_no = f'WR{create_time:%Y%m%d%H%M%S}{order.order_no[16:]}'
+        order.status = status
+        db.session.add(order)
+        db.session.commit()
+        return order.id, order.order_no
+
+def seed_history(app):
+    """三月、四月各有已完成、已取消和未结束的订单"""
+    wheelchair_id = create_wheelchair(app, stock=10)
+    orders = []
+    for month in (3, 4):
+        for day, status in ((5, FormalOrder.STATUS_COMPLETED),
+                            (10, FormalOrder.STATUS_CANCELLED),
+                            (20, FormalOrder.STATUS_DELIVERING)):
+            orders.append(add_order(app, wheelchair_id, datetime(2024, month, day, 8, 0, 0), status))
+    return wheelchair_id, orders
+
+def test_order_no_time_and_months():
+    assert parse_order_no_time('WR20240331235958001234560001') == datetime(2024, 3, 31, 23, 59, 58)
+    assert parse_order_no_time('WR20240331235958A1B2C3') == datetime(2024, 3, 31, 23, 59, 58)
+    assert parse_order_no_time('WR2024') is None
+    assert parse_order_no_time('WR20241399000000ABCDEF') is None
+    assert add_months(datetime(2024, 1, 1), -1) == datetime(2023, 12, 1)
+    assert months_between(datetime(2024, 3, 30), datetime(2024, 4, 2)) == [
+        datetime(2024, 4, 1), datetime(2024, 3, 1)
+    ]
+
+def test_archive_moves_finished_orders_by_month(archive_app):
+    wheelchair_id, orders = seed_history(archive_app)
+
+    archived = maintain_order_partitions(archive_app, now=NOW)
+    # 四月及之后保留在主表；三月只迁移已结束的订单
+    assert archived == {'2024-03': 2}
+    # 重复执行不会重复迁移
+    assert maintain_order_partitions(archive_app, now=NOW) == {}
+
+    with archive_app.app_context():
+        archive = get_order_archive()
+        assert archive.months() == [datetime(2024, 3, 1)]
+        assert archive.count(datetime(2024, 3, 1)) == 2
+        assert FormalOrder.query.count() == 4
+
+def test_list_merges_archived_months(archive_app, client, admin_headers):
+    wheelchair_id, orders = seed_history(archive_app)
+    place_order(client, wheelchair_id)
+    maintain_order_partitions(archive_app, now=NOW)
+
+    response = client.get('/api/admin/order/list?page=1&limit=3', headers=admin_headers)
+    data = response.get_json()['data']
+    assert data['total'] == 7
+    first_page = [order['order_no'] for order in data['list']]
+
+    response = client.get('/api/admin/order/list?page=3&limit=3', headers=admin_headers)
+    last_page = [order['order_no'] for order in response.get_json()['data']['list']]
+    # 最早的订单（三月五日，已归档）位于最后一页
+    assert last_page == [orders[0][1]]
+    assert orders[0][1] not in first_page
+
+    response = client.get(f'/api/admin/order/list?status={FormalOrder.STATUS_CANCELLED}', headers=admin_headers)
+    data = response.get_json()['data']
+    assert data['total'] == 2
+    assert [order['order_no'] for order in data['list']] == [orders[4][1], orders[1][1]]
+    assert data['list'][1]['wheelchair_name'] == '并发测试轮椅'
+
+    # 游标分页跨越主表和历史分区，顺序与页码分页一致
+    seen, cursor = [], ''
+    while True:
+        data = client.get(f'/api/admin/order/list?limit=2&cursor={cursor}', headers=admin_headers).get_json()['data']
+        seen += [order['order_no'] for order in data['list']]
+        if not data['has_next']:
+            break
+        cursor = data['next_cursor']
+    response = client.get('/api/admin/order/list?limit=7', headers=admin_headers)
+    assert seen == [order['order_no'] for order in response.get_json()['data']['list']]
+
+def test_list_keeps_archived_order_whose_id_was_reused(archive_app, client, admin_headers):
+    wheelchair_id, orders = seed_history(archive_app)
+    maintain_order_partitions(archive_app, now=NOW)
+
+    # SQLite 的订单ID没有 AUTOINCREMENT，迁出后新订单可能复用同一个ID
+    with archive_app.app_context():
+        order = FormalOrder('新用户', '13800138000', '新地址', wheelchair_id, 100.0)
+        order.id = orders[0][0]
+        order.create_time = NOW
+        db.session.add(order)
+        db.session.commit()
+        reused_order_no = order.order_no
+
+    response = client.get('/api/admin/order/list?limit=10', headers=admin_headers)
+    order_nos = [order['order_no'] for order in response.get_json()['data']['list']]
+    assert len(order_nos) == 7
+    assert order_nos[0] == reused_order_no
+    assert order_nos[-1] == orders[0][1]
+
+def test_detail_and_export_include_archived_orders(archive_app, client, admin_headers):
+    wheelchair_id, orders = seed_history(archive_app)
+    maintain_order_partitions(archive_app, now=NOW)
+
+    response = client.get(f'/api/order/detail/{orders[0][1]}')
+    assert response.status_code == 200
+    assert response.get_json()['data']['status'] == FormalOrder.STATUS_COMPLETED
+    assert client.get(f'/api/order/detail/{orders[0][1][:-1]}X').status_code == 404
+
+    response = client.get('/api/admin/order/export?format=ndjson', headers=admin_headers)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+    assert [line['order_no'] for line in lines] == [order_no for _, order_no in reversed(orders)]
+
+    response = client.get('/api/admin/order/export?format=ndjson&start_date=2024-03-08&end_date=2024-04-05',
+                          headers=admin_headers)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+    assert [line['order_no'] for line in lines] == [orders[3][1], orders[2][1], orders[1][1]]
+
+def rebuild_rollups(app):
+    with app.app_context():
+        DailyOrderStat.rebuild()
+        DailyWheelchairStat.rebuild()
+        db.session.commit()
+    return rollup_snapshot(app)
+
+def test_rollup_rebuild_includes_archived_orders(archive_app):
+    seed_history(archive_app)
+    before = rebuild_rollups(archive_app)
+    maintain_order_partitions(archive_app, now=NOW)
+    assert rebuild_rollups(archive_app) == before
+
+def test_partition_maintainer_archives_periodically(archive_app):
+    seed_history(archive_app)
+    maintainer = OrderPartitionMaintainer(archive_app, interval=3600)
+    # 以当前时间维护：三月、四月都早于保留范围，已结束的订单全部迁出
+    assert maintainer.run_once() == {'2024-03': 2, '2024-04': 2}
+    assert maintainer.run_once() == {}
+
+    metrics = maintainer.get_metrics()
+    assert metrics['cycles'] == 2
+    assert metrics['last_error'] is None
+    with archive_app.app_context():
+        assert FormalOrder.query.count() == 2
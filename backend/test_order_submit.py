@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单提交并发测试
+N 个并发请求抢购 M 件库存，验证恰好生成 M 个正式订单且库存不为负
+"""
+
+import threading
+from models import db, Wheelchair, FormalOrder, TempOrder, StockHold
+
+def create_wheelchair(app, stock):
+    with app.app_context():
+        wheelchair = Wheelchair(name='并发测试轮椅', price=100.0, stock=stock)
+        db.session.add(wheelchair)
+        db.session.commit()
+        return wheelchair.id
+
+def precreate(client, wheelchair_id):
+    response = client.post('/api/order/precreate', json={
+        'name': '测试用户',
+        'phone': '13800138000',
+        'address': '测试地址',
+        'wheelchair_id': wheelchair_id
+    })
+    assert response.status_code == 200
+    return response.get_json()['data']['pre_order_id']
+
+def submit_in_parallel(app, pre_order_ids):
+    """并发提交预订单，返回各请求的状态码"""
+    barrier = threading.Barrier(len(pre_order_ids))
+    status_codes = []
+    lock = threading.Lock()
+
+    def worker(pre_order_id):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post('/api/order/submit', json={'pre_order_id': pre_order_id})
+        with lock:
+            status_codes.append(response.status_code)
+
+    threads = [threading.Thread(target=worker, args=(pid,)) for pid in pre_order_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return status_codes
+
+def test_parallel_submit_never_oversells(app, client):
+    units, attempts = 5, 30
+    wheelchair_id = create_wheelchair(app, units)
+    pre_order_ids = [precreate(client, wheelchair_id) for _ in range(units)]
+
+    # 绕过预占直接构造超出库存的预订单，验证提交阶段的条件扣减
+    with app.app_context():
+        for _ in range(attempts - units):
+            temp_order = TempOrder('测试用户', '13800138000', '测试地址', wheelchair_id)
+            db.session.add(temp_order)
+            pre_order_ids.append(temp_order.id)
+        db.session.commit()
+
+    status_codes = submit_in_parallel(app, pre_order_ids)
+
+    assert status_codes.count(200) == units
+    assert all(code in (400, 404) for code in status_codes if code != 200)
+    with app.app_context():
+        assert FormalOrder.query.count() == units
+        assert Wheelchair.get_by_id(wheelchair_id).stock == 0
+
+def test_parallel_precreate_holds_at_most_stock(app):
+    units, attempts = 5, 30
+    wheelchair_id = create_wheelchair(app, units)
+    barrier = threading.Barrier(attempts)
+    status_codes = []
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        barrier.wait()
+        response = client.post('/api/order/precreate', json={
+            'name': '测试用户',
+            'phone': '13800138000',
+            'address': '测试地址',
+            'wheelchair_id': wheelchair_id
+        })
+        with lock:
+            status_codes.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(attempts)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert status_codes.count(200) == units
+    with app.app_context():
+        assert StockHold.query.count() == units
+        assert Wheelchair.get_available_stock(wheelchair_id) == 0
+
+def test_duplicate_submit_creates_one_order(app, client):
+    wheelchair_id = create_wheelchair(app, 10)
+    pre_order_id = precreate(client, wheelchair_id)
+
+    status_codes = submit_in_parallel(app, [pre_order_id] * 8)
+
+    assert status_codes.count(200) == 1
+    with app.app_context():
+        assert FormalOrder.query.count() == 1
+        assert Wheelchair.get_by_id(wheelchair_id).stock == 9
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分页查询测试
+"""
+
+from sqlalchemy import event
+from models import db, Wheelchair
+
+def seed(app, count):
+    with app.app_context():
+        for i in range(count):
+            db.session.add(Wheelchair(name=f'轮椅{i}', price=10.0 + i, stock=1))
+        db.session.commit()
+
+def count_statements(app, func):
+    statements = []
+    with app.app_context():
+        def before_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', before_execute)
+        try:
+            result = func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_execute)
+    return result, statements
+
+def test_exact_total_in_single_query(app):
+    seed(app, 23)
+    (items, total), statements = count_statements(app, lambda: Wheelchair.search(page=2, limit=10))
+    assert total == 23
+    assert len(items) == 10
+    assert len(statements) == 1
+    assert 'OVER ()' in statements[0]
+
+def test_page_past_end_still_reports_total(app):
+    seed(app, 5)
+    with app.app_context():
+        items, total = Wheelchair.search(page=3, limit=10)
+    assert items == []
+    assert total == 5
+
+def test_count_none_reports_next_page_lower_bound(app):
+    seed(app, 23)
+    with app.app_context():
+        items, total = Wheelchair.search(page=1, limit=10, count_mode='none')
+        assert len(items) == 10
+        assert total == 11
+        items, total = Wheelchair.search(page=3, limit=10, count_mode='none')
+        assert len(items) == 3
+        assert total == 23
+
+def test_search_endpoint_accepts_count_mode(client, app):
+    seed(app, 3)
+    data = client.get('/api/wheelchair/search?count=estimate').get_json()['data']
+    assert data['total'] == 3
+    assert len(data['list']) == 3
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码哈希线程池测试
+"""
+
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+from models import db, AdminUser
+from utils.password import PasswordHasher, PasswordHasherBusy, VerificationMemo
+
+def test_hash_and_verify_use_configured_rounds():
+    hasher = PasswordHasher(max_workers=1, queue_size=0, rounds=5)
+    try:
+        password_hash = hasher.hash('123456')
+        assert password_hash.startswith('$2b$05$')
+        assert hasher.verify('123456', password_hash)
+        assert not hasher.verify('654321', password_hash)
+        assert hasher.stats()['completed'] == 3
+    finally:
+        hasher.shutdown()
+
+def test_saturated_pool_rejects_immediately():
+    hasher = PasswordHasher(max_workers=1, queue_size=0, rounds=4)
+    try:
+        # 模拟唯一的执行槽位已被占用
+        hasher._slots.acquire()
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('123456')
+        assert hasher.stats()['rejected'] == 1
+    finally:
+        hasher.shutdown()
+
+def test_timed_out_task_keeps_slot_until_finished():
+    hasher = PasswordHasher(max_workers=1, queue_size=0, rounds=4, timeout=0.01)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_task():
+        started.set()
+        release.wait(5)
+        return True
+
+    try:
+        with pytest.raises(FutureTimeoutError):
+            hasher._run(slow_task)
+        assert started.wait(5)
+        # 超时的任务仍在执行，名额未归还
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('123456')
+
+        release.set()
+        hasher._executor.submit(lambda: None).result(5)
+        assert hasher.hash('123456').startswith('$2b$04$')
+    finally:
+        release.set()
+        hasher.shutdown()
+
+def test_login_returns_429_when_hasher_is_saturated(app, client):
+    with app.app_context():
+        db.session.add(AdminUser(username='admin', password='123456', role=AdminUser.ROLE_ADMIN))
+        db.session.commit()
+
+    hasher = PasswordHasher(max_workers=1, queue_size=0, rounds=4)
+    app.extensions['password_hasher'] = hasher
+    credentials = {'username': 'admin', 'password': '123456'}
+
+    hasher._slots.acquire()
+    response = client.post('/api/admin/login', json=credentials)
+    assert response.status_code == 429
+
+    hasher._slots.release()
+    response = client.post('/api/admin/login', json=credentials)
+    assert response.status_code == 200
+    hasher.shutdown()
+
+def test_verification_memo_skips_repeated_bcrypt():
+    hasher = PasswordHasher(max_workers=1, queue_size=0, rounds=4, memo=VerificationMemo(ttl=60))
+    try:
+        password_hash = hasher.hash('123456')
+        key = ('admin_user', 1)
+        assert hasher.verify('123456', password_hash, memo_key=key)
+        assert hasher.verify('123456', password_hash, memo_key=key)
+        assert not hasher.verify('654321', password_hash, memo_key=key)
+        # 密码哈希变化后旧记录不再生效
+        assert not hasher.verify('123456', hasher.hash('abcdef'), memo_key=key)
+        stats = hasher.stats()
+        assert stats['memo_hits'] == 1
+        assert stats['completed'] == 5
+    finally:
+        hasher.shutdown()
+
+def test_login_rehashes_when_cost_changes(app, client):
+    with app.app_context():
+        user = AdminUser(username='admin', password='123456', role=AdminUser.ROLE_ADMIN)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        assert user.password_hash.startswith('$2b$04$')
+
+    app.extensions['password_hasher'] = PasswordHasher(max_workers=1, queue_size=4, rounds=5)
+    response = client.post('/api/admin/login', json={'username': 'admin', 'password': '123456'})
+    assert response.status_code == 200
+
+    with app.app_context():
+        user = db.session.get(AdminUser, user_id)
+        assert user.password_hash.startswith('$2b$05$')
+        assert user.check_password('123456')
+    app.extensions['password_hasher'].shutdown()
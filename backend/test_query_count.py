@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表接口查询次数测试
+每个列表接口执行的SQL条数应为固定值，不随返回行数增长
+"""
+
+import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
+from models import db, Wheelchair, FormalOrder, OperationLog, AdminUser
+
+@contextmanager
+def count_queries(app):
+    statements = []
+
+    def before_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_execute)
+
+def seed(app, count):
+    with app.app_context():
+        operator = AdminUser.query.first()
+        for i in range(count):
+            wheelchair = Wheelchair(name=f'轮椅{i}', price=100.0, stock=1)
+            db.session.add(wheelchair)
+            db.session.flush()
+            db.session.add(FormalOrder('测试用户', '13800138000', '测试地址', wheelchair.id, 100.0))
+            db.session.add(OperationLog(operator.id, OperationLog.TYPE_ADD_WHEELCHAIR, wheelchair.id))
+        db.session.commit()
+
+LIST_ENDPOINTS = [
+    ('/api/wheelchair/search?limit=50', 1),
+    ('/api/admin/inventory/list?limit=50', 2),
+    ('/api/admin/order/list?limit=50', 2),
+    ('/api/admin/order/list?limit=50&cursor=', 2),
+    ('/api/admin/log/list?limit=50', 2),
+    ('/api/admin/log/list?limit=50&cursor=', 2),
+    ('/api/admin/user/list?limit=50', 2),
+]
+
+@pytest.mark.parametrize('url, expected', LIST_ENDPOINTS)
+def test_list_endpoint_query_count_is_constant(app, client, admin_headers, url, expected):
+    seed(app, 30)
+
+    with count_queries(app) as statements:
+        response = client.get(url, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert len(response.get_json()['data']['list']) > 0
+    # 管理端接口包含一次权限校验查询
+    assert len(statements) == expected
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+只读副本路由测试
+副本用主库文件的拷贝代替：拷贝之后写入主库的数据相当于尚未复制到副本
+"""
+
+import os
+import shutil
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from models import db, FormalOrder, Wheelchair
+from models.wheelchair import init_db, init_search_index
+from routes import client_bp, admin_bp
+from utils.cache import get_catalogue_cache
+from utils.replica import get_replica_router
+from test_dashboard_stats import place_order
+
+@pytest.fixture
+def app(tmp_path):
+    """配置了 replica 绑定的测试应用（覆盖 conftest 中的同名夹具）"""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "primary.db"}'
+    test_app.config['SQLALCHEMY_BINDS'] = {'replica': f'sqlite:///{tmp_path / "replica.db"}'}
+    test_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    test_app.config['JWT_SECRET_KEY'] = 'test-jwt-secret-key-for-wheelchair-rental'
+    test_app.config['TESTING'] = True
+    test_app.config['BCRYPT_ROUNDS'] = 4
+    test_app.config['CATALOGUE_CACHE_SIZE'] = 0
+
+    db.init_app(test_app)
+    JWTManager(test_app)
+    test_app.register_blueprint(client_bp, url_prefix='/api')
+    test_app.register_blueprint(admin_bp, url_prefix='/api/admin')
+
+    with test_app.app_context():
+        init_db(db)
+        db.create_all()
+        init_search_index(db)
+
+    yield test_app
+
+    with test_app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # 共享db实例按绑定保存元数据，移除后其他测试的 create_all 不再涉及副本
+    db.metadatas.pop('replica', None)
+
+def replicate(app, tmp_path):
+    """把主库当前数据复制到副本"""
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    shutil.copy(tmp_path / 'primary.db', tmp_path / 'replica.db')
+
+def add_wheelchair(app, name):
+    with app.app_context():
+        wheelchair = Wheelchair(name=name, price=100.0, stock=5)
+        db.session.add(wheelchair)
+        db.session.commit()
+        return wheelchair.id
+
+def test_reads_use_replica_and_fall_back_on_lag(app, client, admin_headers, tmp_path):
+    replicated_id = add_wheelchair(app, '已复制轮椅')
+    replicate(app, tmp_path)
+    add_wheelchair(app, '未复制轮椅')
+
+    # 目录浏览和管理端列表读取副本
+    assert client.get('/api/wheelchair/search').get_json()['data']['total'] == 1
+    response = client.get('/api/admin/inventory/list', headers=admin_headers)
+    assert response.get_json()['data']['total'] == 1
+
+    # 下单写入主库，随后查询详情时副本尚无该订单，回到主库查询
+    order_id = place_order(client, replicated_id)
+    with app.app_context():
+        order_no = db.session.get(FormalOrder, order_id).order_no
+        assert Wheelchair.get_by_id(replicated_id).stock == 4
+    response = client.get(f'/api/order/detail/{order_no}')
+    assert response.status_code == 200
+    assert response.get_json()['data']['order_no'] == order_no
+
+    with app.app_context():
+        stats = get_replica_router().stats()
+    assert stats['fallbacks'] == 1
+    assert stats['replica_requests'] >= 3
+    assert stats['available']
+
+def test_replica_failure_falls_back_to_primary(app, client, admin_headers, tmp_path):
+    add_wheelchair(app, '主库轮椅')
+    # 副本文件存在但没有表结构，查询时报错
+    with app.app_context():
+        db.engines['replica'].dispose()
+    os.remove(tmp_path / 'replica.db')
+
+    response = client.get('/api/wheelchair/search')
+    assert response.status_code == 200
+    assert response.get_json()['data']['total'] == 1
+
+    with app.app_context():
+        stats = get_replica_router().stats()
+    assert stats['errors'] >= 1
+    assert not stats['available']
+
+    # 暂停期间的请求直接使用主库
+    assert client.get('/api/admin/order/list', headers=admin_headers).status_code == 200
+    with app.app_context():
+        assert get_replica_router().stats()['fallbacks'] == 1
+
+def test_replica_reads_not_cached_right_after_invalidation(app, client, tmp_path):
+    app.config['CATALOGUE_CACHE_SIZE'] = 16
+    wheelchair_id = add_wheelchair(app, '旧名称')
+    replicate(app, tmp_path)
+
+    # 主库改名并失效缓存，副本尚未复制
+    with app.app_context():
+        Wheelchair.get_by_id(wheelchair_id).name = '新名称'
+        db.session.commit()
+        get_catalogue_cache().invalidate(wheelchair_id)
+    assert client.get(f'/api/wheelchair/detail/{wheelchair_id}').get_json()['data']['name'] == '旧名称'
+
+    # 副本追上主库后立即读到新数据（旧数据没有写入缓存）
+    replicate(app, tmp_path)
+    assert client.get(f'/api/wheelchair/detail/{wheelchair_id}').get_json()['data']['name'] == '新名称'
+    with app.app_context():
+        assert get_catalogue_cache().stats()['detail']['size'] == 0
+
+        # 超过最大复制延迟后副本结果正常写入缓存
+        get_catalogue_cache().settle_seconds = 0
+    client.get(f'/api/wheelchair/detail/{wheelchair_id}')
+    with app.app_context():
+        assert get_catalogue_cache().stats()['detail']['size'] == 1
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多worker共享缓存测试：Redis存储与发布/订阅失效
+"""
+
+import time
+
+import fakeredis
+
+from utils.cache import CatalogueCache, InvalidationBus, MemoryCache, RedisCache
+
+def make_node(server):
+    """模拟一个worker：独立的客户端、目录缓存和失效总线"""
+    client = fakeredis.FakeRedis(server=server)
+    bus = InvalidationBus(client)
+    cache = CatalogueCache(
+        RedisCache(client, 'catalogue:search', ttl=60),
+        RedisCache(client, 'catalogue:detail', ttl=60),
+        bus=bus
+    )
+    return cache, bus
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+def test_redis_cache_is_shared_between_workers():
+    server = fakeredis.FakeServer()
+    first, _ = make_node(server)
+    second, _ = make_node(server)
+
+    payload = {'list': [{'id': 1, 'name': '共享轮椅'}], 'total': 1}
+    first.set_search('轮椅', 'default', 1, 10, 'exact', payload)
+    first.set_detail(1, {'id': 1, 'stock': 3})
+
+    assert second.get_search('轮椅', 'default', 1, 10, 'exact') == payload
+    assert second.get_detail(1) == {'id': 1, 'stock': 3}
+    assert second.get_detail(2) is None
+
+    second.detail_cache.delete(1)
+    assert first.get_detail(1) is None
+
+    # 命中统计批量写入，读取统计前写入另一个worker累计的计数
+    second.detail_cache.flush_stats()
+    stats = first.stats()['detail']
+    assert stats['backend'] == 'redis'
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+
+def test_invalidation_is_broadcast_to_other_workers():
+    server = fakeredis.FakeServer()
+    client = fakeredis.FakeRedis(server=server)
+    # 两个worker各自使用进程内缓存，只通过总线同步失效
+    buses = [InvalidationBus(client), InvalidationBus(client)]
+    caches = [CatalogueCache(MemoryCache(), MemoryCache(), bus=bus) for bus in buses]
+    for bus in buses:
+        bus.start()
+    try:
+        for cache in caches:
+            cache.set_detail(7, {'id': 7, 'stock': 1})
+            cache.set_search('', 'default', 1, 10, 'exact', {'total': 1})
+
+        caches[0].invalidate(7)
+
+        assert caches[0].get_detail(7) is None
+        assert wait_for(lambda: caches[1].get_detail(7) is None)
+        assert caches[1].get_search('', 'default', 1, 10, 'exact') is None
+        assert buses[0].stats()['published'] == 1
+        assert buses[1].stats()['received'] == 1
+        # 本节点发出的消息不会被自身重复处理
+        assert buses[0].stats()['received'] == 0
+    finally:
+        for bus in buses:
+            bus.stop()
+
+def test_hit_stats_are_written_in_batches():
+    client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+    cache = RedisCache(client, 'catalogue:detail', ttl=60, stats_batch=5)
+    cache.set(1, {'id': 1})
+    for _ in range(4):
+        cache.get(1)
+    assert client.hgetall('catalogue:detail:__stats__') == {}
+
+    cache.get(2)
+    assert client.hgetall('catalogue:detail:__stats__') == {b'hits': b'4', b'misses': b'1'}
+    cache.get(1)
+    assert cache.stats()['hits'] == 5
+
+def test_subscribers_do_not_clear_shared_store():
+    server = fakeredis.FakeServer()
+    (first, first_bus), (second, second_bus) = make_node(server), make_node(server)
+    clears = []
+    second.search_cache.clear = lambda: clears.append('search')
+    for bus in (first_bus, second_bus):
+        bus.start()
+    try:
+        first.set_detail(7, {'id': 7, 'stock': 1})
+        first.set_search('', 'default', 1, 10, 'exact', {'total': 1})
+        first.invalidate(7)
+
+        # 发布方已清理共享存储，订阅方只记录失效时间
+        assert second.get_detail(7) is None
+        assert second.get_search('', 'default', 1, 10, 'exact') is None
+        assert wait_for(lambda: second_bus.stats()['received'] == 1)
+        assert clears == []
+        assert second.recently_invalidated() is False
+        second.settle_seconds = 60
+        assert second.recently_invalidated()
+    finally:
+        for bus in (first_bus, second_bus):
+            bus.stop()
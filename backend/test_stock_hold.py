@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+库存预占测试
+"""
+
+from datetime import timedelta
+from models import db, Wheelchair, TempOrder, StockHold
+
+def precreate(client, wheelchair_id):
+    return client.post('/api/order/precreate', json={
+        'name': '测试用户',
+        'phone': '13800138000',
+        'address': '测试地址',
+        'wheelchair_id': wheelchair_id
+    })
+
+def test_precreate_holds_unit_until_submit(app, client):
+    with app.app_context():
+        wheelchair = Wheelchair(name='预占测试轮椅', price=50.0, stock=1)
+        db.session.add(wheelchair)
+        db.session.commit()
+        wheelchair_id = wheelchair.id
+
+    first = precreate(client, wheelchair_id)
+    assert first.status_code == 200
+    assert precreate(client, wheelchair_id).status_code == 400
+
+    detail = client.get(f'/api/wheelchair/detail/{wheelchair_id}').get_json()['data']
+    assert detail['stock'] == 1
+    assert detail['available_stock'] == 0
+
+    pre_order_id = first.get_json()['data']['pre_order_id']
+    assert client.post('/api/order/submit', json={'pre_order_id': pre_order_id}).status_code == 200
+    with app.app_context():
+        assert StockHold.query.count() == 0
+        assert Wheelchair.get_by_id(wheelchair_id).stock == 0
+
+def test_expired_hold_is_released(app, client):
+    with app.app_context():
+        wheelchair = Wheelchair(name='预占测试轮椅', price=50.0, stock=1)
+        db.session.add(wheelchair)
+        db.session.commit()
+        wheelchair_id = wheelchair.id
+
+    pre_order_id = precreate(client, wheelchair_id).get_json()['data']['pre_order_id']
+
+    # 将预占时间拨回到过期之前
+    with app.app_context():
+        hold = db.session.get(StockHold, pre_order_id)
+        hold.expire_time -= timedelta(minutes=TempOrder.EXPIRE_MINUTES + 1)
+        db.session.commit()
+        assert Wheelchair.get_available_stock(wheelchair_id) == 1
+
+    assert precreate(client, wheelchair_id).status_code == 200
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+过期预订单清理测试
+"""
+
+from datetime import datetime, timedelta
+from models import db, TempOrder
+from utils.sweeper import TempOrderSweeper
+
+def create_temp_orders(app, count, age_minutes):
+    with app.app_context():
+        for _ in range(count):
+            temp_order = TempOrder('测试用户', '13800138000', '测试地址', 1)
+            temp_order.create_time = datetime.utcnow() - timedelta(minutes=age_minutes)
+            db.session.add(temp_order)
+        db.session.commit()
+
+def test_sweeper_deletes_expired_in_bounded_batches(app):
+    create_temp_orders(app, 25, TempOrder.EXPIRE_MINUTES + 5)
+    create_temp_orders(app, 3, 1)
+
+    sweeper = TempOrderSweeper(app, interval=3600, batch_size=10)
+    assert sweeper.run_once() == 25
+
+    metrics = sweeper.get_metrics()
+    assert metrics['cycles'] == 1
+    assert metrics['last_swept'] == 25
+    assert metrics['last_batches'] == 3
+    assert metrics['last_error'] is None
+    with app.app_context():
+        assert TempOrder.query.count() == 3
+
+def test_cleanup_expired_uses_batches(app):
+    create_temp_orders(app, 12, TempOrder.EXPIRE_MINUTES + 5)
+    with app.app_context():
+        assert TempOrder.cleanup_expired(batch_size=5) == 12
+        assert TempOrder.query.count() == 0
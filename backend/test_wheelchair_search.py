@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轮椅全文搜索测试
+"""
+
+from sqlalchemy import event
+from models import db, Wheelchair
+from models.wheelchair import fulltext_available
+
+def add(app, **fields):
+    with app.app_context():
+        wheelchair = Wheelchair(price=100.0, stock=1, **fields)
+        db.session.add(wheelchair)
+        db.session.commit()
+        return wheelchair.id
+
+def search_names(app, keyword, **kwargs):
+    with app.app_context():
+        wheelchairs, total = Wheelchair.search(keyword=keyword, **kwargs)
+        return [w.name for w in wheelchairs], total
+
+def test_fulltext_matches_chinese_substrings(app):
+    add(app, name='电动轮椅豪华版', description='配备GPS定位', manufacturer='智能康复设备有限公司')
+    add(app, name='手动轮椅标准版', description='轻便耐用', manufacturer='康复器械制造厂')
+
+    with app.app_context():
+        assert fulltext_available()
+
+    assert search_names(app, '轮椅豪华') == (['电动轮椅豪华版'], 1)
+    assert search_names(app, '康复器械') == (['手动轮椅标准版'], 1)
+    assert search_names(app, 'GPS定') == (['电动轮椅豪华版'], 1)
+
+def test_fulltext_query_uses_index(app):
+    add(app, name='电动轮椅豪华版')
+    statements = []
+    with app.app_context():
+        def before_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', before_execute)
+        Wheelchair.search(keyword='轮椅豪华')
+        event.remove(db.engine, 'before_cursor_execute', before_execute)
+    assert 'MATCH' in statements[0]
+    assert 'LIKE' not in statements[0]
+
+def test_index_follows_updates_and_deletes(app):
+    wheelchair_id = add(app, name='折叠轮椅便携版')
+    with app.app_context():
+        wheelchair = Wheelchair.get_by_id(wheelchair_id)
+        wheelchair.name = '运动型轮椅'
+        db.session.commit()
+
+    assert search_names(app, '便携版')[1] == 0
+    assert search_names(app, '运动型') == (['运动型轮椅'], 1)
+
+    with app.app_context():
+        db.session.delete(Wheelchair.get_by_id(wheelchair_id))
+        db.session.commit()
+    assert search_names(app, '运动型')[1] == 0
+
+def test_short_keyword_falls_back_to_like(app):
+    add(app, name='电动轮椅豪华版')
+    add(app, name='手动轮椅标准版')
+    assert search_names(app, '电动') == (['电动轮椅豪华版'], 1)
+    assert search_names(app, '轮椅')[1] == 2
+
+def test_rank_orders_results_unless_sorted_by_price(app):
+    add(app, name='普通轮椅', description='附赠靠背坐垫')
+    add(app, name='靠背坐垫轮椅', description='靠背坐垫可拆洗，靠背坐垫加厚')
+
+    names, _ = search_names(app, '靠背坐垫')
+    assert names[0] == '靠背坐垫轮椅'
+    names, _ = search_names(app, '靠背坐垫', sort_type='price_desc')
+    assert len(names) == 2
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASGI 适配
+按 Flask 的路由表匹配请求：登记为协程的接口直接在事件循环中执行（仍在 Flask 请求上下文中，
+响应经过 after_request 处理，如CORS），其余请求通过 asgiref 在线程池中交给原有的 Flask 应用
+"""
+
+import io
+import sys
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.exceptions import HTTPException
+from utils.async_db import dispose_async_engines
+
+def scope_environ(scope):
+    """由 ASGI scope 构造 WSGI environ（协程接口均为GET，不读取请求体）"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in scope['headers']:
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = f'HTTP_{key}'
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+class AsgiApplication:
+    """Flask 应用的 ASGI 入口
+
+    Args:
+        flask_app: 已注册蓝图的 Flask 应用
+        async_views: Flask 端点名 -> 协程函数（参数为路由变量）
+    """
+
+    def __init__(self, flask_app, async_views):
+        self.flask_app = flask_app
+        self.async_views = async_views
+        self.wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            environ = scope_environ(scope)
+            try:
+                endpoint, view_args = self.flask_app.url_map.bind_to_environ(environ).match()
+            except HTTPException:
+                endpoint = None
+            view = self.async_views.get(endpoint)
+            if view is not None:
+                return await self.dispatch(view, view_args, environ, send)
+
+        await self.wsgi(scope, receive, send)
+
+    async def dispatch(self, view, view_args, environ, send):
+        """在 Flask 请求上下文中执行协程接口"""
+        app = self.flask_app
+        with app.request_context(environ):
+            try:
+                response = app.make_response(await view(**view_args))
+                response = app.process_response(response)
+            except Exception as e:
+                response = app.make_response(app.handle_exception(e))
+
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': [
+                    (name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in response.headers.items()
+                ]
+            })
+            await send({'type': 'http.response.body', 'body': response.get_data()})
+
+    async def lifespan(self, receive, send):
+        """服务启动和退出（退出时关闭异步引擎的连接池）"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await dispose_async_engines(self.flask_app)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步数据库访问
+ASGI 模式下协程接口使用的异步引擎：SQLite 使用 aiosqlite，PostgreSQL 使用 asyncpg，
+连接参数沿用同步引擎的配置档；配置了只读副本时查询优先发往副本
+"""
+
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import wraps
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from utils.engine import (
+    PROFILE_AUTO, PROFILE_POSTGRESQL_POOL, PROFILE_SQLITE_WAL, bind_profile, bind_url, engine_options,
+    resolve_profile, sqlite_pragma_listener
+)
+from utils.replica import REPLICA_BIND, get_replica_router
+
+# 数据库类型对应的异步驱动
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg'
+}
+
+PRIMARY_BIND = 'primary'
+
+# 当前请求是否把查询发往只读副本
+_use_replica = ContextVar('async_db_use_replica', default=False)
+
+def async_database_url(database_uri):
+    """同步连接地址对应的异步驱动连接地址"""
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'{backend} 数据库不支持异步模式')
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+def async_engine_options(profile, config, database_uri):
+    """配置档对应的 create_async_engine 参数"""
+    options = engine_options(profile, config)
+    if profile == PROFILE_POSTGRESQL_POOL:
+        # asyncpg 不支持 libpq 的 options 参数，语句超时通过 server_settings 设置
+        options['connect_args'] = {
+            'server_settings': {'statement_timeout': str(int(config.get('DB_STATEMENT_TIMEOUT_MS', 30000)))}
+        }
+
+    url = make_url(database_uri)
+    if url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:'):
+        # aiosqlite 文件数据库默认不复用连接，每次请求都要重新打开文件并执行PRAGMA
+        options.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=int(config.get('DB_POOL_SIZE', 10)),
+            max_overflow=int(config.get('DB_MAX_OVERFLOW', 20))
+        )
+    return options
+
+def _create_engine(app, database_uri, resolve=resolve_profile):
+    profile = resolve(database_uri, app.config.get('DB_ENGINE_PROFILE', PROFILE_AUTO))
+    engine = create_async_engine(
+        async_database_url(database_uri), **async_engine_options(profile, app.config, database_uri)
+    )
+    if profile == PROFILE_SQLITE_WAL:
+        event.listen(engine.sync_engine, 'connect', sqlite_pragma_listener(app.config))
+    return engine
+
+def get_async_engines(app=None):
+    """获取当前应用的异步引擎（首次调用时创建，需在事件循环中调用）
+
+    Returns:
+        dict: primary 为主库引擎；配置了只读副本时 replica 为副本引擎
+    """
+    app = app or current_app._get_current_object()
+    engines = app.extensions.get('async_db_engines')
+    if engines is None:
+        engines = {PRIMARY_BIND: _create_engine(app, app.config['SQLALCHEMY_DATABASE_URI'])}
+        router = get_replica_router(app)
+        if router is not None:
+            engines[REPLICA_BIND] = _create_engine(
+                app, bind_url(app.config['SQLALCHEMY_BINDS'][REPLICA_BIND]), resolve=bind_profile
+            )
+            router.watch(engines[REPLICA_BIND].sync_engine)
+        app.extensions['async_db_engines'] = engines
+    return engines
+
+async def dispose_async_engines(app):
+    """关闭异步引擎的连接池（ASGI 服务退出时调用）"""
+    engines = app.extensions.pop('async_db_engines', None) or {}
+    for engine in engines.values():
+        await engine.dispose()
+
+@asynccontextmanager
+async def async_session():
+    """异步只读会话（被 async_read_replica 装饰的接口中优先使用副本）"""
+    engines = get_async_engines()
+    router = get_replica_router()
+    engine = engines[PRIMARY_BIND]
+    if _use_replica.get() and router is not None and router.available():
+        engine = engines[REPLICA_BIND]
+    async with AsyncSession(engine) as session:
+        yield session
+
+def reading_from_replica():
+    """当前协程接口的查询是否发送到只读副本（副本结果可能落后于主库）"""
+    router = get_replica_router()
+    return _use_replica.get() and router is not None and router.available()
+
+def async_read_replica(view):
+    """把协程接口中的查询路由到只读副本（与 utils.replica.read_replica 相同：404或5xx时在主库上重新执行）"""
+    @wraps(view)
+    async def decorated_function(*args, **kwargs):
+        router = get_replica_router()
+        if router is None or not router.available():
+            return await view(*args, **kwargs)
+
+        router.record('replica_requests')
+        token = _use_replica.set(True)
+        try:
+            response = current_app.make_response(await view(*args, **kwargs))
+        except Exception:
+            response = None
+        finally:
+            _use_replica.reset(token)
+
+        if response is not None and response.status_code != 404 and response.status_code < 500:
+            return response
+
+        router.record('fallbacks')
+        return await view(*args, **kwargs)
+
+    return decorated_function
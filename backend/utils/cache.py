@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缓存工具
+可插拔的缓存存储（进程内 LRU/TTL、Redis 协议网络存储）、跨进程失效消息总线，
+以及轮椅目录（搜索结果、详情）的读缓存
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # 仅在配置了 Redis 存储或失效总线时需要
+    redis = None
+
+class CacheBackend:
+    """缓存存储接口
+
+    实现类需提供 get/set/delete/clear/stats，get 在不存在或过期时返回None。
+    shared 为True表示各worker共享同一份数据（收到失效广播时无需再次清理）。
+    """
+
+    shared = False
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+class MemoryCache(CacheBackend):
+    """进程内LRU缓存，支持过期时间，线程安全（多worker部署时各进程独立）"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        """初始化缓存
+
+        Args:
+            maxsize: 最大条目数，超出时淘汰最久未使用的条目
+            ttl: 默认过期时间（秒）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """获取缓存值，不存在或已过期时返回None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """写入缓存值"""
+        expire_at = time.monotonic() + (ttl or self.ttl)
+        with self._lock:
+            self._data[key] = (value, expire_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """删除缓存值"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """获取命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+class RedisCache(CacheBackend):
+    """Redis协议网络缓存，多个worker共享同一份数据
+
+    键以命名空间为前缀，值以JSON序列化保存。命中统计先在本进程累计，每 stats_batch
+    次读取合并为一次 HINCRBY 写入Redis（读取统计时也会先写入本进程的计数），
+    各worker看到的全局计数最多落后其他worker未写入的部分。
+    """
+
+    shared = True
+
+    def __init__(self, client, namespace, ttl=60, stats_batch=100):
+        """初始化缓存
+
+        Args:
+            client: redis.Redis 客户端（或兼容实现，如 fakeredis）
+            namespace: 键前缀
+            ttl: 默认过期时间（秒）
+            stats_batch: 命中统计每累计多少次读取写入一次Redis
+        """
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stats_batch = stats_batch
+        self._stats_key = f'{namespace}:__stats__'
+        self._pending = {'hits': 0, 'misses': 0}
+        self._pending_lock = threading.Lock()
+
+    def _key(self, key):
+        if isinstance(key, (tuple, list)):
+            key = json.dumps(key, ensure_ascii=False)
+        return f'{self.namespace}:{key}'
+
+    def get(self, key):
+        raw = self.client.get(self._key(key))
+        with self._pending_lock:
+            self._pending['hits' if raw is not None else 'misses'] += 1
+            flush = sum(self._pending.values()) >= self.stats_batch
+        if flush:
+            self.flush_stats()
+        return json.loads(raw) if raw is not None else None
+
+    def flush_stats(self):
+        """把本进程累计的命中统计写入Redis"""
+        with self._pending_lock:
+            pending = {name: count for name, count in self._pending.items() if count}
+            self._pending = {'hits': 0, 'misses': 0}
+        if not pending:
+            return
+        pipeline = self.client.pipeline(transaction=False)
+        for name, count in pending.items():
+            pipeline.hincrby(self._stats_key, name, count)
+        pipeline.execute()
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self._key(key), json.dumps(value, ensure_ascii=False), ex=ttl or self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def clear(self):
+        keys = [key for key in self.client.scan_iter(match=f'{self.namespace}:*', count=500)
+                if key not in (self._stats_key, self._stats_key.encode('utf-8'))]
+        for start in range(0, len(keys), 500):
+            self.client.delete(*keys[start:start + 500])
+
+    def stats(self):
+        self.flush_stats()
+        counters = {
+            (k.decode('utf-8') if isinstance(k, bytes) else k): int(v)
+            for k, v in self.client.hgetall(self._stats_key).items()
+        }
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        total = hits + misses
+        return {
+            'backend': 'redis',
+            'ttl': self.ttl,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else 0.0
+        }
+
+class InvalidationBus:
+    """基于Redis发布/订阅的缓存失效消息总线
+
+    数据变更后通过 publish(scope, **payload) 广播消息，各worker的订阅线程收到后
+    调用该 scope 注册的处理函数；本进程发出的消息不会重复处理。
+    """
+
+    CHANNEL = 'wheelrent:cache:invalidate'
+
+    def __init__(self, client, channel=None):
+        self.client = client
+        self.channel = channel or self.CHANNEL
+        self.node_id = uuid.uuid4().hex
+        self._handlers = {}
+        self._pubsub = None
+        self._thread = None
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, scope, handler):
+        """注册消息处理函数，handler 接收消息中的 payload 字典"""
+        self._handlers.setdefault(scope, []).append(handler)
+
+    def publish(self, scope, **payload):
+        """广播失效消息"""
+        message = json.dumps({'scope': scope, 'origin': self.node_id, 'payload': payload})
+        try:
+            self.client.publish(self.channel, message)
+            self.published += 1
+        except Exception as e:
+            # 广播失败不影响主流程，其他worker的缓存依靠TTL过期
+            print(f"发布缓存失效消息失败: {str(e)}")
+
+    def dispatch(self, raw):
+        """处理一条收到的消息"""
+        message = json.loads(raw)
+        if message.get('origin') == self.node_id:
+            return
+        self.received += 1
+        for handler in self._handlers.get(message.get('scope'), []):
+            handler(message.get('payload') or {})
+
+    def start(self):
+        """启动订阅线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(self.channel)
+        self._thread = threading.Thread(target=self._listen, name='cache-invalidation', daemon=True)
+        self._thread.start()
+
+    def _listen(self):
+        while self._pubsub is not None:
+            try:
+                message = self._pubsub.get_message(timeout=1.0)
+                if message and message.get('type') == 'message':
+                    self.dispatch(message['data'])
+            except Exception as e:
+                if self._pubsub is None:
+                    break
+                print(f"处理缓存失效消息失败: {str(e)}")
+                time.sleep(1.0)
+
+    def stop(self):
+        """停止订阅线程"""
+        pubsub, self._pubsub = self._pubsub, None
+        if self._thread:
+            self._thread.join(2.0)
+        if pubsub is not None:
+            pubsub.close()
+
+    def stats(self):
+        return {'published': self.published, 'received': self.received}
+
+class CatalogueCache:
+    """轮椅目录读缓存
+
+    缓存序列化后的 to_dict() 结果：搜索结果按 (keyword, sort_type, page, limit, count_mode)
+    缓存，详情按轮椅ID缓存。后台库存写入、下单扣减库存、取消订单恢复库存时调用
+    invalidate() 失效；搜索结果受任意轮椅变更影响，失效时整体清空。
+    配置了失效总线时，失效操作会广播到其他worker。
+
+    只读副本落后于主库时，失效后立即从副本读到的仍是旧数据，若写入缓存会在整个TTL内
+    返回旧数据；失效后 settle_seconds 秒内 recently_invalidated() 为True，此时接口
+    从副本读取的结果不写入缓存。
+    """
+
+    SCOPE = 'catalogue'
+
+    def __init__(self, search_cache, detail_cache, bus=None, settle_seconds=0):
+        self.search_cache = search_cache
+        self.detail_cache = detail_cache
+        self.bus = bus
+        self.settle_seconds = settle_seconds
+        self._invalidated_at = None
+        if bus is not None:
+            bus.subscribe(self.SCOPE, self._on_invalidate)
+
+    def get_search(self, keyword, sort_type, page, limit, count_mode):
+        return self.search_cache.get((keyword, sort_type, page, limit, count_mode))
+
+    def set_search(self, keyword, sort_type, page, limit, count_mode, payload):
+        self.search_cache.set((keyword, sort_type, page, limit, count_mode), payload)
+
+    def get_detail(self, wheelchair_id):
+        return self.detail_cache.get(wheelchair_id)
+
+    def set_detail(self, wheelchair_id, payload):
+        self.detail_cache.set(wheelchair_id, payload)
+
+    def invalidate(self, wheelchair_id=None, search=True):
+        """失效目录缓存并广播
+
+        Args:
+            wheelchair_id: 变更的轮椅ID，为空时清空全部详情缓存
+            search: 是否同时清空搜索结果缓存
+        """
+        self._apply(wheelchair_id, search)
+        if self.bus is not None:
+            self.bus.publish(self.SCOPE, wheelchair_id=wheelchair_id, search=search)
+
+    def recently_invalidated(self):
+        """最近 settle_seconds 秒内是否发生过失效（本进程或收到的广播）"""
+        invalidated_at = self._invalidated_at
+        return invalidated_at is not None and time.monotonic() - invalidated_at < self.settle_seconds
+
+    def _apply(self, wheelchair_id, search, skip_shared=False):
+        self._invalidated_at = time.monotonic()
+        if not (skip_shared and self.detail_cache.shared):
+            if wheelchair_id is None:
+                self.detail_cache.clear()
+            else:
+                self.detail_cache.delete(wheelchair_id)
+        if search and not (skip_shared and self.search_cache.shared):
+            self.search_cache.clear()
+
+    def _on_invalidate(self, payload):
+        # 共享存储（Redis）已由发布方清理，其他worker只清理进程内存储
+        self._apply(payload.get('wheelchair_id'), payload.get('search', True), skip_shared=True)
+
+    def stats(self):
+        data = {
+            'search': self.search_cache.stats(),
+            'detail': self.detail_cache.stats()
+        }
+        if self.bus is not None:
+            data['invalidation'] = self.bus.stats()
+        return data
+
+class PrincipalCache:
+    """管理端身份缓存
+
+    按JWT身份（用户ID）缓存管理用户的 id 与 role，权限装饰器命中缓存时无需查询
+    admin_user 表。用户不存在或已删除时不缓存；角色变更、逻辑删除后调用
+    invalidate() 失效，配置了失效总线时同时广播到其他worker。
+    """
+
+    SCOPE = 'admin_principal'
+
+    def __init__(self, cache, bus=None):
+        self.cache = cache
+        self.bus = bus
+        if bus is not None and not cache.shared:
+            bus.subscribe(self.SCOPE, lambda payload: self.cache.delete(payload.get('user_id')))
+
+    def get(self, user_id):
+        return self.cache.get(user_id)
+
+    def set(self, user_id, principal):
+        self.cache.set(user_id, principal)
+
+    def invalidate(self, user_id):
+        """失效指定用户的身份缓存并广播"""
+        self.cache.delete(user_id)
+        if self.bus is not None:
+            self.bus.publish(self.SCOPE, user_id=user_id)
+
+    def stats(self):
+        return self.cache.stats()
+
+def get_redis_client(app=None):
+    """获取当前应用的Redis客户端（按 CACHE_REDIS_URL 创建，未配置时返回None）"""
+    app = app or current_app
+    client = app.extensions.get('cache_redis_client')
+    if client is None:
+        url = app.config.get('CACHE_REDIS_URL')
+        if not url:
+            return None
+        if redis is None:
+            raise RuntimeError('配置了 CACHE_REDIS_URL 但未安装 redis 依赖')
+        client = app.extensions.setdefault('cache_redis_client', redis.Redis.from_url(url))
+    return client
+
+def get_invalidation_bus(app=None):
+    """获取当前应用的失效消息总线（未配置Redis时返回None）"""
+    app = app or current_app
+    bus = app.extensions.get('cache_invalidation_bus')
+    if bus is None:
+        client = get_redis_client(app)
+        if client is None:
+            return None
+        bus = InvalidationBus(client)
+        if app.extensions.setdefault('cache_invalidation_bus', bus) is bus:
+            bus.start()
+        bus = app.extensions['cache_invalidation_bus']
+    return bus
+
+def create_cache(app, namespace, maxsize, ttl):
+    """按 CACHE_BACKEND 配置创建缓存存储（memory 或 redis）"""
+    if app.config.get('CACHE_BACKEND', 'memory') == 'redis':
+        return RedisCache(get_redis_client(app), namespace, ttl)
+    return MemoryCache(maxsize, ttl)
+
+def get_catalogue_cache(app=None):
+    """获取当前应用的目录缓存（首次调用时按配置创建）
+
+    配置项:
+        CACHE_BACKEND: 缓存存储，memory（默认，进程内）或 redis（多worker共享）
+        CACHE_REDIS_URL: Redis地址，配置后启用跨worker失效广播
+        CATALOGUE_CACHE_SIZE: 进程内缓存每类的最大条目数，默认1024
+        CATALOGUE_CACHE_TTL: 缓存过期时间（秒），默认60
+        REPLICA_MAX_LAG: 只读副本的最大复制延迟（秒），默认5；失效后这段时间内
+            从副本读取的结果不写入缓存
+    """
+    app = app or current_app
+    cache = app.extensions.get('catalogue_cache')
+    if cache is None:
+        maxsize = app.config.get('CATALOGUE_CACHE_SIZE', 1024)
+        ttl = app.config.get('CATALOGUE_CACHE_TTL', 60)
+        cache = CatalogueCache(
+            create_cache(app, 'catalogue:search', maxsize, ttl),
+            create_cache(app, 'catalogue:detail', maxsize, ttl),
+            bus=get_invalidation_bus(app),
+            settle_seconds=app.config.get('REPLICA_MAX_LAG', 5)
+        )
+        cache = app.extensions.setdefault('catalogue_cache', cache)
+    return cache
+
+def get_principal_cache(app=None):
+    """获取当前应用的管理端身份缓存（首次调用时按配置创建）
+
+    配置项:
+        ADMIN_PRINCIPAL_CACHE_SIZE: 进程内缓存最大条目数，默认1024
+        ADMIN_PRINCIPAL_CACHE_TTL: 缓存过期时间（秒），默认30；
+            未配置失效广播的多worker部署中，即为权限变更生效的最长延迟
+    """
+    app = app or current_app
+    cache = app.extensions.get('admin_principal_cache')
+    if cache is None:
+        cache = PrincipalCache(
+            create_cache(
+                app, 'admin:principal',
+                app.config.get('ADMIN_PRINCIPAL_CACHE_SIZE', 1024),
+                app.config.get('ADMIN_PRINCIPAL_CACHE_TTL', 30)
+            ),
+            bus=get_invalidation_bus(app)
+        )
+        cache = app.extensions.setdefault('admin_principal_cache', cache)
+    return cache
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库引擎配置档
+按数据库类型选择连接参数：SQLite 开启WAL并在每个连接上设置PRAGMA，
+读写互不阻塞；PostgreSQL 使用有界连接池并设置语句超时
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+PROFILE_AUTO = 'auto'
+PROFILE_DEFAULT = 'default'
+PROFILE_SQLITE_WAL = 'sqlite_wal'
+PROFILE_POSTGRESQL_POOL = 'postgresql_pool'
+VALID_PROFILES = [PROFILE_AUTO, PROFILE_DEFAULT, PROFILE_SQLITE_WAL, PROFILE_POSTGRESQL_POOL]
+
+def resolve_profile(database_uri, profile=PROFILE_AUTO):
+    """确定实际使用的配置档
+
+    Args:
+        database_uri: 数据库连接地址
+        profile: 配置的配置档，auto 按数据库类型选择
+
+    Returns:
+        str: default、sqlite_wal 或 postgresql_pool
+    """
+    if profile not in VALID_PROFILES:
+        raise ValueError(f'无效的数据库引擎配置档: {profile}')
+
+    backend = make_url(database_uri).get_backend_name()
+    if profile == PROFILE_AUTO:
+        if backend == 'sqlite':
+            return PROFILE_SQLITE_WAL
+        if backend == 'postgresql':
+            return PROFILE_POSTGRESQL_POOL
+        return PROFILE_DEFAULT
+
+    expected = {PROFILE_SQLITE_WAL: 'sqlite', PROFILE_POSTGRESQL_POOL: 'postgresql'}.get(profile)
+    if expected and backend != expected:
+        raise ValueError(f'配置档 {profile} 不适用于 {backend} 数据库')
+    return profile
+
+def bind_profile(database_uri, profile=PROFILE_AUTO):
+    """附加绑定（如只读副本）使用的配置档
+
+    配置的配置档不适用于该绑定的数据库类型时（如主库SQLite、副本PostgreSQL），
+    按绑定自身的数据库类型自动选择。
+    """
+    if profile not in VALID_PROFILES:
+        raise ValueError(f'无效的数据库引擎配置档: {profile}')
+    try:
+        return resolve_profile(database_uri, profile)
+    except ValueError:
+        return resolve_profile(database_uri, PROFILE_AUTO)
+
+def bind_engine_options(binds, profile, config):
+    """按各绑定自己的连接地址确定配置档和连接参数
+
+    Args:
+        binds: SQLALCHEMY_BINDS 配置（值为连接地址或含 url 的参数字典）
+        profile: 配置的配置档
+        config: 应用配置
+
+    Returns:
+        tuple: (带连接参数的 SQLALCHEMY_BINDS, 绑定名 -> 配置档)
+    """
+    options, profiles = {}, {}
+    for key, value in (binds or {}).items():
+        bind = dict(value) if isinstance(value, dict) else {'url': value}
+        profiles[key] = bind_profile(bind['url'], profile)
+        # 绑定中显式配置的参数优先于配置档
+        options[key] = dict(engine_options(profiles[key], config), **bind)
+    return options, profiles
+
+def bind_url(bind):
+    """SQLALCHEMY_BINDS 中一项的连接地址"""
+    return bind['url'] if isinstance(bind, dict) else bind
+
+def sqlite_pragmas(config):
+    """SQLite WAL 配置档在每个新连接上执行的PRAGMA"""
+    return [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA mmap_size={int(config.get('SQLITE_MMAP_SIZE', 268435456))}",
+        # 负数表示以KB为单位
+        f"PRAGMA cache_size=-{int(config.get('SQLITE_CACHE_SIZE_KB', 65536))}",
+    ]
+
+def sqlite_pragma_listener(config):
+    """在新连接上执行 sqlite_pragmas 的 connect 事件监听函数"""
+    pragmas = sqlite_pragmas(config)
+
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return apply_pragmas
+
+def engine_options(profile, config):
+    """配置档对应的 create_engine 参数"""
+    if profile == PROFILE_SQLITE_WAL:
+        # pysqlite 的 timeout 与 busy_timeout 一致，连接建立阶段同样等待锁
+        return {'connect_args': {'timeout': int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000}}
+
+    if profile == PROFILE_POSTGRESQL_POOL:
+        return {
+            'pool_size': int(config.get('DB_POOL_SIZE', 10)),
+            'max_overflow': int(config.get('DB_MAX_OVERFLOW', 20)),
+            'pool_timeout': int(config.get('DB_POOL_TIMEOUT', 30)),
+            'pool_recycle': int(config.get('DB_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': True,
+            'connect_args': {
+                'options': f"-c statement_timeout={int(config.get('DB_STATEMENT_TIMEOUT_MS', 30000))}"
+            }
+        }
+
+    return {}
+
+def init_engine(app, database):
+    """按配置档设置引擎参数并初始化数据库扩展（替代 database.init_app(app)）
+
+    配置项:
+        DB_ENGINE_PROFILE: auto（默认）、default、sqlite_wal 或 postgresql_pool
+        SQLITE_BUSY_TIMEOUT_MS: 等待写锁的最长时间，默认5000
+        SQLITE_MMAP_SIZE: 内存映射读取的字节数，默认256MB
+        SQLITE_CACHE_SIZE_KB: 每个连接的页缓存大小，默认64MB
+        DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT / DB_POOL_RECYCLE: PostgreSQL连接池参数
+        DB_STATEMENT_TIMEOUT_MS: PostgreSQL语句超时，默认30000
+
+    SQLALCHEMY_BINDS 中的附加绑定（如只读副本）按各自的连接地址确定配置档，
+    SQLite 主库的 timeout 不会用于 PostgreSQL 副本，反之亦然。
+
+    Returns:
+        str: 主库实际使用的配置档
+    """
+    configured = app.config.get('DB_ENGINE_PROFILE', PROFILE_AUTO)
+    profile = resolve_profile(app.config['SQLALCHEMY_DATABASE_URI'], configured)
+
+    # 显式配置的引擎参数优先于配置档（SQLALCHEMY_ENGINE_OPTIONS 只作用于主库）
+    options = engine_options(profile, app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    binds, profiles = bind_engine_options(app.config.get('SQLALCHEMY_BINDS'), configured, app.config)
+    if binds:
+        app.config['SQLALCHEMY_BINDS'] = binds
+    profiles[None] = profile
+    database.init_app(app)
+
+    # 主库和SQLite只读副本使用相同的PRAGMA
+    apply_pragmas = sqlite_pragma_listener(app.config)
+    with app.app_context():
+        for key, engine in database.engines.items():
+            if profiles.get(key) == PROFILE_SQLITE_WAL:
+                event.listen(engine, 'connect', apply_pragmas)
+
+    app.extensions['db_engine_profile'] = profile
+    return profile
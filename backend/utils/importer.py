@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+库存批量导入工具
+逐行读取 CSV / NDJSON，校验后按批次 executemany 写入：带 id 的行更新已有轮椅，
+不带 id 的行新增轮椅；每批一个事务、一条汇总操作日志，返回逐行错误报告
+"""
+
+import csv
+import io
+import json
+from utils.validators import sanitize_string, validate_price, validate_stock
+
+IMPORT_CSV = 'csv'
+IMPORT_NDJSON = 'ndjson'
+VALID_IMPORT_FORMATS = [IMPORT_CSV, IMPORT_NDJSON]
+
+# 错误报告最多返回的行数，超出部分只计数
+MAX_REPORTED_ERRORS = 1000
+
+def iter_import_rows(stream, import_format):
+    """逐行解析上传内容
+
+    Args:
+        stream: 二进制可读流
+        import_format: csv 或 ndjson
+
+    Yields:
+        tuple: (行号, 字典或None, 解析错误消息或None)
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if import_format == IMPORT_CSV:
+        # 第1行为表头，数据从第2行开始
+        for line_no, row in enumerate(csv.DictReader(text), start=2):
+            yield line_no, row, None
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f'JSON格式错误: {str(e)}'
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, '每行必须是JSON对象'
+            continue
+        yield line_no, row, None
+
+def validate_import_row(row):
+    """校验并规范化一行轮椅数据
+
+    Returns:
+        tuple: (规范化后的字典, 错误消息列表)
+    """
+    errors = []
+
+    wheelchair_id = row.get('id')
+    if wheelchair_id in (None, ''):
+        wheelchair_id = None
+    else:
+        try:
+            wheelchair_id = int(wheelchair_id)
+        except (ValueError, TypeError):
+            errors.append('id格式不正确')
+
+    name = sanitize_string(row.get('name'), 100)
+    if not name:
+        errors.append('轮椅名称不能为空')
+
+    price = row.get('price')
+    valid, message = validate_price(price)
+    if not valid:
+        errors.append(message)
+    elif float(price) <= 0:
+        errors.append('价格必须大于0')
+
+    stock = row.get('stock')
+    if stock in (None, ''):
+        stock = 1
+    valid, message = validate_stock(stock)
+    if not valid:
+        errors.append(message)
+
+    if errors:
+        return None, errors
+
+    return {
+        'id': wheelchair_id,
+        'name': name,
+        'price': float(price),
+        'stock': int(stock),
+        'description': sanitize_string(row.get('description')),
+        'manufacturer': sanitize_string(row.get('manufacturer'), 100)
+    }, []
+
+class InventoryImporter:
+    """轮椅库存批量导入器"""
+
+    def __init__(self, operator_id, batch_size=500):
+        """初始化导入器
+
+        Args:
+            operator_id: 操作员ID，每批写入一条汇总操作日志
+            batch_size: 每批写入的行数
+        """
+        self.operator_id = operator_id
+        self.batch_size = batch_size
+        self.total = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+
+    def _add_error(self, line_no, messages):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': line_no, 'errors': messages})
+
+    def run(self, rows):
+        """执行导入
+
+        Args:
+            rows: iter_import_rows 产生的 (行号, 字典, 解析错误) 序列
+
+        Returns:
+            dict: 导入结果及逐行错误报告
+        """
+        batch = []
+        for line_no, row, parse_error in rows:
+            self.total += 1
+            if parse_error:
+                self._add_error(line_no, [parse_error])
+                continue
+            values, errors = validate_import_row(row)
+            if errors:
+                self._add_error(line_no, errors)
+                continue
+            batch.append((line_no, values))
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+
+        return {
+            'total': self.total,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'failed': self.failed,
+            'batches': self.batches,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors)
+        }
+
+    def _write_batch(self, batch):
+        """在一个事务中写入一批数据"""
+        from sqlalchemy import insert, update
+        from models import db
+        from models.log import OperationLog
+        from models.stats import record_wheelchair_stat
+        from models.wheelchair import get_wheelchair_model
+
+        WheelchairModel = get_wheelchair_model()
+        table = WheelchairModel.__table__
+
+        # 一次查询取出本批待更新轮椅的当前库存，用于校验存在性和记录库存变化
+        update_ids = [values['id'] for _, values in batch if values['id'] is not None]
+        current_stock = dict(db.session.execute(
+            db.select(table.c.id, table.c.stock).where(table.c.id.in_(update_ids))
+        ).all()) if update_ids else {}
+
+        updates = []
+        inserts = []
+        missing = []
+        for line_no, values in batch:
+            if values['id'] is None:
+                inserts.append(dict(
+                    {key: value for key, value in values.items() if key != 'id'},
+                    is_offline=False, is_deleted=False
+                ))
+            elif values['id'] in current_stock:
+                updates.append(values)
+            else:
+                missing.append((line_no, values['id']))
+
+        try:
+            if updates:
+                # ORM按主键批量更新，executemany 一次执行
+                db.session.execute(update(WheelchairModel), updates)
+                for values in updates:
+                    wheelchair_id = values['id']
+                    record_wheelchair_stat(wheelchair_id, stock_change=values['stock'] - current_stock[wheelchair_id])
+                    # 同一批中重复出现的轮椅按最后一次写入计算库存变化
+                    current_stock[wheelchair_id] = values['stock']
+
+            if inserts:
+                if db.engine.dialect.insert_executemany_returning:
+                    created = db.session.execute(
+                        insert(table).returning(table.c.id, table.c.stock), inserts
+                    ).all()
+                else:
+                    # 不支持批量 RETURNING 的数据库逐行插入，按主键记录新轮椅的库存
+                    created = [
+                        (db.session.execute(insert(table), values).inserted_primary_key[0], values['stock'])
+                        for values in inserts
+                    ]
+                for wheelchair_id, stock in created:
+                    record_wheelchair_stat(wheelchair_id, stock_change=stock)
+
+            if updates or inserts:
+                db.session.add(OperationLog(self.operator_id, OperationLog.TYPE_IMPORT_WHEELCHAIR))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for line_no, _ in batch:
+                self._add_error(line_no, [f'写入失败: {str(e)}'])
+            return
+
+        for line_no, wheelchair_id in missing:
+            self._add_error(line_no, [f'轮椅不存在: {wheelchair_id}'])
+        self.inserted += len(inserts)
+        self.updated += len(updates)
+        self.batches += 1
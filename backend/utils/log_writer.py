@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+操作日志异步写入工具
+操作日志先进入内存队列，由后台线程每满 batch_size 条或每隔 flush_interval 秒
+批量 INSERT 一次，业务请求不再为日志单独提交事务
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import current_app, has_app_context
+
+def _try_lock(lock_file):
+    """非阻塞地对锁文件加排他锁，已被其他进程占用时抛出OSError（进程退出时自动释放）"""
+    if os.name == 'nt':
+        import msvcrt
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+class OperationLogWriter:
+    """操作日志批量写入器
+
+    两种模式:
+        有限丢失（默认）: 队列最多保留 max_queue 条，队列满时丢弃新日志并计数；
+            进程异常退出时最多丢失队列中尚未写入的日志
+        预写文件: 配置 wal_path 后每条日志先追加写入预写文件再入队，写入数据库后
+            删除对应的文件段；启动时回放遗留的文件段（至少一次，异常退出时
+            可能重复写入最后一批）。多个worker进程各自加锁占用一个编号槽位
+            （wal_path.0、wal_path.1 ...），重启后由占用同一槽位的进程回放
+    正常退出时 stop() 会写完队列中的全部日志。
+    """
+
+    def __init__(self, app, batch_size=100, flush_interval=0.2, max_queue=10000, wal_path=None):
+        """初始化写入器
+
+        Args:
+            app: Flask应用实例
+            batch_size: 队列达到该条数时立即写入，同时也是单条INSERT语句的最大行数
+            flush_interval: 最长写入间隔（秒）
+            max_queue: 有限丢失模式下队列的最大条数
+            wal_path: 预写文件路径，为空时使用有限丢失模式
+        """
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.wal_base = wal_path
+        self.wal_path = None
+        self._slot_lock_file = None
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._wal_file = None
+        self._metrics = {
+            'queued': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'recovered': 0,
+            'flushes': 0,
+            'last_batch_size': 0,
+            'last_latency_ms': 0.0,
+            'last_error': None
+        }
+
+    def submit(self, operator_id, operate_type, target_id=None, operate_time=None):
+        """提交一条操作日志
+
+        Returns:
+            bool: 是否已入队（有限丢失模式下队列满时返回False）
+        """
+        row = {
+            'operator_id': operator_id,
+            'operate_type': operate_type,
+            'target_id': target_id,
+            'operate_time': operate_time or datetime.utcnow()
+        }
+        with self._cond:
+            if self._wal_file is not None:
+                self._wal_file.write(json.dumps(dict(row, operate_time=row['operate_time'].isoformat()),
+                                                ensure_ascii=False) + '\n')
+                self._wal_file.flush()
+            elif len(self._pending) >= self.max_queue:
+                self._metrics['dropped'] += 1
+                return False
+            self._pending.append(row)
+            self._metrics['queued'] += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def flush(self):
+        """把队列中的日志全部写入数据库
+
+        Returns:
+            int: 本次写入的条数
+        """
+        with self._flush_lock:
+            with self._cond:
+                rows = list(self._pending)
+                self._pending.clear()
+                segment = self._rotate_wal() if rows else None
+            if not rows:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                self._insert(rows)
+            except Exception as e:
+                with self._cond:
+                    self._metrics['failed'] += len(rows)
+                    self._metrics['last_error'] = str(e)
+                print(f"批量写入操作日志失败: {str(e)}")
+                if segment:
+                    # 保留失败的文件段，下次启动时回放
+                    os.replace(segment, f'{self.wal_path}.{time.time_ns()}.failed')
+                return 0
+
+            if segment:
+                os.remove(segment)
+            with self._cond:
+                self._metrics['written'] += len(rows)
+                self._metrics['flushes'] += 1
+                self._metrics['last_batch_size'] = len(rows)
+                self._metrics['last_latency_ms'] = round((time.perf_counter() - start) * 1000, 3)
+                self._metrics['last_error'] = None
+            return len(rows)
+
+    def _insert(self, rows):
+        from sqlalchemy import insert
+        from models import db
+        from models.log import OperationLog
+
+        with self.app.app_context():
+            try:
+                for start in range(0, len(rows), self.batch_size):
+                    db.session.execute(insert(OperationLog), rows[start:start + self.batch_size])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _rotate_wal(self):
+        """切换预写文件，返回已切出的文件段路径（调用方持有 self._cond）"""
+        if self._wal_file is None:
+            return None
+        self._wal_file.close()
+        segment = f'{self.wal_path}.{time.time_ns()}.flushing'
+        os.replace(self.wal_path, segment)
+        self._wal_file = open(self.wal_path, 'a', encoding='utf-8')
+        return segment
+
+    def _claim_wal_slot(self):
+        """加锁占用一个未被其他进程使用的预写文件槽位"""
+        directory = os.path.dirname(os.path.abspath(self.wal_base))
+        os.makedirs(directory, exist_ok=True)
+        slot = 0
+        while True:
+            lock_file = open(f'{self.wal_base}.{slot}.lock', 'a')
+            try:
+                _try_lock(lock_file)
+            except OSError:
+                lock_file.close()
+                slot += 1
+                continue
+            self._slot_lock_file = lock_file
+            self.wal_path = f'{self.wal_base}.{slot}'
+            return self.wal_path
+
+    def recover(self):
+        """回放上次运行遗留的预写文件段
+
+        Returns:
+            int: 回放写入的条数
+        """
+        if not self.wal_path:
+            return 0
+
+        paths = sorted(glob.glob(f'{glob.escape(self.wal_path)}.*.flushing') +
+                       glob.glob(f'{glob.escape(self.wal_path)}.*.failed'))
+        if os.path.exists(self.wal_path):
+            paths.append(self.wal_path)
+
+        recovered = 0
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                rows = []
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        # 异常退出时最后一行可能不完整
+                        continue
+                    row['operate_time'] = datetime.fromisoformat(row['operate_time'])
+                    rows.append(row)
+            if rows:
+                self._insert(rows)
+            os.remove(path)
+            recovered += len(rows)
+
+        with self._cond:
+            self._metrics['recovered'] += recovered
+        if recovered:
+            print(f"已回放操作日志 {recovered} 条")
+        return recovered
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.batch_size or self._stop_event.is_set(),
+                    timeout=self.flush_interval
+                )
+            self.flush()
+
+    def start(self):
+        """回放遗留日志并启动后台写入线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        if self.wal_base:
+            if self.wal_path is None:
+                self._claim_wal_slot()
+            self.recover()
+            self._wal_file = open(self.wal_path, 'a', encoding='utf-8')
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='operation-log-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止后台线程并写完队列中的日志"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        self.flush()
+        with self._cond:
+            if self._wal_file is not None:
+                self._wal_file.close()
+                self._wal_file = None
+                if os.path.exists(self.wal_path) and os.path.getsize(self.wal_path) == 0:
+                    os.remove(self.wal_path)
+
+    def get_metrics(self):
+        """获取写入统计信息"""
+        with self._cond:
+            return dict(
+                self._metrics,
+                pending=len(self._pending),
+                batch_size=self.batch_size,
+                flush_interval=self.flush_interval,
+                mode='wal' if self.wal_base else 'bounded_loss'
+            )
+
+def get_operation_log_writer(app=None):
+    """获取当前应用的操作日志写入器，未开启异步写入时返回None
+
+    首次调用时按配置创建并启动（gunicorn每个worker进程各自启动一个），
+    进程正常退出时写完剩余日志。
+
+    配置项:
+        OPERATION_LOG_ASYNC: 是否异步批量写入，默认关闭
+        OPERATION_LOG_BATCH_SIZE: 批量写入条数，默认100
+        OPERATION_LOG_FLUSH_INTERVAL_MS: 最长写入间隔（毫秒），默认200
+        OPERATION_LOG_QUEUE_SIZE: 有限丢失模式下队列最大条数，默认10000
+        OPERATION_LOG_WAL_PATH: 预写文件路径前缀，配置后使用预写文件模式
+    """
+    if app is None and not has_app_context():
+        return None
+    # 后台线程需要真实的应用对象，而不是current_app代理
+    app = app or current_app._get_current_object()
+    if not app.config.get('OPERATION_LOG_ASYNC', False):
+        return None
+
+    writer = app.extensions.get('operation_log_writer')
+    if writer is None:
+        writer = OperationLogWriter(
+            app,
+            batch_size=app.config.get('OPERATION_LOG_BATCH_SIZE', 100),
+            flush_interval=app.config.get('OPERATION_LOG_FLUSH_INTERVAL_MS', 200) / 1000,
+            max_queue=app.config.get('OPERATION_LOG_QUEUE_SIZE', 10000),
+            wal_path=app.config.get('OPERATION_LOG_WAL_PATH')
+        )
+        if app.extensions.setdefault('operation_log_writer', writer) is writer:
+            writer.start()
+            atexit.register(writer.stop)
+        writer = app.extensions['operation_log_writer']
+    return writer
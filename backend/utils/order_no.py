@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单号生成器
+订单号格式 WR{yyyymmddHHMMSS}{节点号2位}{进程号7位}{序号4位}：
+时间与订单创建时间一致（app 使用UTC，用于定位订单分区；app_simple 使用本地时间）；
+同一进程内严格递增，节点号（ORDER_NO_NODE_ID，每台主机或容器配置不同的值）加进程号
+保证各worker之间不重复，新订单号总是落在 order_no 索引的末端附近，不再随机分散。
+同一节点的多个worker进程之间只按秒有序，同一秒内不保证递增（不做跨进程协调）
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+
+ORDER_NO_PREFIX = 'WR'
+
+# 节点号 0-99；进程号最大为 Linux 的 pid_max 上限 4194304
+MAX_NODE_ID = 99
+PID_DIGITS = 7
+
+# 每个进程每秒最多 10000 个订单号，超出时借用下一秒
+SEQUENCE_DIGITS = 4
+MAX_SEQUENCE = 10 ** SEQUENCE_DIGITS - 1
+
+class OrderNoGenerator:
+    """进程内订单号生成器（线程安全）
+
+    使用逻辑时钟：取 max(当前秒, 上次使用的秒)，同一秒内序号递增，序号用完或系统时钟
+    回拨时继续使用上次的秒之后的时间，订单号不会重复也不会倒退。
+    进程启动（或fork）所在的一秒不发号，避免与刚退出、进程号相同的旧进程重复；
+    时间由调用方传入（UTC或本地时间），首次发号时才按调用方的时钟确定启动所在的一秒。
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        """按当前进程重新初始化（fork后在子进程中调用）"""
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._started = time.monotonic()
+        self._second = None
+        self._sequence = MAX_SEQUENCE
+
+    def next(self, now=None, node_id=0):
+        """生成下一个订单号
+
+        Args:
+            now: 订单创建时间，默认当前UTC时间；早于上次发号的时间时使用上次的时间
+            node_id: 节点号 0-99
+
+        Returns:
+            str: 订单号
+        """
+        if not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f'订单号节点号必须在0到{MAX_NODE_ID}之间: {node_id}')
+
+        second = (now or datetime.utcnow()).replace(microsecond=0)
+        with self._lock:
+            if self._second is None:
+                # 启动不足1秒时当前秒可能就是启动所在的一秒，从下一秒开始发号
+                started_recently = time.monotonic() - self._started < 1
+                self._second = second if started_recently else second - timedelta(seconds=1)
+            if second > self._second:
+                self._second = second
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                self._second += timedelta(seconds=1)
+                self._sequence = 0
+            second, sequence = self._second, self._sequence
+
+        return (f'{ORDER_NO_PREFIX}{second:%Y%m%d%H%M%S}{node_id:02d}'
+                f'{self._pid % 10 ** PID_DIGITS:0{PID_DIGITS}d}{sequence:0{SEQUENCE_DIGITS}d}')
+
+# 整个进程共用一个序列（多个应用实例也不会生成相同的订单号）
+_generator = OrderNoGenerator()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_generator._reset)
+
+def next_order_no(now=None):
+    """生成订单号
+
+    配置项:
+        ORDER_NO_NODE_ID: 节点号 0-99，默认0；多台主机（容器）部署时必须各不相同
+    """
+    node_id = current_app.config.get('ORDER_NO_NODE_ID', 0) if has_app_context() else 0
+    return _generator.next(now, int(node_id))
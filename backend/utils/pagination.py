@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分页查询工具函数
+一次查询同时取回当前页数据和总数量，以及基于游标的键集分页
+"""
+
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import func, select, text, tuple_
+
+# 总数统计方式
+COUNT_EXACT = 'exact'        # 精确总数，COUNT(*) OVER() 与分页数据同一条SQL返回
+COUNT_NONE = 'none'          # 不统计总数，多取一行判断是否还有下一页
+COUNT_ESTIMATE = 'estimate'  # 估算总数（PostgreSQL 读取执行计划行数，其他数据库退化为精确统计）
+
+VALID_COUNT_MODES = [COUNT_EXACT, COUNT_NONE, COUNT_ESTIMATE]
+
+def normalize_count_mode(count_mode):
+    """规范化总数统计方式，无效值按精确统计处理"""
+    if count_mode in VALID_COUNT_MODES:
+        return count_mode
+    return COUNT_EXACT
+
+def paginate_query(query, page=1, limit=10, count_mode=COUNT_EXACT):
+    """分页查询
+
+    Args:
+        query: 已设置过滤和排序条件的查询对象
+        page: 页码
+        limit: 每页数量
+        count_mode: 总数统计方式 (exact, none, estimate)
+
+    Returns:
+        tuple: (数据列表, 总数量)
+            count_mode 为 none 时总数量为已知下界：若还有下一页，则比当前页末尾多1，
+            按常规方式计算的页数会恰好多出一页。
+    """
+    count_mode = normalize_count_mode(count_mode)
+    offset = (page - 1) * limit
+
+    if count_mode == COUNT_NONE:
+        rows = query.offset(offset).limit(limit + 1).all()
+        return rows[:limit], offset + len(rows)
+
+    if count_mode == COUNT_ESTIMATE:
+        total = _estimate_count(query)
+        if total is not None:
+            items = query.offset(offset).limit(limit).all()
+            return items, max(total, offset + len(items))
+
+    rows = (
+        query.add_columns(func.count().over().label('total_count'))
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    if rows:
+        return [row[0] for row in rows], rows[0][-1]
+
+    # 页码超出范围时窗口函数没有返回行，仅此情况下补一次计数
+    total = query.order_by(None).count() if page > 1 else 0
+    return [], total
+
+async def paginate_query_async(session, query, page=1, limit=10, count_mode=COUNT_EXACT):
+    """分页查询的异步版本：在 AsyncSession 上执行 query 对应的语句，参数和返回值同 paginate_query"""
+    count_mode = normalize_count_mode(count_mode)
+    offset = (page - 1) * limit
+    statement = query.statement
+
+    if count_mode == COUNT_NONE:
+        rows = (await session.execute(statement.offset(offset).limit(limit + 1))).scalars().all()
+        return rows[:limit], offset + len(rows)
+
+    if count_mode == COUNT_ESTIMATE and session.bind.dialect.name == 'postgresql':
+        compiled = statement.order_by(None).compile(
+            dialect=session.bind.dialect,
+            compile_kwargs={'literal_binds': True}
+        )
+        plan = (await session.execute(text(f'EXPLAIN (FORMAT JSON) {compiled}'))).scalar()
+        items = (await session.execute(statement.offset(offset).limit(limit))).scalars().all()
+        return items, max(int(plan[0]['Plan']['Plan Rows']), offset + len(items))
+
+    rows = (await session.execute(
+        statement.add_columns(func.count().over().label('total_count')).offset(offset).limit(limit)
+    )).all()
+    if rows:
+        return [row[0] for row in rows], rows[0][-1]
+
+    # 页码超出范围时窗口函数没有返回行，仅此情况下补一次计数
+    if page == 1:
+        return [], 0
+    total = (await session.execute(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    )).scalar()
+    return [], total
+
+def _estimate_count(query):
+    """通过执行计划估算查询结果行数（仅支持PostgreSQL）
+
+    Returns:
+        int: 估算行数，不支持时返回None
+    """
+    bind = query.session.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return None
+
+    statement = query.order_by(None).statement.compile(
+        dialect=bind.dialect,
+        compile_kwargs={'literal_binds': True}
+    )
+    plan = query.session.connection().exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {statement}'
+    ).scalar()
+    return int(plan[0]['Plan']['Plan Rows'])
+
+def encode_cursor(sort_time, record_id):
+    """将最后一条记录的 (时间, ID) 编码为游标字符串"""
+    payload = json.dumps([sort_time.isoformat() if sort_time else None, record_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """解析游标字符串
+
+    Returns:
+        tuple: (时间, ID)
+
+    Raises:
+        ValueError: 游标格式不正确
+    """
+    try:
+        sort_time, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(sort_time), int(record_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f'无效的游标: {cursor}') from e
+
+def keyset_paginate(query, time_column, id_column, cursor=None, limit=10):
+    """按 (时间, ID) 倒序的键集分页
+
+    游标记录上一页最后一条的 (时间, ID)，下一页以 (时间, ID) < 游标 定位，
+    沿时间索引直接跳转（SQLite 索引隐含 rowid），深分页不再随 OFFSET 线性变慢。
+
+    Args:
+        query: 已设置过滤条件的查询对象
+        time_column: 排序时间列
+        id_column: 主键列
+        cursor: 上一页返回的游标，为空时返回第一页
+        limit: 每页数量
+
+    Returns:
+        tuple: (数据列表, 下一页游标，没有下一页时为None)
+    """
+    if cursor:
+        sort_time, record_id = decode_cursor(cursor)
+        query = query.filter(tuple_(time_column, id_column) < tuple_(sort_time, record_id))
+
+    rows = query.order_by(time_column.desc(), id_column.desc()).limit(limit + 1).all()
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, time_column.key), getattr(last, id_column.key))
+
+    return items, next_cursor
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码哈希工具
+bcrypt 计算在独立的有界线程池中执行，并发和排队数量受限，
+登录高峰时超出容量的请求立即失败（接口返回429），避免占满CPU拖慢其他请求；
+可选的校验备忘录让高频登录的服务账号在短时间内免去重复的bcrypt计算
+"""
+
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from flask import current_app, has_app_context
+from utils.cache import MemoryCache
+
+class PasswordHasherBusy(Exception):
+    """密码哈希线程池已满"""
+
+class VerificationMemo:
+    """密码校验备忘录（仅本进程内存）
+
+    记录最近校验成功的 (用户, 密码哈希, HMAC(密码))，在有效期内同一用户以相同密码
+    登录时直接比对HMAC，跳过bcrypt。HMAC密钥在进程启动时随机生成、不落盘，
+    备忘录中不保存明文密码；用户修改密码后哈希变化，旧记录自然失效。
+    """
+
+    def __init__(self, ttl=300, maxsize=1024):
+        self._key = os.urandom(32)
+        self._cache = MemoryCache(maxsize, ttl)
+
+    def _digest(self, password):
+        return hmac.new(self._key, password, hashlib.sha256).digest()
+
+    def check(self, memo_key, password, password_hash):
+        """检查是否有匹配的校验成功记录"""
+        entry = self._cache.get(memo_key)
+        if entry is None or entry[0] != password_hash:
+            return False
+        return hmac.compare_digest(entry[1], self._digest(password))
+
+    def remember(self, memo_key, password, password_hash):
+        """记录一次校验成功"""
+        self._cache.set(memo_key, (password_hash, self._digest(password)))
+
+    def stats(self):
+        return self._cache.stats()
+
+class PasswordHasher:
+    """有界的bcrypt线程池
+
+    bcrypt 在计算期间释放GIL，线程池即可把哈希计算限制在 max_workers 个核心上；
+    同时在执行和排队的任务总数不超过 max_workers + queue_size，超出时抛出
+    PasswordHasherBusy。
+    """
+
+    def __init__(self, max_workers=4, queue_size=16, rounds=12, timeout=30, memo=None):
+        """初始化线程池
+
+        Args:
+            max_workers: 并发执行bcrypt的线程数
+            queue_size: 允许排队等待的任务数
+            rounds: 新密码哈希的bcrypt cost
+            timeout: 等待单个任务完成的最长时间（秒）
+            memo: 校验备忘录，为空时每次校验都执行bcrypt
+        """
+        self.memo = memo
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.memo_hits = 0
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy('密码校验请求过多，请稍后重试')
+
+        with self._lock:
+            self.in_flight += 1
+        try:
+            try:
+                future = self._executor.submit(func, *args)
+            except Exception:
+                self._slots.release()
+                raise
+            # 任务结束时才归还名额：等待超时后任务仍在线程池中执行或排队
+            future.add_done_callback(lambda _: self._slots.release())
+            return future.result(self.timeout)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def hash(self, password):
+        """计算密码哈希
+
+        Returns:
+            str: bcrypt哈希字符串
+        """
+        if isinstance(password, str):
+            password = password.encode('utf-8')
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password, salt).decode('utf-8')
+
+    def verify(self, password, password_hash, memo_key=None):
+        """校验密码
+
+        Args:
+            password: 明文密码
+            password_hash: 已保存的bcrypt哈希
+            memo_key: 备忘录键（如 ('admin_user', 用户ID)），为空时不使用备忘录
+        """
+        if isinstance(password, str):
+            password = password.encode('utf-8')
+        if isinstance(password_hash, str):
+            password_hash = password_hash.encode('utf-8')
+
+        use_memo = self.memo is not None and memo_key is not None
+        if use_memo and self.memo.check(memo_key, password, password_hash):
+            with self._lock:
+                self.memo_hits += 1
+            return True
+
+        verified = self._run(bcrypt.checkpw, password, password_hash)
+        if verified and use_memo:
+            self.memo.remember(memo_key, password, password_hash)
+        return verified
+
+    def needs_rehash(self, password_hash):
+        """哈希的cost与当前配置不一致时需要重新哈希"""
+        if isinstance(password_hash, bytes):
+            password_hash = password_hash.decode('utf-8')
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def shutdown(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        """获取线程池状态"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'queue_size': self.queue_size,
+                'rounds': self.rounds,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'memo_hits': self.memo_hits
+            }
+
+# 无应用上下文时（如初始化脚本）使用的默认线程池
+_default_hasher = None
+_default_lock = threading.Lock()
+
+def get_password_hasher(app=None):
+    """获取当前应用的密码哈希线程池（首次调用时按配置创建）
+
+    配置项:
+        BCRYPT_ROUNDS: bcrypt cost，默认12
+        PASSWORD_HASH_WORKERS: 并发执行bcrypt的线程数，默认4
+        PASSWORD_HASH_QUEUE_SIZE: 允许排队的任务数，默认16
+        PASSWORD_VERIFY_MEMO_TTL: 校验备忘录有效期（秒），默认0即关闭
+        PASSWORD_VERIFY_MEMO_SIZE: 校验备忘录最大条目数，默认1024
+    """
+    global _default_hasher
+
+    if app is None and not has_app_context():
+        with _default_lock:
+            if _default_hasher is None:
+                _default_hasher = PasswordHasher()
+            return _default_hasher
+
+    app = app or current_app
+    hasher = app.extensions.get('password_hasher')
+    if hasher is None:
+        memo_ttl = app.config.get('PASSWORD_VERIFY_MEMO_TTL', 0)
+        hasher = PasswordHasher(
+            max_workers=app.config.get('PASSWORD_HASH_WORKERS', 4),
+            queue_size=app.config.get('PASSWORD_HASH_QUEUE_SIZE', 16),
+            rounds=app.config.get('BCRYPT_ROUNDS', 12),
+            memo=VerificationMemo(
+                memo_ttl, app.config.get('PASSWORD_VERIFY_MEMO_SIZE', 1024)
+            ) if memo_ttl > 0 else None
+        )
+        if app.extensions.setdefault('password_hasher', hasher) is not hasher:
+            hasher.shutdown()
+            hasher = app.extensions['password_hasher']
+    return hasher
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+只读副本路由
+标记为只读的接口把查询发送到 replica 绑定，写入和写后读仍走主库；
+副本出错或因复制延迟查不到数据时，在主库上重新执行该接口
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, has_app_context, make_response
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+
+# 会话 info 中的路由标记
+ROUTE_KEY = 'db_route'
+PINNED_KEY = 'db_route_pinned'
+ROUTE_REPLICA = 'replica'
+ROUTE_PRIMARY = 'primary'
+
+class RoutingSession(Session):
+    """按请求路由读查询的会话
+
+    仅当会话被标记为 replica 且尚未写入时，查询才发送到副本；
+    flush 和 INSERT/UPDATE/DELETE 语句始终使用主库，并把会话固定在主库上，
+    保证同一请求内写入之后的读取能看到自己的写入。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(ROUTE_KEY) == ROUTE_REPLICA:
+            if self._flushing or (clause is not None and getattr(clause, 'is_dml', False)):
+                self.info[PINNED_KEY] = True
+            elif not self.info.get(PINNED_KEY):
+                router = get_replica_router()
+                if router is not None and router.available():
+                    return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class ReplicaRouter:
+    """副本状态和路由统计
+
+    副本连接出错后在 retry_interval 秒内不再使用副本，全部查询回到主库。
+    """
+
+    def __init__(self, retry_interval=30):
+        self.retry_interval = retry_interval
+        self._failed_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            'replica_requests': 0,
+            'fallbacks': 0,
+            'errors': 0,
+            'last_error': None
+        }
+
+    def available(self):
+        return time.monotonic() >= self._failed_until
+
+    def mark_failed(self, error):
+        """记录副本错误，暂停使用副本"""
+        with self._lock:
+            self._failed_until = time.monotonic() + self.retry_interval
+            self._stats['errors'] += 1
+            self._stats['last_error'] = str(error)
+        print(f"警告: 只读副本不可用，{self.retry_interval}秒内查询改用主库: {str(error)}")
+
+    def watch(self, engine):
+        """副本引擎出现连接层面的错误时暂停使用副本（SQL错误仍按普通异常处理）"""
+        def on_error(context):
+            if context.is_disconnect or context.connection is None or isinstance(
+                context.original_exception, context.dialect.loaded_dbapi.OperationalError
+            ):
+                self.mark_failed(context.original_exception)
+
+        event.listen(engine, 'handle_error', on_error)
+
+    def record(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, available=self.available(), retry_interval=self.retry_interval)
+
+def get_replica_router(app=None):
+    """获取当前应用的副本路由器，未配置 replica 绑定时返回None
+
+    配置项:
+        SQLALCHEMY_BINDS['replica']: 只读副本连接地址
+        REPLICA_RETRY_INTERVAL: 副本出错后暂停使用的秒数，默认30
+    """
+    if app is None and not has_app_context():
+        return None
+    app = app or current_app._get_current_object()
+    if REPLICA_BIND not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return None
+
+    router = app.extensions.get('replica_router')
+    if router is None:
+        from models import db
+
+        router = ReplicaRouter(app.config.get('REPLICA_RETRY_INTERVAL', 30))
+        if app.extensions.setdefault('replica_router', router) is router:
+            with app.app_context():
+                router.watch(db.engines[REPLICA_BIND])
+        router = app.extensions['replica_router']
+    return router
+
+def reading_from_replica():
+    """当前请求的查询是否发送到只读副本（副本结果可能落后于主库）"""
+    if not has_app_context():
+        return False
+    from models import db
+
+    info = db.session.info
+    if info.get(ROUTE_KEY) != ROUTE_REPLICA or info.get(PINNED_KEY):
+        return False
+    router = get_replica_router()
+    return router is not None and router.available()
+
+@contextmanager
+def primary():
+    """在代码块内使用主库（用于读后写的维护逻辑，如刷新汇总表）"""
+    from models import db
+
+    info = db.session.info
+    previous = info.get(ROUTE_KEY)
+    info[ROUTE_KEY] = ROUTE_PRIMARY
+    try:
+        yield
+    finally:
+        info[ROUTE_KEY] = previous
+
+def read_replica(view):
+    """把接口中的查询路由到只读副本
+
+    接口返回404或5xx且本次使用了副本时，回滚会话后在主库上重新执行一次：
+    刚写入主库、尚未复制到副本的数据（如提交后立即查询订单详情）仍能查到，
+    副本故障时请求也不会失败。被装饰的接口必须是只读的。
+    """
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        router = get_replica_router()
+        if router is None or not router.available():
+            return view(*args, **kwargs)
+
+        from models import db
+
+        router.record('replica_requests')
+        db.session.info[ROUTE_KEY] = ROUTE_REPLICA
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            response = None
+        finally:
+            db.session.info.pop(ROUTE_KEY, None)
+            db.session.info.pop(PINNED_KEY, None)
+
+        if response is not None and response.status_code != 404 and response.status_code < 500:
+            return response
+
+        router.record('fallbacks')
+        db.session.rollback()
+        return view(*args, **kwargs)
+
+    return decorated_function
@@ -28,13 +28,14 @@ def success_response(data=None, message='操作成功', code=200):
     
     return jsonify(response_data), code
 
-def error_response(message='操作失败', code=400, error_code=None):
+def error_response(message='操作失败', code=400, error_code=None, data=None):
     """错误响应
     
     Args:
         message: 错误消息
         code: HTTP状态码
         error_code: 业务错误码
+        data: 错误详情（如逐条错误列表）
     
     Returns:
         Response: Flask响应对象
@@ -47,6 +48,9 @@ def error_response(message='操作失败', code=400, error_code=None):
     if error_code:
         response_data['error_code'] = error_code
     
+    if data is not None:
+        response_data['data'] = data
+    
     return jsonify(response_data), code
 
 def paginated_response(items, total, page, limit, message='获取成功'):
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+表结构补充
+create_all 只创建不存在的表，已有数据库中新增的可空列在启动时补上
+"""
+
+from sqlalchemy import inspect, text
+
+def ensure_column(engine, table_name, column_name, column_type):
+    """表中缺少该列时执行 ALTER TABLE ... ADD COLUMN（可重复执行）
+
+    Returns:
+        bool: 是否新增了该列
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(table_name):
+        return False
+    if column_name in {column['name'] for column in inspector.get_columns(table_name)}:
+        return False
+    with engine.begin() as connection:
+        connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}'))
+    return True
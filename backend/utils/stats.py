@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+统计查询工具
+按数据库方言生成时间分桶表达式，以及统计日期范围的解析与拆分
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import Date, cast, func
+
+BUCKET_HOUR = 'hour'
+BUCKET_DAY = 'day'
+VALID_BUCKETS = [BUCKET_HOUR, BUCKET_DAY]
+
+def bucket_expression(column, bucket, dialect_name):
+    """时间分桶表达式，结果为 'YYYY-MM-DD' 或 'YYYY-MM-DD HH:00' 字符串
+
+    Args:
+        column: 时间列（DATETIME 或 DATE）
+        bucket: 分桶粒度，hour 或 day
+        dialect_name: 数据库方言名称
+    """
+    if bucket not in VALID_BUCKETS:
+        raise ValueError(f'无效的分桶粒度: {bucket}')
+
+    if dialect_name == 'postgresql':
+        return func.to_char(column, 'YYYY-MM-DD HH24:00' if bucket == BUCKET_HOUR else 'YYYY-MM-DD')
+    if dialect_name in ('mysql', 'mariadb'):
+        return func.date_format(column, '%Y-%m-%d %H:00' if bucket == BUCKET_HOUR else '%Y-%m-%d')
+    return func.strftime('%Y-%m-%d %H:00' if bucket == BUCKET_HOUR else '%Y-%m-%d', column)
+
+def date_expression(column, dialect_name):
+    """取DATETIME列的日期部分（SQLite中CAST AS DATE会得到数字，需使用date函数）"""
+    if dialect_name == 'sqlite':
+        return func.date(column)
+    return cast(column, Date)
+
+def parse_date(value):
+    """把 'YYYY-MM-DD' 字符串或 date 转换为当天零点的 datetime，datetime 原样返回"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.strptime(value, '%Y-%m-%d')
+
+def full_day_range(start, end, through):
+    """计算 [start, end] 时间范围内、且不晚于 through 的完整自然日区间
+
+    Args:
+        start: 开始时间（含），为空表示不限
+        end: 结束时间（含），为空表示不限
+        through: 可使用的最后一天（如汇总表已汇总到的日期），为空表示没有可用的天
+
+    Returns:
+        tuple: (第一天, 最后一天)，没有完整自然日时返回None
+    """
+    if through is None:
+        return None
+
+    if start is None:
+        first = date.min
+    elif start == datetime.combine(start.date(), datetime.min.time()):
+        first = start.date()
+    else:
+        first = start.date() + timedelta(days=1)
+
+    if end is None:
+        last = through
+    elif end.time() == datetime.max.time():
+        # 23:59:59.999999 视为包含当天
+        last = min(through, end.date())
+    else:
+        last = min(through, end.date() - timedelta(days=1))
+    if first > last:
+        return None
+    return first, last
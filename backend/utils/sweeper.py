@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+过期预订单后台清理工具
+在后台线程中按固定周期分批删除过期的临时订单和库存预占记录，并定期维护订单分区、
+汇总操作日志每日统计
+"""
+
+import threading
+import time
+from datetime import datetime
+
+class TempOrderSweeper:
+    """过期预订单清理器
+
+    每个周期循环执行有界的批量删除，直到某一批不足 batch_size 行为止，
+    并记录每个周期的清理行数和耗时。
+    """
+
+    def __init__(self, app, interval=60, batch_size=500, sweepers=None):
+        """初始化清理器
+
+        Args:
+            app: Flask应用实例
+            interval: 清理周期（秒）
+            batch_size: 每批最多删除的行数
+            sweepers: 批量清理函数列表（参数为 batch_size，返回删除行数并提交），
+                第一个函数的删除行数计为清理的预订单数；默认清理 models.order 中的
+                临时订单和库存预占
+        """
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.sweepers = sweepers
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._metrics = {
+            'cycles': 0,
+            'total_swept': 0,
+            'last_swept': 0,
+            'last_batches': 0,
+            'last_latency_ms': 0.0,
+            'max_latency_ms': 0.0,
+            'last_run_time': None,
+            'last_error': None
+        }
+
+    def run_once(self):
+        """执行一个清理周期
+
+        Returns:
+            int: 本周期清理的临时订单数量
+        """
+        sweepers = self.sweepers
+        if sweepers is None:
+            from models.order import TempOrder, StockHold
+            sweepers = [TempOrder.sweep_expired_batch, StockHold.sweep_expired_batch]
+
+        start = time.perf_counter()
+        swept = 0
+        batches = 0
+
+        with self.app.app_context():
+            try:
+                for index, sweep in enumerate(sweepers):
+                    while not self._stop_event.is_set():
+                        count = sweep(self.batch_size)
+                        if index == 0:
+                            swept += count
+                            batches += 1
+                        if count < self.batch_size:
+                            break
+                error = None
+            except Exception as e:
+                # 应用自己的 Flask-SQLAlchemy 实例（app.py 与 app_simple.py 各不相同）
+                self.app.extensions['sqlalchemy'].session.rollback()
+                error = str(e)
+                print(f"清理过期预订单失败: {error}")
+
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._metrics['cycles'] += 1
+            self._metrics['total_swept'] += swept
+            self._metrics['last_swept'] = swept
+            self._metrics['last_batches'] = batches
+            self._metrics['last_latency_ms'] = round(latency_ms, 3)
+            self._metrics['max_latency_ms'] = round(max(self._metrics['max_latency_ms'], latency_ms), 3)
+            self._metrics['last_run_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self._metrics['last_error'] = error
+
+        if swept:
+            print(f"已清理过期预订单 {swept} 条，{batches} 批，耗时 {latency_ms:.1f}ms")
+
+        return swept
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        """启动后台清理线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='temp-order-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止后台清理线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def get_metrics(self):
+        """获取清理统计信息"""
+        with self._lock:
+            return dict(self._metrics, interval=self.interval, batch_size=self.batch_size)
+
+def start_temp_order_sweeper(app, sweepers=None):
+    """按应用配置创建并启动清理器，实例保存在 app.extensions 中（已启动时直接返回）
+
+    配置项:
+        TEMP_ORDER_SWEEP_INTERVAL: 清理周期（秒），默认60
+        TEMP_ORDER_SWEEP_BATCH_SIZE: 每批最多删除行数，默认500
+    """
+    sweeper = app.extensions.get('temp_order_sweeper')
+    if sweeper is None:
+        sweeper = TempOrderSweeper(
+            app,
+            interval=app.config.get('TEMP_ORDER_SWEEP_INTERVAL', 60),
+            batch_size=app.config.get('TEMP_ORDER_SWEEP_BATCH_SIZE', 500),
+            sweepers=sweepers
+        )
+        sweeper = app.extensions.setdefault('temp_order_sweeper', sweeper)
+    sweeper.start()
+    return sweeper
+
+class OrderPartitionMaintainer:
+    """订单分区维护器
+
+    按固定周期执行 maintain_order_partitions：PostgreSQL 提前建好后续月份的分区
+    （服务长时间不重启时，新月份的订单也不会落入默认分区），SQLite 迁移已结束的历史订单；
+    随后刷新操作日志每日汇总（OperationLogDaily），统计接口本身只读汇总表。
+    """
+
+    def __init__(self, app, interval=86400):
+        """初始化维护器
+
+        Args:
+            app: Flask应用实例
+            interval: 维护周期（秒）
+        """
+        self.app = app
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._metrics = {
+            'cycles': 0,
+            'last_result': None,
+            'log_rollup_through': None,
+            'last_latency_ms': 0.0,
+            'last_run_time': None,
+            'last_error': None
+        }
+
+    def run_once(self):
+        """执行一次分区维护
+
+        Returns:
+            PostgreSQL 为新建的分区表名列表，SQLite 为各月份迁移的订单数
+        """
+        from models import db
+        from models.log import OperationLogDaily
+        from models.partition import maintain_order_partitions
+
+        start = time.perf_counter()
+        result = None
+        error = None
+        try:
+            result = maintain_order_partitions(self.app)
+        except Exception as e:
+            with self.app.app_context():
+                db.session.rollback()
+            error = str(e)
+            print(f"订单分区维护失败: {error}")
+
+        # 分区维护失败不影响日志汇总
+        through = None
+        with self.app.app_context():
+            try:
+                through = OperationLogDaily.refresh()
+            except Exception as e:
+                db.session.rollback()
+                error = error or str(e)
+                print(f"操作日志每日汇总失败: {e}")
+
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._metrics['cycles'] += 1
+            self._metrics['last_result'] = result
+            self._metrics['log_rollup_through'] = through.isoformat() if through else None
+            self._metrics['last_latency_ms'] = round(latency_ms, 3)
+            self._metrics['last_run_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self._metrics['last_error'] = error
+
+        if result:
+            print(f"订单分区维护完成: {result}")
+
+        return result
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        """启动后台维护线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='order-partition-maintainer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止后台维护线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def get_metrics(self):
+        """获取维护统计信息"""
+        with self._lock:
+            return dict(self._metrics, interval=self.interval)
+
+def start_order_partition_maintainer(app):
+    """按应用配置创建并启动分区维护器，实例保存在 app.extensions 中
+
+    配置项:
+        ORDER_PARTITION_MAINTAIN_INTERVAL: 维护周期（秒），默认86400（每天）
+    """
+    maintainer = app.extensions.get('order_partition_maintainer')
+    if maintainer is None:
+        maintainer = OrderPartitionMaintainer(
+            app,
+            interval=app.config.get('ORDER_PARTITION_MAINTAIN_INTERVAL', 86400)
+        )
+        maintainer = app.extensions.setdefault('order_partition_maintainer', maintainer)
+    maintainer.start()
+    return maintainer
+
+def start_background_workers(app):
+    """启动 app.py 的全部后台任务：过期预订单清理、订单分区维护和操作日志汇总（可重复调用）"""
+    start_temp_order_sweeper(app)
+    start_order_partition_maintainer(app)
+
+def start_on_first_request(app, starter):
+    """在处理第一个请求的进程中调用 starter(app) 启动后台线程
+
+    适用于任意WSGI服务器：gunicorn 等多进程服务器在fork之后的worker中启动（线程不会
+    随fork复制）；debug模式重载器的父进程不处理请求，不会启动。
+    """
+    lock = threading.Lock()
+    started = []
+
+    @app.before_request
+    def start_background_tasks():
+        if started:
+            return
+        with lock:
+            if not started:
+                starter(app)
+                started.append(True)
+
+    return start_background_tasks
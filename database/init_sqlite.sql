@@ -25,6 +25,31 @@ CREATE INDEX idx_wheelchair_name ON wheelchair(name);
 CREATE INDEX idx_wheelchair_price ON wheelchair(price);
 CREATE INDEX idx_wheelchair_stock ON wheelchair(stock);
 
+-- 创建轮椅全文索引（FTS5 trigram 分词，支持中文子串搜索，需要 SQLite 3.34+）
+DROP TABLE IF EXISTS wheelchair_fts;
+CREATE VIRTUAL TABLE wheelchair_fts USING fts5(
+    name, description, manufacturer,
+    content='wheelchair', content_rowid='id', tokenize='trigram'
+);
+
+-- 通过触发器保持全文索引与轮椅表同步（仅文本字段变更时更新索引）
+CREATE TRIGGER wheelchair_fts_ai AFTER INSERT ON wheelchair BEGIN
+    INSERT INTO wheelchair_fts(rowid, name, description, manufacturer)
+    VALUES (new.id, new.name, new.description, new.manufacturer);
+END;
+
+CREATE TRIGGER wheelchair_fts_ad AFTER DELETE ON wheelchair BEGIN
+    INSERT INTO wheelchair_fts(wheelchair_fts, rowid, name, description, manufacturer)
+    VALUES ('delete', old.id, old.name, old.description, old.manufacturer);
+END;
+
+CREATE TRIGGER wheelchair_fts_au AFTER UPDATE OF name, description, manufacturer ON wheelchair BEGIN
+    INSERT INTO wheelchair_fts(wheelchair_fts, rowid, name, description, manufacturer)
+    VALUES ('delete', old.id, old.name, old.description, old.manufacturer);
+    INSERT INTO wheelchair_fts(rowid, name, description, manufacturer)
+    VALUES (new.id, new.name, new.description, new.manufacturer);
+END;
+
 -- 创建正式订单表
 CREATE TABLE formal_order (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -41,7 +66,7 @@ CREATE TABLE formal_order (
 
 -- 创建正式订单表索引
 CREATE INDEX idx_formal_order_no ON formal_order(order_no);
-CREATE INDEX idx_formal_order_status ON formal_order(status);
+CREATE INDEX idx_formal_order_status ON formal_order(status, create_time);
 CREATE INDEX idx_formal_order_create_time ON formal_order(create_time DESC);
 
 -- 创建管理用户表
@@ -64,6 +89,7 @@ CREATE TABLE operation_log (
     operate_type VARCHAR(50) NOT NULL,
     target_id INTEGER,
     operate_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+    detail VARCHAR(255),
     FOREIGN KEY (operator_id) REFERENCES admin_user(id)
 );
 
@@ -72,6 +98,44 @@ CREATE INDEX idx_operation_log_operator ON operation_log(operator_id);
 CREATE INDEX idx_operation_log_time ON operation_log(operate_time DESC);
 CREATE INDEX idx_operation_log_type ON operation_log(operate_type);
 
+-- 创建操作日志每日汇总表（统计接口读取已结束日期的汇总）
+DROP TABLE IF EXISTS operation_log_daily;
+CREATE TABLE operation_log_daily (
+    stat_date DATE NOT NULL,
+    operate_type VARCHAR(50) NOT NULL,
+    operator_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (stat_date, operate_type, operator_id)
+);
+
+-- 创建订单每日汇总表（按订单创建日期和当前状态，下单和状态变更时增量更新）
+DROP TABLE IF EXISTS daily_order_stat;
+CREATE TABLE daily_order_stat (
+    stat_date DATE NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    deposit_total REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (stat_date, status)
+);
+
+-- 创建轮椅每日汇总表（租出次数、取消次数、库存净变化）
+DROP TABLE IF EXISTS daily_wheelchair_stat;
+CREATE TABLE daily_wheelchair_stat (
+    stat_date DATE NOT NULL,
+    wheelchair_id INTEGER NOT NULL,
+    rental_count INTEGER NOT NULL DEFAULT 0,
+    cancel_count INTEGER NOT NULL DEFAULT 0,
+    stock_change INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (stat_date, wheelchair_id)
+);
+
+-- 创建统计汇总进度表
+DROP TABLE IF EXISTS stats_watermark;
+CREATE TABLE stats_watermark (
+    name VARCHAR(50) PRIMARY KEY,
+    through_date DATE NOT NULL
+);
+
 -- 创建临时预订单表
 CREATE TABLE temp_order (
     id VARCHAR(50) PRIMARY KEY,
@@ -86,6 +150,19 @@ CREATE TABLE temp_order (
 CREATE INDEX idx_temp_order_create_time ON temp_order(create_time);
 CREATE INDEX idx_temp_order_wheelchair ON temp_order(wheelchair_id);
 
+-- 创建库存预占表（预订单占用的库存，expire_time 之后不再计入占用）
+DROP TABLE IF EXISTS stock_hold;
+CREATE TABLE stock_hold (
+    temp_order_id VARCHAR(50) PRIMARY KEY,
+    wheelchair_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 1,
+    expire_time DATETIME NOT NULL
+);
+
+-- 创建库存预占表索引（可用库存按 (wheelchair_id, expire_time, quantity) 覆盖索引计算）
+CREATE INDEX idx_stock_hold_active ON stock_hold(wheelchair_id, expire_time, quantity);
+CREATE INDEX idx_stock_hold_expire_time ON stock_hold(expire_time);
+
 -- 插入初始轮椅数据
 INSERT INTO wheelchair (name, description, price, stock, manufacturer) VALUES
 ('电动轮椅豪华版', '配备GPS定位、智能刹车系统的高端电动轮椅，适合长期使用', 200.0, 3, '智能康复设备有限公司'),